@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+import csv
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from input_files import open_text
+
+# Column names of a DBC.DBQLSqlTbl export, matched case-insensitively. UserName and
+# StartTime come from DBQLogTbl and are only used when the export joined them in.
+DBQL_REQUIRED_COLUMNS = ("QueryID", "SqlRowNo", "SqlTextInfo")
+DBQL_OPTIONAL_COLUMNS = ("UserName", "StartTime")
+
+
+@dataclass
+class DbqlQuery:
+    query_id: str
+    sql_text: str
+    fragment_count: int
+    user_name: Optional[str] = None
+    start_time: Optional[str] = None
+    # SqlRowNo of the first fragment held; above 1 for fragments that arrived after
+    # the rest of their query had been flushed.
+    first_row_no: int = 1
+    # Fragments were numbered 1..fragment_count without gaps, and no other fragment of
+    # the QueryID turned up while the query was held.
+    complete: bool = True
+
+
+@dataclass
+class _PendingQuery:
+    user_name: Optional[str]
+    start_time: Optional[str]
+    fragments: List[Tuple[int, str]] = field(default_factory=list)
+    # Started by fragments whose QueryID had already been flushed.
+    late: bool = False
+
+
+def _resolve_columns(path: Path, header: List[str]) -> Dict[str, int]:
+    positions = {name.strip().lower(): index for index, name in enumerate(header)}
+    missing = [name for name in DBQL_REQUIRED_COLUMNS if name.lower() not in positions]
+    if missing:
+        raise ValueError(
+            f"{path} is not a DBQLSqlTbl export: missing column(s) {', '.join(missing)}. "
+            f"Available columns: {', '.join(header)}"
+        )
+    return {
+        name: positions[name.lower()]
+        for name in DBQL_REQUIRED_COLUMNS + DBQL_OPTIONAL_COLUMNS
+        if name.lower() in positions
+    }
+
+
+def _row_number(value: str) -> int:
+    try:
+        return int(float(value))
+    except ValueError:
+        return 0
+
+
+def iter_dbql_queries(
+    path: Path, delimiter: str = ",", window: int = 10000
+) -> Iterator[DbqlQuery]:
+    """Stream a ``DBC.DBQLSqlTbl`` export and reassemble each query's SQL text.
+
+    DBQL splits long SQL across rows that share a ``QueryID`` and are numbered by
+    ``SqlRowNo``. Fragments are buffered per query and joined in ``SqlRowNo`` order.
+    At most ``window`` queries are held open: when a new ``QueryID`` arrives with the
+    buffer full, the query seen first is flushed. A flushed query is held back for
+    another ``window`` flushes before it is yielded, so a fragment that arrives in
+    that time marks it incomplete. The late fragments come out as a separate,
+    incomplete query, as do fragments of any of the last ``window`` QueryIDs already
+    yielded, so a badly sorted export shows up in the results instead of being
+    silently merged or dropped. Queries are yielded in the order their first fragment
+    appeared.
+    """
+    window = max(1, window)
+    pending: "OrderedDict[str, _PendingQuery]" = OrderedDict()
+    flushed: "OrderedDict[str, DbqlQuery]" = OrderedDict()
+    yielded: "OrderedDict[str, None]" = OrderedDict()
+
+    def _flush(query_id: str) -> Iterator[DbqlQuery]:
+        query = pending.pop(query_id)
+        query.fragments.sort(key=lambda fragment: fragment[0])
+        row_numbers = [row_no for row_no, _ in query.fragments]
+        # A QueryID can be held twice when its late fragments were flushed too.
+        while query_id in flushed or len(flushed) >= window:
+            held_id, held = flushed.popitem(last=False)
+            yielded[held_id] = None
+            if len(yielded) > window:
+                yielded.popitem(last=False)
+            yield held
+        flushed[query_id] = DbqlQuery(
+            query_id=query_id,
+            sql_text="".join(text for _, text in query.fragments),
+            fragment_count=len(query.fragments),
+            user_name=query.user_name,
+            start_time=query.start_time,
+            first_row_no=row_numbers[0],
+            complete=not query.late and row_numbers == list(range(1, len(row_numbers) + 1)),
+        )
+
+    with open_text(path) as handle:
+        reader = csv.reader(handle, delimiter=delimiter)
+        header = next(reader, None)
+        columns = _resolve_columns(path, header or [])
+        id_index = columns["QueryID"]
+        row_index = columns["SqlRowNo"]
+        text_index = columns["SqlTextInfo"]
+        user_index = columns.get("UserName")
+        start_index = columns.get("StartTime")
+        width = max(columns.values()) + 1
+        for values in reader:
+            if len(values) < width:
+                values = values + [""] * (width - len(values))
+            query_id = values[id_index].strip()
+            if not query_id:
+                continue
+            query = pending.get(query_id)
+            if query is None:
+                late = query_id in flushed or query_id in yielded
+                if query_id in flushed:
+                    flushed[query_id].complete = False
+                if len(pending) >= window:
+                    yield from _flush(next(iter(pending)))
+                query = pending[query_id] = _PendingQuery(
+                    user_name=values[user_index].strip() if user_index is not None else None,
+                    start_time=values[start_index].strip() if start_index is not None else None,
+                    late=late,
+                )
+            query.fragments.append((_row_number(values[row_index]), values[text_index]))
+    while pending:
+        yield from _flush(next(iter(pending)))
+    yield from flushed.values()
+
+
+__all__ = [
+    "DBQL_OPTIONAL_COLUMNS",
+    "DBQL_REQUIRED_COLUMNS",
+    "DbqlQuery",
+    "iter_dbql_queries",
+]
@@ -4,6 +4,7 @@ import hashlib
 import json
 import re
 import sys
+import threading
 from collections import defaultdict
 from dataclasses import dataclass
 from pathlib import Path
@@ -269,39 +270,43 @@ class LineageEmitter:
         self._flow_cache: Dict[Path, str] = {}
         self.flow_mcps: Dict[str, MetadataChangeProposalWrapper] = {}
         self.job_mcps: List[MetadataChangeProposalWrapper] = []
+        # collect() may be called from parse worker threads and mutates the
+        # accumulators above, so updates are serialized.
+        self._lock = threading.Lock()
 
     def collect(self, context: LineageTaskContext, result: Any) -> None:
-        upstream_tables = getattr(result, "in_tables", None) or []
-        downstream_tables = getattr(result, "out_tables", None) or []
-        column_lineage = getattr(result, "column_lineage", None)
-        _accumulate_dataset_columns(
-            self.dataset_columns,
-            upstream_tables,
-            downstream_tables,
-            column_lineage,
-        )
-        if not downstream_tables:
-            return
-
-        flow_urn = self._ensure_flow(context)
-        job_urn = self._build_job_urn(flow_urn, context)
-        self.job_mcps.append(
-            MetadataChangeProposalWrapper(
-                entityUrn=job_urn,
-                aspect=self._build_job_info_aspect(flow_urn, context, result),
+        with self._lock:
+            upstream_tables = getattr(result, "in_tables", None) or []
+            downstream_tables = getattr(result, "out_tables", None) or []
+            column_lineage = getattr(result, "column_lineage", None)
+            _accumulate_dataset_columns(
+                self.dataset_columns,
+                upstream_tables,
+                downstream_tables,
+                column_lineage,
             )
-        )
-        self.job_mcps.append(
-            MetadataChangeProposalWrapper(
-                entityUrn=job_urn,
-                aspect=self._build_job_lineage_aspect(
-                    upstream_tables,
-                    downstream_tables,
-                    column_lineage,
-                    result,
-                ),
+            if not downstream_tables:
+                return
+
+            flow_urn = self._ensure_flow(context)
+            job_urn = self._build_job_urn(flow_urn, context)
+            self.job_mcps.append(
+                MetadataChangeProposalWrapper(
+                    entityUrn=job_urn,
+                    aspect=self._build_job_info_aspect(flow_urn, context, result),
+                )
+            )
+            self.job_mcps.append(
+                MetadataChangeProposalWrapper(
+                    entityUrn=job_urn,
+                    aspect=self._build_job_lineage_aspect(
+                        upstream_tables,
+                        downstream_tables,
+                        column_lineage,
+                        result,
+                    ),
+                )
             )
-        )
 
     def emit(self) -> None:
         if not self.job_mcps:
@@ -0,0 +1,251 @@
+from __future__ import annotations
+
+import gzip
+import io
+import os
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import (
+    IO,
+    Any,
+    Callable,
+    Deque,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    TypeVar,
+)
+
+COMPRESSION_SUFFIXES = (".gz", ".zst")
+
+_T = TypeVar("_T")
+
+
+def compression_of(path: Path) -> Optional[str]:
+    """Return the compression suffix of ``path`` (``.gz``/``.zst``), if any."""
+    suffix = path.suffix.lower()
+    return suffix if suffix in COMPRESSION_SUFFIXES else None
+
+
+def _open_zstd(path: Path) -> IO[bytes]:
+    try:
+        from compression import zstd  # type: ignore[import-not-found]
+
+        return zstd.open(path, "rb")
+    except ImportError:
+        pass
+    try:
+        import zstandard
+    except ImportError as exc:
+        raise RuntimeError(
+            f"Reading {path} needs zstd support: install the 'zstandard' package."
+        ) from exc
+    reader = zstandard.ZstdDecompressor().stream_reader(path.open("rb"), closefd=True)
+    # The raw reader has no readline(); buffering adds it, and line iteration with it.
+    return io.BufferedReader(reader)  # type: ignore[arg-type]
+
+
+def open_binary(path: Path, buffer_size: int = -1) -> IO[bytes]:
+    """Open an input for reading, decompressing ``.gz``/``.zst`` on the fly.
+
+    ``buffer_size`` sets the read size of plain files; the decompressors pick their own.
+    """
+    compression = compression_of(path)
+    if compression == ".gz":
+        return gzip.open(path, "rb")  # type: ignore[return-value]
+    if compression == ".zst":
+        return _open_zstd(path)
+    return path.open("rb", buffering=buffer_size)
+
+
+def open_text(path: Path, buffer_size: int = -1) -> IO[str]:
+    """Like ``open_binary``, decoded as UTF-8 with newlines left to the csv module."""
+    return io.TextIOWrapper(open_binary(path, buffer_size), encoding="utf-8", newline="")
+
+
+def find_inputs(root: Path, extension: str, workers: int = 1) -> Iterator[Path]:
+    """Files under ``root`` ending in ``extension``, plain or compressed, in sorted order.
+
+    The tree is walked depth first with each directory's entries sorted by name, which
+    is the order ``sorted(root.rglob(...))`` gives, but files are yielded as soon as
+    their directory has been listed. Listings run on ``workers`` threads: once a
+    directory is listed, all of its subdirectories are queued for listing, so slow
+    network shares are read many directories at a time.
+    """
+    endings = tuple(extension + suffix for suffix in ("",) + COMPRESSION_SUFFIXES)
+
+    def _list(directory: Path) -> List[Tuple[Path, bool]]:
+        with os.scandir(directory) as scan:
+            # Like rglob, symlinked directories are not descended into.
+            entries = [
+                (Path(entry.path), entry.is_dir() and not entry.is_symlink()) for entry in scan
+            ]
+        entries.sort(key=lambda entry: entry[0].name)
+        return entries
+
+    pool = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="discover")
+
+    def _visit(listing: "Future[List[Tuple[Path, bool]]]") -> Iterator[Path]:
+        entries = listing.result()
+        subdirectories = {path: pool.submit(_list, path) for path, is_dir in entries if is_dir}
+        for path, is_dir in entries:
+            if is_dir:
+                yield from _visit(subdirectories[path])
+            elif path.name.endswith(endings):
+                yield path
+
+    try:
+        yield from _visit(pool.submit(_list, root))
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+@dataclass
+class LoadStats:
+    """Where input loading spent its time.
+
+    ``busy_s`` sums the time loader threads spent reading and splitting; ``wait_s``
+    is how long the consumer was blocked waiting for the next statement. CSV loaders
+    add the rows they scanned and the time the scan took.
+    """
+
+    workers: int
+    sources: int = 0
+    statements: int = 0
+    busy_s: float = 0.0
+    wait_s: float = 0.0
+    csv_rows: int = 0
+    csv_rows_filtered: int = 0
+    csv_scan_s: float = 0.0
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def add_busy(self, seconds: float) -> None:
+        with self._lock:
+            self.busy_s += seconds
+
+    def add_csv_scan(self, rows: int, filtered: int, seconds: float) -> None:
+        with self._lock:
+            self.csv_rows += rows
+            self.csv_rows_filtered += filtered
+            self.csv_scan_s += seconds
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "sources": self.sources,
+            "statements": self.statements,
+            "busy_s": self.busy_s,
+            "wait_s": self.wait_s,
+            "csv_rows": self.csv_rows,
+            "csv_rows_filtered": self.csv_rows_filtered,
+            "csv_scan_s": self.csv_scan_s,
+            "csv_rows_per_s": self.csv_rows / self.csv_scan_s if self.csv_scan_s else None,
+        }
+
+
+_DONE = object()
+
+
+@dataclass
+class _LoadFailure:
+    error: BaseException
+
+
+def iter_loaded_in_order(
+    loaders: Iterable[Callable[[], Iterable[_T]]],
+    workers: int,
+    *,
+    buffer_size: int = 1000,
+    stats: Optional[LoadStats] = None,
+) -> Iterator[_T]:
+    """Run ``loaders`` on a thread pool and yield their items in loader order.
+
+    Up to ``workers`` loaders run at once, each filling its own queue of at most
+    ``buffer_size`` items, so the next sources are read and split while the current
+    one is being consumed and memory stays bounded. The order of the output does not
+    depend on which loader finishes first. A loader's exception is raised at its
+    place in the output.
+    """
+    workers = max(1, workers)
+    stats = stats or LoadStats(workers=workers)
+    stop = threading.Event()
+
+    def _put(channel: "queue.Queue[Any]", message: Any) -> bool:
+        while not stop.is_set():
+            try:
+                channel.put(message, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _run(loader: Callable[[], Iterable[_T]], channel: "queue.Queue[Any]") -> None:
+        started = time.perf_counter()
+        try:
+            iterator = iter(loader())
+            while True:
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    break
+                stats.add_busy(time.perf_counter() - started)
+                if not _put(channel, (item,)):
+                    return
+                started = time.perf_counter()
+            stats.add_busy(time.perf_counter() - started)
+            _put(channel, _DONE)
+        except BaseException as exc:  # re-raised in the consumer, in order
+            _put(channel, _LoadFailure(exc))
+
+    remaining = iter(loaders)
+    running: Deque["queue.Queue[Any]"] = deque()
+    pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="load")
+
+    def _start_more() -> None:
+        while len(running) < workers:
+            loader = next(remaining, None)
+            if loader is None:
+                return
+            channel: "queue.Queue[Any]" = queue.Queue(maxsize=max(1, buffer_size))
+            pool.submit(_run, loader, channel)
+            running.append(channel)
+            stats.sources += 1
+
+    try:
+        waited = time.perf_counter()
+        _start_more()
+        while running:
+            message = running[0].get()
+            if message is _DONE:
+                running.popleft()
+                _start_more()
+                continue
+            stats.wait_s += time.perf_counter() - waited
+            if isinstance(message, _LoadFailure):
+                raise message.error
+            stats.statements += 1
+            yield message[0]
+            waited = time.perf_counter()
+        stats.wait_s += time.perf_counter() - waited
+    finally:
+        stop.set()
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+__all__ = [
+    "COMPRESSION_SUFFIXES",
+    "LoadStats",
+    "compression_of",
+    "find_inputs",
+    "iter_loaded_in_order",
+    "open_binary",
+    "open_text",
+]
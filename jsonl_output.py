@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+import json
+import queue
+import threading
+import time
+from pathlib import Path
+from typing import IO, Any, Callable, Dict, List, Optional, Tuple
+
+OUTPUT_DIR_NAME = "[[]]outputs"
+
+_CLOSE = object()
+
+
+class JsonlShardWriter:
+    """Writes one compact JSON line per record to size-rotated shards on a thread.
+
+    Records are serialized and written by a dedicated thread, so the caller only
+    pays for a put on a bounded queue (and blocks when the writer falls behind).
+    The thread drains whatever is queued, up to ``batch_size`` records, writes the
+    batch and flushes once. A shard is closed and the next one started when adding a
+    line would take it past ``shard_bytes``. Shards are named ``part-00000.jsonl``,
+    ``part-00001.jsonl``, ... under ``directory``. An error on the writer thread is
+    raised from the next ``write()`` or from ``close()``. When ``on_written`` is
+    given, it is called on the writer thread with each record's ``key``, shard file
+    name, byte offset and length once the record has been written.
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        *,
+        shard_bytes: int = 256 * 1024 * 1024,
+        queue_size: int = 10_000,
+        batch_size: int = 1_000,
+        on_written: Optional[Callable[[Any, str, int, int], None]] = None,
+    ):
+        self.directory = directory
+        self.shard_bytes = shard_bytes
+        self.batch_size = batch_size
+        self.on_written = on_written
+        self.records = 0
+        self.bytes_written = 0
+        self.shards = 0
+        self.batches = 0
+        self.producer_wait_s = 0.0
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=queue_size)
+        self._error: Optional[BaseException] = None
+        self._handle: Optional[IO[bytes]] = None
+        self._shard_name = ""
+        self._shard_size = 0
+        directory.mkdir(parents=True, exist_ok=True)
+        self._thread = threading.Thread(target=self._run, name="jsonl-writer", daemon=True)
+        self._thread.start()
+
+    def write(self, record: Dict[str, Any], key: Any = None) -> None:
+        if self._error is not None:
+            raise RuntimeError(f"Writing {self.directory} failed: {self._error}") from self._error
+        started = time.perf_counter()
+        self._queue.put((key, record))
+        self.producer_wait_s += time.perf_counter() - started
+
+    def close(self) -> None:
+        self._queue.put(_CLOSE)
+        self._thread.join()
+        if self._error is not None:
+            raise RuntimeError(f"Writing {self.directory} failed: {self._error}") from self._error
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "format": "jsonl",
+            "directory": str(self.directory),
+            "records": self.records,
+            "bytes": self.bytes_written,
+            "shards": self.shards,
+            "batches": self.batches,
+            "producer_wait_s": self.producer_wait_s,
+        }
+
+    def _rotate(self) -> IO[bytes]:
+        if self._handle is not None:
+            self._handle.close()
+        self._shard_name = f"part-{self.shards:05d}.jsonl"
+        self.shards += 1
+        self._shard_size = 0
+        self._handle = (self.directory / self._shard_name).open("wb", buffering=1024 * 1024)
+        return self._handle
+
+    def _write_batch(self, batch: List[Tuple[Any, Dict[str, Any]]]) -> None:
+        handle = self._handle
+        written: List[Tuple[Any, str, int, int]] = []
+        for key, record in batch:
+            line = (json.dumps(record, separators=(",", ":")) + "\n").encode("utf-8")
+            full = self._shard_size and self._shard_size + len(line) > self.shard_bytes
+            if handle is None or full:
+                handle = self._rotate()
+            handle.write(line)
+            written.append((key, self._shard_name, self._shard_size, len(line)))
+            self._shard_size += len(line)
+            self.bytes_written += len(line)
+        self.records += len(batch)
+        self.batches += 1
+        if handle is not None:
+            handle.flush()
+        if self.on_written is not None:
+            for location in written:
+                self.on_written(*location)
+
+    def _run(self) -> None:
+        closing = False
+        while not closing:
+            batch: List[Tuple[Any, Dict[str, Any]]] = []
+            item = self._queue.get()
+            while True:
+                if item is _CLOSE:
+                    closing = True
+                    break
+                batch.append(item)
+                if len(batch) >= self.batch_size:
+                    break
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+            if batch and self._error is None:
+                try:
+                    self._write_batch(batch)
+                except BaseException as exc:  # surfaced to the producer
+                    self._error = exc
+        if self._handle is not None:
+            try:
+                self._handle.close()
+            except OSError as exc:  # pragma: no cover - defensive
+                self._error = self._error or exc
+
+
+__all__ = [
+    "OUTPUT_DIR_NAME",
+    "JsonlShardWriter",
+]
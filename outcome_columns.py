@@ -0,0 +1,298 @@
+from __future__ import annotations
+
+from array import array
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, List, Tuple
+
+from report_utils import ReportAccumulator, debug_error_label
+
+if TYPE_CHECKING:  # pragma: no cover - type checking only
+    from parse_sql_minimal import QueryOutcome
+
+COLUMNS_NAME = "[[]]outcomes.npz"
+
+# Categorical columns. Missing values get the labels ReportAccumulator files them
+# under, and ``flags`` holds a query's flags comma-joined in their assigned order.
+_CATEGORIES = (
+    "source",
+    "statement_type",
+    "statement_type_source",
+    "parser_statement_type",
+    "error_label",
+    "parser_error",
+    "flags",
+)
+_BOOLEANS = ("succeeded", "has_parser_error", "rpc_error", "timed_out", "skipped", "duplicate")
+_STRINGS = ("identifier", "sql_digest")
+
+
+def _numpy() -> Any:
+    try:
+        import numpy
+    except ImportError as exc:
+        raise RuntimeError(
+            "Columnar outcomes need NumPy: install the 'numpy' package."
+        ) from exc
+    return numpy
+
+
+def numpy_available() -> bool:
+    try:
+        _numpy()
+    except RuntimeError:
+        return False
+    return True
+
+
+class _Categorical:
+    def __init__(self) -> None:
+        self.codes = array("i")
+        self.labels: Dict[str, int] = {}
+
+    def append(self, label: str) -> None:
+        code = self.labels.get(label)
+        if code is None:
+            code = self.labels[label] = len(self.labels)
+        self.codes.append(code)
+
+
+class OutcomeColumns:
+    """Collects outcomes column by column, for ``save()`` and ``report_from_columns``.
+
+    Strings that repeat (source, statement type, error classes, flags) are stored as
+    integer codes into a label list in order of first appearance; identifiers and SQL
+    digests as one UTF-8 buffer plus offsets; the rest as flat numeric arrays. The
+    builder needs only the standard library; saving and reporting need NumPy.
+    """
+
+    def __init__(self) -> None:
+        self.count = 0
+        self._categories = {name: _Categorical() for name in _CATEGORIES}
+        self._booleans = {name: array("b") for name in _BOOLEANS}
+        self._timing_ms = array("d")
+        self._strings = {name: bytearray() for name in _STRINGS}
+        self._offsets = {name: array("q", [0]) for name in _STRINGS}
+
+    def add(self, outcome: "QueryOutcome", sql_digest: str) -> None:
+        parser_error = outcome.parser_error
+        self.count += 1
+        categories = self._categories
+        categories["source"].append(str(outcome.task.source_path))
+        categories["statement_type"].append(outcome.statement_type or "UNKNOWN")
+        categories["statement_type_source"].append(outcome.statement_type_source or "unknown")
+        categories["parser_statement_type"].append(
+            outcome.parser_statement_type or "UNAVAILABLE"
+        )
+        categories["error_label"].append(debug_error_label(outcome.raw_payload))
+        categories["parser_error"].append(parser_error or "<none>")
+        categories["flags"].append(",".join(outcome.flags))
+        booleans = self._booleans
+        booleans["succeeded"].append(bool(outcome.succeeded))
+        booleans["has_parser_error"].append(bool(parser_error))
+        booleans["rpc_error"].append(bool(outcome.rpc_error))
+        booleans["timed_out"].append(bool(outcome.timeout_error))
+        booleans["skipped"].append(bool(outcome.skipped))
+        booleans["duplicate"].append(bool(outcome.duplicate_of))
+        self._timing_ms.append(outcome.timing_ms)
+        for name, text in (("identifier", outcome.task.identifier), ("sql_digest", sql_digest)):
+            self._strings[name] += text.encode("utf-8")
+            self._offsets[name].append(len(self._strings[name]))
+
+    def arrays(self) -> Dict[str, Any]:
+        """The columns as NumPy arrays (copies), keyed as ``save()`` stores them."""
+        np = _numpy()
+        columns: Dict[str, Any] = {}
+        for name, categorical in self._categories.items():
+            columns[f"{name}_codes"] = np.array(categorical.codes, dtype=np.int32)
+            columns[f"{name}_labels"] = np.array(list(categorical.labels), dtype=str)
+        for name, values in self._booleans.items():
+            columns[name] = np.array(values, dtype=bool)
+        columns["timing_ms"] = np.array(self._timing_ms, dtype=np.float64)
+        for name in _STRINGS:
+            columns[f"{name}_data"] = np.frombuffer(bytes(self._strings[name]), dtype=np.uint8)
+            columns[f"{name}_offsets"] = np.array(self._offsets[name], dtype=np.int64)
+        return columns
+
+    def save(self, path: Path) -> Dict[str, Any]:
+        """Write the columns to an uncompressed ``.npz`` and return them."""
+        np = _numpy()
+        columns = self.arrays()
+        with path.open("wb") as handle:
+            np.savez(handle, **columns)
+        return columns
+
+
+def load_columns(path: Path) -> Dict[str, Any]:
+    """Read a file written by ``OutcomeColumns.save()`` back into arrays."""
+    np = _numpy()
+    with np.load(path, allow_pickle=False) as data:
+        return {name: data[name] for name in data.files}
+
+
+def column_strings(columns: Dict[str, Any], name: str) -> List[str]:
+    """Decode the ``identifier`` or ``sql_digest`` column into Python strings."""
+    data = columns[f"{name}_data"].tobytes()
+    offsets = columns[f"{name}_offsets"].tolist()
+    return [
+        data[start:end].decode("utf-8") for start, end in zip(offsets[:-1], offsets[1:])
+    ]
+
+
+class _TimingSummary:
+    """Stands in for a statement type's ``TimingDigest`` once its summary is computed."""
+
+    def __init__(self, summary: Dict[str, float]):
+        self._summary = summary
+
+    def summary(self) -> Dict[str, float]:
+        return dict(self._summary)
+
+
+def _groups(np: Any, codes: Any) -> Tuple[Any, Any]:
+    """The distinct ``codes`` in order of first appearance, and each row's group in it."""
+    unique, first_seen, inverse = np.unique(codes, return_index=True, return_inverse=True)
+    order = np.argsort(first_seen, kind="stable")
+    rank = np.empty_like(order)
+    rank[order] = np.arange(len(order))
+    return unique[order], rank[inverse.reshape(-1)]
+
+
+def _counts_by_group(
+    np: Any, groups: Any, group_count: int, codes: Any, labels: List[str]
+) -> List[Dict[str, int]]:
+    """Per group, the count of each label in ``codes``, keyed in first-seen order."""
+    pairs, pair_of_row = _groups(np, groups.astype(np.int64) * len(labels) + codes)
+    counts = np.bincount(pair_of_row, minlength=len(pairs)).tolist()
+    by_group: List[Dict[str, int]] = [{} for _ in range(group_count)]
+    for pair, count in zip(pairs.tolist(), counts):
+        group, code = divmod(pair, len(labels))
+        by_group[group][labels[code]] = count
+    return by_group
+
+
+def _timing_summaries(np: Any, groups: Any, timing: Any, totals: Any) -> List[Dict[str, float]]:
+    """Each group's timing summary, read off one sort by (group, timing).
+
+    The median and p95 follow ``statistics.median`` and ``report_utils._percentile``
+    operation for operation, and each group's sum is taken in row order, so the
+    summaries match what ``TimingDigest`` reports for the same timings.
+    """
+    ordered = timing[np.lexsort((timing, groups))]
+    sums = np.bincount(groups, weights=timing, minlength=len(totals))
+    starts = np.concatenate(([0], np.cumsum(totals)[:-1]))
+    middle = starts + totals // 2
+    medians = np.where(
+        totals % 2 == 1, ordered[middle], (ordered[middle - 1] + ordered[middle]) / 2
+    )
+    rank = (totals - 1) * 0.95
+    lower = np.floor(rank).astype(np.int64)
+    upper = np.ceil(rank).astype(np.int64)
+    low_values = ordered[starts + lower]
+    high_values = ordered[starts + upper]
+    p95s = np.where(
+        lower == upper, low_values, low_values * (upper - rank) + high_values * (rank - lower)
+    )
+    return [
+        {"avg": total / count, "median": median, "p95": p95, "min": low, "max": high}
+        for total, count, median, p95, low, high in zip(
+            sums.tolist(),
+            totals.tolist(),
+            medians.tolist(),
+            p95s.tolist(),
+            ordered[starts].tolist(),
+            ordered[starts + totals - 1].tolist(),
+        )
+    ]
+
+
+def report_from_columns(columns: Dict[str, Any]) -> ReportAccumulator:
+    """Build the report of columns from ``OutcomeColumns.arrays()`` or ``load_columns()``.
+
+    Every aggregate is a group-by over the columns: counts per statement type are
+    ``bincount``s over (statement type, value) pairs, and timings are sorted once by
+    (statement type, timing) for every type's percentiles, exact at any size. The
+    result is the ``ReportAccumulator`` that folding the outcomes one by one builds,
+    dict keys in first-seen order included, so every report renders it unchanged.
+    """
+    np = _numpy()
+    report = ReportAccumulator(timing_exact_limit=None)
+    timing = columns["timing_ms"]
+    if not len(timing):
+        return report
+
+    def _labels(name: str) -> List[str]:
+        return columns[f"{name}_labels"].tolist()
+
+    def _count(name: str) -> int:
+        return int(np.count_nonzero(columns[name]))
+
+    report.query_count = len(timing)
+    report.success_count = _count("succeeded")
+    report.parser_error_count = _count("has_parser_error")
+    report.rpc_error_count = _count("rpc_error")
+    report.timeout_count = _count("timed_out")
+    report.skipped_count = _count("skipped")
+    report.duplicate_count = _count("duplicate")
+    # A running sum, added in row order like ReportAccumulator's.
+    report.timing_ms_total = float(np.cumsum(timing)[-1])
+
+    flag_combinations = [label.split(",") if label else [] for label in _labels("flags")]
+    combination_counts = np.bincount(
+        columns["flags_codes"], minlength=len(flag_combinations)
+    ).tolist()
+    for flags, count in zip(flag_combinations, combination_counts):
+        if count:
+            for flag in set(flags):
+                report.flag_counts[flag] += count
+    error_labels = _labels("error_label")
+    error_counts = np.bincount(columns["error_label_codes"], minlength=len(error_labels))
+    for label, count in zip(error_labels, error_counts.tolist()):
+        if count:
+            report.debug_error_counts[label] = count
+            report.error_classes.add(label)
+
+    type_codes, groups = _groups(np, columns["statement_type_codes"])
+    type_labels = _labels("statement_type")
+    type_count = len(type_codes)
+    totals = np.bincount(groups, minlength=type_count)
+    successes = np.bincount(groups, weights=columns["succeeded"], minlength=type_count)
+    timings = _timing_summaries(np, groups, timing, totals)
+    by_column = {
+        name: _counts_by_group(np, groups, type_count, columns[f"{name}_codes"], _labels(name))
+        for name in (
+            "flags",
+            "error_label",
+            "parser_error",
+            "statement_type_source",
+            "parser_statement_type",
+        )
+    }
+    for index, type_code in enumerate(type_codes.tolist()):
+        total = int(totals[index])
+        success_count = int(successes[index])
+        flag_counts: Dict[str, int] = {}
+        for combination, count in by_column["flags"][index].items():
+            for flag in combination.split(",") if combination else []:
+                flag_counts[flag] = flag_counts.get(flag, 0) + count
+        report.statement_types[type_labels[type_code]] = {
+            "total_queries": total,
+            "success_count": success_count,
+            "error_count": total - success_count,
+            "timings": _TimingSummary(timings[index]),
+            "flag_counts": flag_counts,
+            "error_class_counts": by_column["error_label"][index],
+            "parser_error_counts": by_column["parser_error"][index],
+            "source_breakdown": by_column["statement_type_source"][index],
+            "parser_reported_types": by_column["parser_statement_type"][index],
+        }
+    return report
+
+
+__all__ = [
+    "COLUMNS_NAME",
+    "OutcomeColumns",
+    "column_strings",
+    "load_columns",
+    "numpy_available",
+    "report_from_columns",
+]
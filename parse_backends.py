@@ -0,0 +1,660 @@
+from __future__ import annotations
+
+import json
+import os
+import queue
+import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from types import SimpleNamespace
+from typing import (
+    Any,
+    Callable,
+    Deque,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Protocol,
+    Tuple,
+    TypeVar,
+)
+
+from datahub.ingestion.graph.client import DataHubGraph
+
+_T = TypeVar("_T")
+_R = TypeVar("_R")
+
+
+@dataclass(frozen=True)
+class ParseOptions:
+    platform: str
+    env: str
+    default_db: Optional[str] = None
+    default_schema: Optional[str] = None
+    override_dialect: Optional[str] = None
+
+
+@dataclass
+class ParseAttempt:
+    """Outcome of a single parser call, independent of how it was dispatched."""
+
+    result: Optional[Any]
+    payload: Dict[str, Any]
+    elapsed_ms: float
+    error: Optional[str] = None
+    cached: bool = False
+    # Parse time recorded with a cached payload; a cache hit's own elapsed_ms is the lookup.
+    cached_timing_ms: Optional[float] = None
+    # Statement type assigned by triage when the statement was never sent.
+    skipped_as: Optional[str] = None
+    timed_out: bool = False
+    # Failure worth retrying (HTTP 429/5xx, dropped connection, network timeout).
+    retryable: bool = False
+    retries: int = 0
+
+
+class ParseBackend(Protocol):
+    def parse_many(self, statements: Iterable[str]) -> Iterator[ParseAttempt]:
+        ...
+
+    def parse_one(self, sql: str) -> ParseAttempt:
+        ...
+
+
+class CallGuard(Protocol):
+    def acquire(self) -> Optional[str]:
+        """Block until a call may be sent; return a reason instead to fail it fast."""
+        ...
+
+    def release(self, attempt: ParseAttempt) -> None:
+        ...
+
+
+try:
+    from requests import ConnectionError as _RequestsConnectionError
+    from requests import Timeout as _RequestsTimeout
+
+    _TRANSIENT_EXCEPTIONS: Tuple[type, ...] = (
+        ConnectionError,
+        TimeoutError,
+        _RequestsConnectionError,
+        _RequestsTimeout,
+    )
+except ImportError:  # pragma: no cover - requests ships with acryl-datahub
+    _TRANSIENT_EXCEPTIONS = (ConnectionError, TimeoutError)
+
+_TRANSIENT_MESSAGE_PATTERN = re.compile(
+    r"\b(?:429 Client Error|5\d\d Server Error)\b|Connection (?:aborted|refused|reset)"
+    r"|Read timed out|Max retries exceeded|Service Unavailable",
+    re.I,
+)
+
+
+def is_transient_failure(exc: BaseException) -> bool:
+    """Whether a failed parse call is worth retrying against the same server."""
+    status = getattr(getattr(exc, "response", None), "status_code", None)
+    if isinstance(status, int):
+        return status == 429 or status >= 500
+    if isinstance(exc, _TRANSIENT_EXCEPTIONS):
+        return True
+    return bool(_TRANSIENT_MESSAGE_PATTERN.search(str(exc)))
+
+
+def payload_from_result(result: Any) -> Dict[str, Any]:
+    payload = json.loads(result.json())
+    debug_error = getattr(getattr(result, "debug_info", None), "error", None)
+    payload["debugInfoError"] = str(debug_error) if debug_error else None
+    return payload
+
+
+def _as_attributes(value: Any) -> Any:
+    if isinstance(value, dict):
+        return SimpleNamespace(**{key: _as_attributes(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return [_as_attributes(item) for item in value]
+    return value
+
+
+class LineagePayloadResult:
+    """Attribute view over a stored parser payload.
+
+    Exposes the ``in_tables``/``out_tables``/``column_lineage``/``debug_info`` shape of
+    ``SqlParsingResult`` so payloads that crossed a process boundary (or were loaded
+    from disk) can be consumed by ``main()`` and ``LineageEmitter.collect()`` unchanged.
+    """
+
+    def __init__(self, payload: Dict[str, Any]):
+        self._payload = payload
+        self.query_type = payload.get("query_type")
+        self.query_fingerprint = payload.get("query_fingerprint")
+        self.in_tables = list(payload.get("in_tables") or [])
+        self.out_tables = list(payload.get("out_tables") or [])
+        self.column_lineage = _as_attributes(payload.get("column_lineage") or [])
+        debug_info = dict(payload.get("debug_info") or {})
+        debug_info["error"] = payload.get("debugInfoError")
+        self.debug_info = _as_attributes(debug_info)
+
+    def json(self) -> str:
+        return json.dumps(
+            {key: value for key, value in self._payload.items() if key != "debugInfoError"}
+        )
+
+
+@dataclass(frozen=True)
+class BatchPolicy:
+    """How many statements (and bytes of SQL) travel together as one dispatch unit."""
+
+    max_statements: int = 1
+    max_bytes: int = 256 * 1024
+
+
+@dataclass
+class BatchStats:
+    batches: int = 0
+    statements: int = 0
+    largest_batch: int = 0
+
+    def as_dict(self, policy: BatchPolicy) -> Dict[str, Any]:
+        return {
+            "max_statements": policy.max_statements,
+            "max_bytes": policy.max_bytes,
+            "batches": self.batches,
+            "statements": self.statements,
+            "largest_batch": self.largest_batch,
+            "avg_batch_size": (self.statements / self.batches) if self.batches else 0.0,
+        }
+
+
+def _batched(
+    statements: Iterable[str], policy: BatchPolicy, stats: BatchStats
+) -> Iterator[List[str]]:
+    # A statement larger than max_bytes still travels, alone in its own batch.
+    batch: List[str] = []
+    batch_bytes = 0
+    for sql in statements:
+        size = len(sql.encode("utf-8"))
+        if batch and (
+            len(batch) >= policy.max_statements or batch_bytes + size > policy.max_bytes
+        ):
+            stats.batches += 1
+            stats.largest_batch = max(stats.largest_batch, len(batch))
+            yield batch
+            batch, batch_bytes = [], 0
+        batch.append(sql)
+        batch_bytes += size
+        stats.statements += 1
+    if batch:
+        stats.batches += 1
+        stats.largest_batch = max(stats.largest_batch, len(batch))
+        yield batch
+
+
+def _ordered_map(
+    submit: Callable[[_T], "Future[_R]"],
+    items: Iterable[_T],
+    window: int,
+) -> Iterator[_R]:
+    # Unlike Executor.map this keeps at most ``window`` calls in flight, so the
+    # input iterable is consumed lazily while results still come back in order.
+    pending: Deque[Future] = deque()
+    for item in items:
+        pending.append(submit(item))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def merge_in_order(
+    items: Iterable[_T],
+    short_circuit: Callable[[_T], Optional[Callable[[], _R]]],
+    dispatch: Callable[[Iterator[_T]], Iterator[_R]],
+    on_dispatched: Optional[Callable[[_T, _R], None]] = None,
+) -> Iterator[Tuple[_T, _R]]:
+    """Answer some items locally, send the rest through ``dispatch``, keep input order.
+
+    ``short_circuit`` returns ``None`` for items that must be dispatched, or a thunk
+    that produces the item's result; thunks are only called once every earlier item
+    has been yielded. ``dispatch`` must yield exactly one result per item it
+    receives, in order. Items are pulled from ``items`` lazily.
+    """
+    order: Deque[Tuple[_T, Optional[Callable[[], _R]]]] = deque()
+
+    def _to_dispatch() -> Iterator[_T]:
+        for item in items:
+            resolved = short_circuit(item)
+            order.append((item, resolved))
+            if resolved is None:
+                yield item
+
+    def _drain_resolved() -> Iterator[Tuple[_T, _R]]:
+        while order and order[0][1] is not None:
+            item, resolved = order.popleft()
+            assert resolved is not None
+            yield item, resolved()
+
+    for result in dispatch(_to_dispatch()):
+        yield from _drain_resolved()
+        item, _ = order.popleft()
+        if on_dispatched is not None:
+            on_dispatched(item, result)
+        yield item, result
+    yield from _drain_resolved()
+
+
+class GraphParseBackend:
+    """Sends parse requests through ``DataHubGraph.parse_sql_lineage``.
+
+    With ``workers > 1`` calls are issued from a bounded thread pool; results are
+    always yielded in the order the statements were supplied. GMS has no
+    multi-statement parse endpoint, so every statement is its own unit of dispatch:
+    grouping statements into one worker task would only serialize them.
+    """
+
+    def __init__(
+        self,
+        graph: DataHubGraph,
+        options: ParseOptions,
+        workers: int = 1,
+        guard: Optional[CallGuard] = None,
+    ):
+        self.graph = graph
+        self.options = options
+        self.workers = max(1, workers)
+        self.guard = guard
+
+    def parse_one(self, sql: str) -> ParseAttempt:
+        if self.guard is None:
+            return self._call(sql)
+        refusal = self.guard.acquire()
+        if refusal is not None:
+            # The guard has already waited out the breaker; retrying would only wait again.
+            return ParseAttempt(
+                result=None,
+                payload={"error": refusal, "query": sql},
+                elapsed_ms=0.0,
+                error=refusal,
+            )
+        attempt = self._call(sql)
+        self.guard.release(attempt)
+        return attempt
+
+    def _call(self, sql: str) -> ParseAttempt:
+        start_ns = time.perf_counter_ns()
+        try:
+            result = self.graph.parse_sql_lineage(
+                sql,
+                platform=self.options.platform,
+                env=self.options.env,
+                default_db=self.options.default_db,
+                default_schema=self.options.default_schema,
+                override_dialect=self.options.override_dialect,
+            )
+            elapsed_ms = (time.perf_counter_ns() - start_ns) / 1_000_000
+            payload = payload_from_result(result)
+        except Exception as exc:  # pragma: no cover - network failure
+            elapsed_ms = (time.perf_counter_ns() - start_ns) / 1_000_000
+            return ParseAttempt(
+                result=None,
+                payload={"error": str(exc), "query": sql},
+                elapsed_ms=elapsed_ms,
+                error=str(exc),
+                retryable=is_transient_failure(exc),
+            )
+        return ParseAttempt(result=result, payload=payload, elapsed_ms=elapsed_ms)
+
+    def parse_many(self, statements: Iterable[str]) -> Iterator[ParseAttempt]:
+        if self.workers == 1:
+            for sql in statements:
+                yield self.parse_one(sql)
+            return
+        with ThreadPoolExecutor(
+            max_workers=self.workers, thread_name_prefix="parse-worker"
+        ) as executor:
+            yield from _ordered_map(
+                lambda sql: executor.submit(self.parse_one, sql), statements, self.workers * 2
+            )
+
+
+_LOCAL_PARSER: Optional[Callable[[str], Any]] = None
+
+
+def _init_local_parser(options: ParseOptions) -> None:
+    global _LOCAL_PARSER
+    try:
+        from datahub.sql_parsing.schema_resolver import SchemaResolver
+        from datahub.sql_parsing.sqlglot_lineage import sqlglot_lineage
+    except ImportError:  # pragma: no cover - older acryl-datahub releases
+        from datahub.utilities.sqlglot_lineage import (  # type: ignore[no-redef]
+            SchemaResolver,
+            sqlglot_lineage,
+        )
+
+    # No graph: schemas are not fetched from GMS, so column lineage relies on what
+    # the SQL itself reveals.
+    schema_resolver = SchemaResolver(platform=options.platform, env=options.env)
+
+    def _parse(sql: str) -> Any:
+        return sqlglot_lineage(
+            sql,
+            schema_resolver=schema_resolver,
+            default_db=options.default_db,
+            default_schema=options.default_schema,
+            override_dialect=options.override_dialect,
+        )
+
+    _LOCAL_PARSER = _parse
+
+
+def _parse_locally(sql: str) -> ParseAttempt:
+    assert _LOCAL_PARSER is not None, "local parser not initialized"
+    start_ns = time.perf_counter_ns()
+    try:
+        result = _LOCAL_PARSER(sql)
+        elapsed_ms = (time.perf_counter_ns() - start_ns) / 1_000_000
+        payload = payload_from_result(result)
+    except Exception as exc:
+        elapsed_ms = (time.perf_counter_ns() - start_ns) / 1_000_000
+        return ParseAttempt(
+            result=None,
+            payload={"error": str(exc), "query": sql},
+            elapsed_ms=elapsed_ms,
+            error=str(exc),
+        )
+    # Parser results do not pickle reliably; only the payload is sent back.
+    return ParseAttempt(result=None, payload=payload, elapsed_ms=elapsed_ms)
+
+
+def _parse_batch_locally(batch: List[str]) -> List[ParseAttempt]:
+    return [_parse_locally(sql) for sql in batch]
+
+
+class LocalParseBackend:
+    """Runs the acryl-datahub sqlglot lineage parser in a local process pool.
+
+    No GMS round trip is made. Each batch is a single round trip to a worker
+    process. Payloads returned by the workers are wrapped in
+    ``LineagePayloadResult`` so callers see the same shape as the graph backends.
+    """
+
+    def __init__(
+        self,
+        options: ParseOptions,
+        processes: Optional[int] = None,
+        batching: Optional[BatchPolicy] = None,
+    ):
+        self.options = options
+        self.processes = max(1, processes or os.cpu_count() or 1)
+        self.batching = batching or BatchPolicy()
+        self.batch_stats = BatchStats()
+        self._in_process_lock = threading.Lock()
+
+    def parse_one(self, sql: str) -> ParseAttempt:
+        # Parses in the calling process, e.g. for statements routed to a deadline lane.
+        with self._in_process_lock:
+            if _LOCAL_PARSER is None:
+                _init_local_parser(self.options)
+        attempt = _parse_locally(sql)
+        if attempt.error is None:
+            attempt.result = LineagePayloadResult(attempt.payload)
+        return attempt
+
+    def parse_many(self, statements: Iterable[str]) -> Iterator[ParseAttempt]:
+        with ProcessPoolExecutor(
+            max_workers=self.processes,
+            initializer=_init_local_parser,
+            initargs=(self.options,),
+        ) as executor:
+            batches = _ordered_map(
+                lambda batch: executor.submit(_parse_batch_locally, batch),
+                _batched(statements, self.batching, self.batch_stats),
+                self.processes * 4,
+            )
+            for attempts in batches:
+                for attempt in attempts:
+                    if attempt.error is None:
+                        attempt.result = LineagePayloadResult(attempt.payload)
+                    yield attempt
+
+
+class DeadlineLane:
+    """Separate dispatch lane with its own concurrency and a client-side deadline.
+
+    A statement's deadline starts when it is submitted, so time spent waiting for a
+    slot counts against it. Each call runs on its own daemon thread. When a
+    statement is still unanswered after ``deadline_s``, queued or running, its
+    future is resolved with a timed-out attempt, so the caller moves on, and a
+    call's eventual result is discarded. A blocking parser call cannot be
+    interrupted, so the call keeps its slot until it actually returns. At most
+    ``concurrency`` calls are ever running, including abandoned ones, whether they
+    wait on a stalled server or burn CPU in a local parser. ``submit`` never blocks:
+    when ``concurrency + backlog`` statements are already unresolved, the new one is
+    timed out at once. Callers that would rather wait call ``wait_for_room`` first;
+    since every statement is resolved by its deadline, that wait is bounded by
+    ``deadline_s``.
+    """
+
+    def __init__(
+        self,
+        parse_one: Callable[[str], ParseAttempt],
+        concurrency: int,
+        deadline_s: float,
+        backlog: Optional[int] = None,
+    ):
+        self.parse_one = parse_one
+        self.concurrency = max(1, concurrency)
+        self.deadline_s = deadline_s
+        self.backlog = backlog or self.concurrency * 4
+        # Unresolved statements the lane holds: one running per slot, then the backlog.
+        self._capacity = self.concurrency + self.backlog
+        self.timeouts = 0
+        self.rejected = 0
+        self._slots = threading.Semaphore(self.concurrency)
+        self._settle_lock = threading.Lock()
+        self._room = threading.Condition()
+        self._unresolved = 0
+        self._queue: "queue.Queue[Optional[Tuple[str, Future, int]]]" = queue.Queue()
+        self._dispatcher = threading.Thread(
+            target=self._dispatch, name="deadline-lane", daemon=True
+        )
+        self._dispatcher.start()
+
+    def submit(self, sql: str) -> "Future[ParseAttempt]":
+        future: "Future[ParseAttempt]" = Future()
+        start_ns = time.perf_counter_ns()
+        with self._room:
+            full = self._unresolved >= self._capacity
+            if not full:
+                self._unresolved += 1
+        if full:
+            message = f"Heavy lane backlog full ({self.backlog} statements waiting)"
+            if self._settle(future, _timed_out_attempt(sql, start_ns, message)):
+                self.rejected += 1
+                self.timeouts += 1
+            return future
+        self._queue.put((sql, future, start_ns))
+        timer = threading.Timer(self.deadline_s, self._expire, (sql, future, start_ns))
+        timer.daemon = True
+        future.add_done_callback(lambda _: self._resolved(timer))
+        timer.start()
+        return future
+
+    def wait_for_room(self) -> None:
+        """Wait until a statement submitted now would not find the backlog full."""
+        with self._room:
+            self._room.wait_for(lambda: self._unresolved < self._capacity)
+
+    def _resolved(self, timer: threading.Timer) -> None:
+        timer.cancel()
+        with self._room:
+            self._unresolved -= 1
+            self._room.notify_all()
+
+    def close(self) -> None:
+        self._queue.put(None)
+        self._dispatcher.join()
+
+    def _settle(self, future: "Future[ParseAttempt]", attempt: ParseAttempt) -> bool:
+        with self._settle_lock:
+            if future.done():
+                return False
+            future.set_result(attempt)
+            return True
+
+    def _expire(self, sql: str, future: "Future[ParseAttempt]", start_ns: int) -> None:
+        message = f"Client-side deadline of {self.deadline_s:g}s exceeded"
+        if self._settle(future, _timed_out_attempt(sql, start_ns, message)):
+            self.timeouts += 1
+
+    def _dispatch(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            sql, future, start_ns = item
+            # Wait for a slot no longer than the statement's deadline; by then its
+            # timer has resolved it and it is dropped without being parsed.
+            remaining_s = self.deadline_s - (time.perf_counter_ns() - start_ns) / 1e9
+            if not self._slots.acquire(timeout=max(0.0, remaining_s)):
+                continue
+            if future.done():
+                self._slots.release()
+                continue
+            threading.Thread(
+                target=self._run, args=item, name="deadline-call", daemon=True
+            ).start()
+
+    def _run(self, sql: str, future: "Future[ParseAttempt]", start_ns: int) -> None:
+        try:
+            attempt = self.parse_one(sql)
+        except Exception as exc:  # pragma: no cover - parse_one reports its own errors
+            attempt = ParseAttempt(
+                result=None,
+                payload={"error": str(exc), "query": sql},
+                elapsed_ms=(time.perf_counter_ns() - start_ns) / 1_000_000,
+                error=str(exc),
+            )
+        finally:
+            self._slots.release()
+        self._settle(future, attempt)
+
+
+def _timed_out_attempt(sql: str, start_ns: int, message: str) -> ParseAttempt:
+    return ParseAttempt(
+        result=None,
+        payload={"error": message, "query": sql, "timeout": True},
+        elapsed_ms=(time.perf_counter_ns() - start_ns) / 1_000_000,
+        error=message,
+        timed_out=True,
+    )
+
+
+class RoutedParseBackend:
+    """Routes heavy statements to a ``DeadlineLane`` and the rest to ``light``.
+
+    Both lanes make progress at the same time: while the oldest pending statement
+    is waiting in the heavy lane, up to ``reorder_window`` light results are
+    buffered. Results are yielded in input order. Before a heavy statement is
+    submitted, the router waits for room in the heavy lane; the wait ends within one
+    deadline even if every heavy call hangs.
+    """
+
+    def __init__(
+        self,
+        light: ParseBackend,
+        heavy: DeadlineLane,
+        is_heavy: Callable[[str], bool],
+        reorder_window: int = 1024,
+    ):
+        self.light = light
+        self.heavy = heavy
+        self.is_heavy = is_heavy
+        self.reorder_window = max(1, reorder_window)
+        self.heavy_count = 0
+
+    def parse_one(self, sql: str) -> ParseAttempt:
+        if self.is_heavy(sql):
+            self.heavy_count += 1
+            self.heavy.wait_for_room()
+            return self.heavy.submit(sql).result()
+        return self.light.parse_one(sql)
+
+    def parse_many(self, statements: Iterable[str]) -> Iterator[ParseAttempt]:
+        # Each slot is [future_or_None, attempt_or_None]; light slots are filled in
+        # order as the light lane yields.
+        order: Deque[List[Any]] = deque()
+        light_slots: Deque[List[Any]] = deque()
+
+        def _light_feed() -> Iterator[str]:
+            for sql in statements:
+                if self.is_heavy(sql):
+                    self.heavy_count += 1
+                    self.heavy.wait_for_room()
+                    order.append([self.heavy.submit(sql), None])
+                    continue
+                slot: List[Any] = [None, None]
+                order.append(slot)
+                light_slots.append(slot)
+                yield sql
+
+        light_results = self.light.parse_many(_light_feed())
+        light_done = False
+        buffered = 0
+
+        def _pull_light() -> None:
+            nonlocal light_done, buffered
+            try:
+                attempt = next(light_results)
+            except StopIteration:
+                light_done = True
+                return
+            light_slots.popleft()[1] = attempt
+            buffered += 1
+
+        while True:
+            while order:
+                future, attempt = order[0]
+                if future is not None and future.done():
+                    order.popleft()
+                    yield future.result()
+                elif future is None and attempt is not None:
+                    order.popleft()
+                    buffered -= 1
+                    yield attempt
+                else:
+                    break
+            if not order:
+                if light_done:
+                    return
+                _pull_light()
+                continue
+            head_future = order[0][0]
+            if head_future is None or (not light_done and buffered < self.reorder_window):
+                _pull_light()
+                if light_done and head_future is None and order[0][1] is None:
+                    raise RuntimeError("light lane ended before answering every statement")
+            else:
+                head_future.result()
+
+
+__all__ = [
+    "BatchPolicy",
+    "BatchStats",
+    "CallGuard",
+    "DeadlineLane",
+    "GraphParseBackend",
+    "LineagePayloadResult",
+    "LocalParseBackend",
+    "ParseAttempt",
+    "ParseBackend",
+    "ParseOptions",
+    "RoutedParseBackend",
+    "is_transient_failure",
+    "merge_in_order",
+    "payload_from_result",
+]
@@ -0,0 +1,237 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import re
+import sqlite3
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from parse_backends import (
+    LineagePayloadResult,
+    ParseAttempt,
+    ParseBackend,
+    ParseOptions,
+    merge_in_order,
+)
+
+# Bump when the key or the stored payload shape changes so stale entries stop matching.
+CACHE_FORMAT_VERSION = "4"
+
+# Comments (a line comment with its newline), string literals and quoted identifiers
+# are kept verbatim; only the whitespace between them is collapsed.
+_VERBATIM_PATTERN = re.compile(
+    r"""--[^\n]*\n?|/\*.*?(?:\*/|\Z)|'(?:[^']|'')*'?|"(?:[^"]|"")*"?""", re.S
+)
+_WHITESPACE_PATTERN = re.compile(r"\s+")
+
+
+def normalize_sql_for_cache(sql: str) -> str:
+    """Collapse runs of whitespace to one space, except inside quotes and comments."""
+    if "'" not in sql and '"' not in sql and "--" not in sql:
+        return " ".join(sql.split())
+    parts: List[str] = []
+    pos = 0
+    for match in _VERBATIM_PATTERN.finditer(sql):
+        parts.append(_WHITESPACE_PATTERN.sub(" ", sql[pos : match.start()]))
+        parts.append(match.group(0))
+        pos = match.end()
+    parts.append(_WHITESPACE_PATTERN.sub(" ", sql[pos:]))
+    return "".join(parts).strip()
+
+
+def content_digest(text: str) -> str:
+    """The one hash used for SQL content (SHA-256): the SQL digest, cache keys, dedupe
+    fingerprints and the keys of the SQL store."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def statement_digest(sql: str) -> str:
+    """A statement's SQL digest: the content digest of its normalized text.
+
+    Manifests, reports, the run index and the SQL store all identify a statement's
+    text by it.
+    """
+    return content_digest(normalize_sql_for_cache(sql))
+
+
+def cache_key(sql: str, options: ParseOptions, namespace: str = "") -> str:
+    parts = [
+        CACHE_FORMAT_VERSION,
+        namespace,
+        options.platform,
+        options.env,
+        options.default_db or "",
+        options.default_schema or "",
+        options.override_dialect or "",
+        statement_digest(sql),
+    ]
+    return content_digest("\x1f".join(parts))
+
+
+class ParseResultCache:
+    """On-disk, content-addressed store of parser payloads with LRU eviction.
+
+    Entries live in a single SQLite file; once the stored payloads exceed
+    ``max_bytes`` the least recently used entries are dropped.
+    """
+
+    def __init__(self, path: Path, max_bytes: int, *, commit_every: int = 500):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self.max_bytes = max_bytes
+        self.commit_every = max(1, commit_every)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._pending_writes = 0
+        self._conn = sqlite3.connect(str(path))
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS parse_cache (
+                key TEXT PRIMARY KEY,
+                payload TEXT NOT NULL,
+                timing_ms REAL NOT NULL,
+                size INTEGER NOT NULL,
+                last_used REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS parse_cache_last_used ON parse_cache(last_used)"
+        )
+        row = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM parse_cache").fetchone()
+        self._total_bytes = int(row[0])
+
+    def get(self, key: str) -> Optional[Tuple[Dict[str, Any], float]]:
+        row = self._conn.execute(
+            "SELECT payload, timing_ms FROM parse_cache WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._conn.execute(
+            "UPDATE parse_cache SET last_used = ? WHERE key = ?", (time.time(), key)
+        )
+        self._note_write()
+        return json.loads(row[0]), float(row[1])
+
+    def put(self, key: str, payload: Dict[str, Any], timing_ms: float) -> None:
+        encoded = json.dumps(payload, separators=(",", ":"))
+        size = len(encoded.encode("utf-8"))
+        previous = self._conn.execute(
+            "SELECT size FROM parse_cache WHERE key = ?", (key,)
+        ).fetchone()
+        self._conn.execute(
+            "INSERT OR REPLACE INTO parse_cache (key, payload, timing_ms, size, last_used) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (key, encoded, timing_ms, size, time.time()),
+        )
+        self._total_bytes += size - (int(previous[0]) if previous else 0)
+        if self._total_bytes > self.max_bytes:
+            self._evict()
+        self._note_write()
+
+    def _evict(self) -> None:
+        # Trim to 90% of the budget so a full cache does not evict on every insert.
+        target = int(self.max_bytes * 0.9)
+        rows = self._conn.execute(
+            "SELECT key, size FROM parse_cache ORDER BY last_used ASC"
+        )
+        doomed = []
+        for key, size in rows:
+            if self._total_bytes <= target:
+                break
+            doomed.append((key,))
+            self._total_bytes -= int(size)
+        self._conn.executemany("DELETE FROM parse_cache WHERE key = ?", doomed)
+        self.evictions += len(doomed)
+
+    def _note_write(self) -> None:
+        self._pending_writes += 1
+        if self._pending_writes >= self.commit_every:
+            self._conn.commit()
+            self._pending_writes = 0
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions}
+
+    def close(self) -> None:
+        self._conn.commit()
+        self._conn.close()
+
+
+class CachingParseBackend:
+    """Serves statements from a ``ParseResultCache`` and forwards misses to ``inner``.
+
+    Cache hits never reach the parser. A hit reports the time the lookup took as
+    its ``elapsed_ms``; the parse time recorded with the payload is kept as
+    ``cached_timing_ms``. Results are yielded in input order; only successful parser
+    calls are stored, so transient RPC failures are retried on the next run. With
+    ``refresh`` every statement is re-parsed and overwritten.
+    """
+
+    def __init__(
+        self,
+        inner: ParseBackend,
+        cache: ParseResultCache,
+        options: ParseOptions,
+        *,
+        namespace: str = "",
+        refresh: bool = False,
+    ):
+        self.inner = inner
+        self.cache = cache
+        self.options = options
+        self.namespace = namespace
+        self.refresh = refresh
+
+    def _lookup(self, item: Tuple[str, str]) -> Optional[Callable[[], ParseAttempt]]:
+        if self.refresh:
+            self.cache.misses += 1
+            return None
+        start_ns = time.perf_counter_ns()
+        cached = self.cache.get(item[0])
+        if cached is None:
+            return None
+        payload, timing_ms = cached
+        hit = ParseAttempt(
+            result=LineagePayloadResult(payload),
+            payload=payload,
+            elapsed_ms=(time.perf_counter_ns() - start_ns) / 1_000_000,
+            cached=True,
+            cached_timing_ms=timing_ms,
+        )
+        return lambda: hit
+
+    def _store(self, item: Tuple[str, str], attempt: ParseAttempt) -> None:
+        if attempt.error is None:
+            self.cache.put(item[0], attempt.payload, attempt.elapsed_ms)
+
+    def parse_one(self, sql: str) -> ParseAttempt:
+        return next(iter(self.parse_many([sql])))
+
+    def parse_many(self, statements: Iterable[str]) -> Iterator[ParseAttempt]:
+        keyed = ((cache_key(sql, self.options, self.namespace), sql) for sql in statements)
+        merged = merge_in_order(
+            keyed,
+            self._lookup,
+            lambda misses: self.inner.parse_many(sql for _, sql in misses),
+            on_dispatched=self._store,
+        )
+        for _, attempt in merged:
+            yield attempt
+
+
+__all__ = [
+    "CachingParseBackend",
+    "ParseResultCache",
+    "cache_key",
+    "content_digest",
+    "normalize_sql_for_cache",
+    "statement_digest",
+]
@@ -0,0 +1,303 @@
+from __future__ import annotations
+
+import heapq
+import random
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from parse_backends import ParseAttempt, ParseBackend
+
+
+class AimdRateLimiter:
+    """Token bucket whose refill rate adapts additive-increase/multiplicative-decrease.
+
+    Every healthy, fast response raises the rate by roughly ``increase`` calls per
+    second per second; a throttled or failed response, or one slower than
+    ``latency_target_ms``, multiplies it by ``decrease`` (at most once per
+    ``cooldown_s`` so one burst of failures does not collapse the rate).
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        *,
+        min_rate: float = 0.5,
+        max_rate: Optional[float] = None,
+        latency_target_ms: float = 2000.0,
+        increase: float = 1.0,
+        decrease: float = 0.5,
+        cooldown_s: float = 1.0,
+    ):
+        self.rate = rate
+        self.min_rate = min(min_rate, rate)
+        self.max_rate = max_rate if max_rate is not None else rate * 4
+        self.latency_target_ms = latency_target_ms
+        self.increase = increase
+        self.decrease = decrease
+        self.cooldown_s = cooldown_s
+        self.decreases = 0
+        self._burst = max(1.0, rate)
+        self._tokens = self._burst
+        self._refilled_at = time.monotonic()
+        self._decreased_at = float("-inf")
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(
+                    self._burst, self._tokens + (now - self._refilled_at) * self.rate
+                )
+                self._refilled_at = now
+                if self._tokens >= 1.0:
+                    self._tokens -= 1.0
+                    return
+                wait_s = (1.0 - self._tokens) / self.rate
+            time.sleep(wait_s)
+
+    def on_response(self, latency_ms: float, congested: bool) -> None:
+        with self._lock:
+            if congested or latency_ms > self.latency_target_ms:
+                now = time.monotonic()
+                if now - self._decreased_at >= self.cooldown_s:
+                    self.rate = max(self.min_rate, self.rate * self.decrease)
+                    self._decreased_at = now
+                    self.decreases += 1
+            else:
+                self.rate = min(self.max_rate, self.rate + self.increase / self.rate)
+            self._burst = max(1.0, self.rate)
+
+
+class CircuitBreaker:
+    """Pauses dispatch while the server keeps failing.
+
+    After ``failure_threshold`` consecutive transient failures the breaker opens and
+    callers wait out ``cooldown_s``; then a single probe call is let through. A
+    healthy probe closes the breaker, a failed one reopens it with the cooldown
+    doubled (up to ``max_cooldown_s``). Callers that have waited ``max_wait_s`` are
+    refused instead, so a server that never comes back cannot stall the run forever.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        cooldown_s: float = 10.0,
+        *,
+        max_cooldown_s: float = 120.0,
+        max_wait_s: float = 600.0,
+    ):
+        self.failure_threshold = max(1, failure_threshold)
+        self.base_cooldown_s = cooldown_s
+        self.max_cooldown_s = max(cooldown_s, max_cooldown_s)
+        self.max_wait_s = max_wait_s
+        self.trips = 0
+        self._state = "closed"
+        self._cooldown_s = cooldown_s
+        self._opened_at = 0.0
+        self._consecutive_failures = 0
+        self._condition = threading.Condition()
+
+    def wait_until_allowed(self) -> Optional[str]:
+        with self._condition:
+            waiting_since = time.monotonic()
+            while True:
+                now = time.monotonic()
+                if self._state == "closed":
+                    return None
+                if self._state == "open" and now >= self._opened_at + self._cooldown_s:
+                    self._state = "half-open"
+                    return None
+                if now - waiting_since >= self.max_wait_s:
+                    return (
+                        f"Circuit breaker open: no healthy response after waiting "
+                        f"{now - waiting_since:.0f}s"
+                    )
+                if self._state == "open":
+                    timeout = self._opened_at + self._cooldown_s - now
+                else:
+                    # Half-open: the probe in flight settles the state.
+                    timeout = self.max_wait_s - (now - waiting_since)
+                self._condition.wait(timeout=max(0.01, timeout))
+
+    def record(self, healthy: bool) -> None:
+        with self._condition:
+            if healthy:
+                self._consecutive_failures = 0
+                if self._state != "closed":
+                    self._state = "closed"
+                    self._cooldown_s = self.base_cooldown_s
+                    self._condition.notify_all()
+                return
+            self._consecutive_failures += 1
+            if self._state == "half-open":
+                self._open(min(self.max_cooldown_s, self._cooldown_s * 2))
+            elif (
+                self._state == "closed"
+                and self._consecutive_failures >= self.failure_threshold
+            ):
+                self.trips += 1
+                self._open(self.base_cooldown_s)
+
+    def _open(self, cooldown_s: float) -> None:
+        self._state = "open"
+        self._cooldown_s = cooldown_s
+        self._opened_at = time.monotonic()
+        self._condition.notify_all()
+
+
+class DispatchGuard:
+    """``CallGuard`` combining an optional rate limiter and circuit breaker."""
+
+    def __init__(
+        self,
+        limiter: Optional[AimdRateLimiter] = None,
+        breaker: Optional[CircuitBreaker] = None,
+    ):
+        self.limiter = limiter
+        self.breaker = breaker
+
+    def acquire(self) -> Optional[str]:
+        if self.breaker is not None:
+            refusal = self.breaker.wait_until_allowed()
+            if refusal is not None:
+                return refusal
+        if self.limiter is not None:
+            self.limiter.acquire()
+        return None
+
+    def release(self, attempt: ParseAttempt) -> None:
+        if self.limiter is not None:
+            self.limiter.on_response(attempt.elapsed_ms, attempt.retryable)
+        if self.breaker is not None:
+            self.breaker.record(not attempt.retryable)
+
+
+class RetryingParseBackend:
+    """Re-runs transient failures of ``inner`` with exponential backoff.
+
+    Statements go through one long-lived ``inner.parse_many`` call. A retryable
+    failure is queued again once its jittered backoff (``backoff_s`` doubling per
+    retry, capped at ``max_backoff_s``) has passed, for up to ``max_retries``
+    retries, and goes out between new statements: nothing waits for a batch to be
+    answered. At most ``max_pending`` statements are between input and output at a
+    time. Each attempt records how many retries it took, and results are yielded
+    in input order.
+    """
+
+    def __init__(
+        self,
+        inner: ParseBackend,
+        *,
+        max_retries: int = 3,
+        backoff_s: float = 1.0,
+        max_backoff_s: float = 60.0,
+        max_pending: int = 500,
+    ):
+        self.inner = inner
+        self.max_retries = max(0, max_retries)
+        self.backoff_s = backoff_s
+        self.max_backoff_s = max_backoff_s
+        self.max_pending = max(1, max_pending)
+        self.retries = 0
+        self.recovered = 0
+        self.exhausted = 0
+
+    def _delay(self, retry_number: int) -> float:
+        delay = min(self.max_backoff_s, self.backoff_s * 2 ** (retry_number - 1))
+        return delay * random.uniform(0.5, 1.0)
+
+    def parse_one(self, sql: str) -> ParseAttempt:
+        attempt = self.inner.parse_one(sql)
+        for retry_number in range(1, self.max_retries + 1):
+            if not attempt.retryable:
+                break
+            time.sleep(self._delay(retry_number))
+            self.retries += 1
+            attempt = self.inner.parse_one(sql)
+            attempt.retries = retry_number
+        self._settle([attempt])
+        return attempt
+
+    def parse_many(self, statements: Iterable[str]) -> Iterator[ParseAttempt]:
+        iterator = iter(statements)
+        # Statements between input and output, keyed by input position.
+        texts: Dict[int, str] = {}
+        retries: Dict[int, int] = {}
+        finished: Dict[int, ParseAttempt] = {}
+        backing_off: List[Tuple[float, int]] = []
+        sent: Deque[int] = deque()
+        next_index = 0
+        next_output = 0
+        input_done = False
+
+        def _feed() -> Iterator[str]:
+            nonlocal next_index, input_done
+            while True:
+                now = time.monotonic()
+                if backing_off and backing_off[0][0] <= now:
+                    _, index = heapq.heappop(backing_off)
+                elif not input_done and next_index - next_output < self.max_pending:
+                    sql = next(iterator, None)
+                    if sql is None:
+                        input_done = True
+                        continue
+                    index = next_index
+                    next_index += 1
+                    texts[index] = sql
+                    retries[index] = 0
+                elif backing_off:
+                    # Only retries are left to send; the calls in flight are answered
+                    # once the next one has gone out.
+                    time.sleep(backing_off[0][0] - now)
+                    continue
+                else:
+                    # Nothing more can be sent until the calls in flight are answered;
+                    # a failure among them starts a new dispatch.
+                    return
+                sent.append(index)
+                yield texts[index]
+
+        while True:
+            for attempt in self.inner.parse_many(_feed()):
+                index = sent.popleft()
+                attempt.retries = retries[index]
+                if attempt.retryable and retries[index] < self.max_retries:
+                    retries[index] += 1
+                    self.retries += 1
+                    due = time.monotonic() + self._delay(retries[index])
+                    heapq.heappush(backing_off, (due, index))
+                else:
+                    finished[index] = attempt
+                while next_output in finished:
+                    ready = finished.pop(next_output)
+                    del texts[next_output], retries[next_output]
+                    next_output += 1
+                    self._settle([ready])
+                    yield ready
+            if input_done and next_output == next_index:
+                return
+
+    def _settle(self, attempts: List[ParseAttempt]) -> None:
+        for attempt in attempts:
+            if attempt.retryable:
+                self.exhausted += 1
+            elif attempt.retries:
+                self.recovered += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "retries": self.retries,
+            "recovered": self.recovered,
+            "exhausted": self.exhausted,
+        }
+
+
+__all__ = [
+    "AimdRateLimiter",
+    "CircuitBreaker",
+    "DispatchGuard",
+    "RetryingParseBackend",
+]
@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+import statistics
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from parse_cache import statement_digest
+from report_utils import iter_report_queries
+
+RUN_REPORT_NAME = "[[]]report.json"
+
+
+class CostModel:
+    """Predicts the parse cost of a statement in milliseconds.
+
+    Statements seen by earlier runs are predicted from their recorded ``timing_ms``,
+    matched by SQL digest (or by identifier for reports written before digests were
+    recorded). Everything else falls back to its complexity score, scaled by the
+    median milliseconds-per-point observed for the statements that do have history.
+    """
+
+    def __init__(
+        self,
+        by_digest: Optional[Dict[str, float]] = None,
+        by_identifier: Optional[Dict[str, float]] = None,
+        runs_loaded: int = 0,
+    ):
+        self.by_digest = by_digest or {}
+        self.by_identifier = by_identifier or {}
+        self.runs_loaded = runs_loaded
+        self.from_history = 0
+        self.from_shape = 0
+
+    @classmethod
+    def from_reports(
+        cls, root: Path, *, max_runs: int = 20, exclude: Optional[Path] = None
+    ) -> "CostModel":
+        reports = [
+            candidate / RUN_REPORT_NAME
+            for candidate in (root.iterdir() if root.is_dir() else [])
+            if candidate.is_dir()
+            and (candidate / RUN_REPORT_NAME).is_file()
+            and (exclude is None or candidate.resolve() != exclude.resolve())
+        ]
+        reports.sort(key=lambda path: path.stat().st_mtime)
+        reports = reports[-max_runs:] if max_runs > 0 else []
+
+        by_digest: Dict[str, float] = {}
+        by_identifier: Dict[str, float] = {}
+        runs_loaded = 0
+        # Oldest first, so the most recent measurement of a statement wins.
+        for report_path in reports:
+            try:
+                for entry in iter_report_queries(report_path):
+                    # A cache hit's own timing is the lookup; its parse time was recorded earlier.
+                    timing_ms = entry.get("cached_timing_ms")
+                    if timing_ms is None:
+                        timing_ms = entry.get("timing_ms")
+                    if not isinstance(timing_ms, (int, float)) or "SKIP" in entry.get("flags", []):
+                        continue
+                    if entry.get("sql_digest"):
+                        by_digest[entry["sql_digest"]] = float(timing_ms)
+                    if entry.get("identifier"):
+                        by_identifier[entry["identifier"]] = float(timing_ms)
+            except (OSError, ValueError):  # pragma: no cover - unreadable report
+                continue
+            runs_loaded += 1
+        return cls(by_digest, by_identifier, runs_loaded)
+
+    def observed(self, identifier: str, sql: str) -> Optional[float]:
+        timing_ms = self.by_digest.get(statement_digest(sql))
+        if timing_ms is None:
+            timing_ms = self.by_identifier.get(identifier)
+        return timing_ms
+
+    def predict_many(self, statements: Sequence[Tuple[str, str, float]]) -> List[float]:
+        """Predict costs for ``(identifier, sql, complexity_score)`` triples."""
+        observed = [self.observed(identifier, sql) for identifier, sql, _ in statements]
+        ratios = [
+            timing_ms / score
+            for timing_ms, (_, _, score) in zip(observed, statements)
+            if timing_ms is not None and score > 0
+        ]
+        ms_per_point = statistics.median(ratios) if ratios else 1.0
+        predictions: List[float] = []
+        for timing_ms, (_, _, score) in zip(observed, statements):
+            if timing_ms is None:
+                self.from_shape += 1
+                predictions.append(score * ms_per_point)
+            else:
+                self.from_history += 1
+                predictions.append(timing_ms)
+        return predictions
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "history_runs": self.runs_loaded,
+            "predicted_from_history": self.from_history,
+            "predicted_from_shape": self.from_shape,
+        }
+
+
+def longest_first(items: Sequence[Any], costs: Sequence[float]) -> List[Any]:
+    # sorted() is stable, so statements with equal predicted cost keep input order.
+    order = sorted(range(len(items)), key=lambda index: -costs[index])
+    return [items[index] for index in order]
+
+
+__all__ = [
+    "CostModel",
+    "RUN_REPORT_NAME",
+    "longest_first",
+]
@@ -1,37 +1,230 @@
 from __future__ import annotations
 
 import argparse
-import csv
+import copy
 import hashlib
 import json
 import os
 import re
+import shutil
+import sqlite3
 import sys
 import time
-from collections import defaultdict
-from dataclasses import dataclass, field
+from collections import OrderedDict, defaultdict, deque
+from contextlib import nullcontext
+from dataclasses import astuple, dataclass, field, replace
+from functools import partial
+from itertools import chain
 from pathlib import Path
-from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+from typing import (
+    Any,
+    Callable,
+    Deque,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+)
 
 from datahub.ingestion.graph.client import DataHubGraph, DatahubClientConfig
 
+from dbql import iter_dbql_queries
 from emit_lineage import LineageEmitter, LineageTaskContext
+from input_files import (
+    LoadStats,
+    compression_of,
+    find_inputs,
+    iter_loaded_in_order,
+    open_binary,
+)
+from jsonl_output import OUTPUT_DIR_NAME, JsonlShardWriter
+from outcome_columns import (
+    COLUMNS_NAME,
+    OutcomeColumns,
+    numpy_available,
+    report_from_columns,
+)
+from parse_backends import (
+    BatchPolicy,
+    DeadlineLane,
+    GraphParseBackend,
+    LocalParseBackend,
+    ParseAttempt,
+    ParseBackend,
+    ParseOptions,
+    RoutedParseBackend,
+    merge_in_order,
+)
+from parse_cache import (
+    CachingParseBackend,
+    ParseResultCache,
+    content_digest,
+    statement_digest,
+)
+from parse_resilience import (
+    AimdRateLimiter,
+    CircuitBreaker,
+    DispatchGuard,
+    RetryingParseBackend,
+)
+from parse_scheduler import RUN_REPORT_NAME, CostModel, longest_first
 from report_utils import (
-    build_debug_error_summary,
-    compute_overview,
-    compute_statement_type_metrics,
+    TIMING_EXACT_LIMIT,
+    ReportAccumulator,
+    debug_error_label,
+    iter_report_queries,
     print_overview,
-    render_report_markdown,
+    render_summary_markdown,
+)
+from results_store import ResultsStore
+from run_index import RUN_INDEX_NAME, RunIndex, lookup_queries, read_query_output
+from run_manifest import MANIFEST_NAME, ManifestReplay, RunManifest
+from sampling import SampleReport, StratifiedSampler
+from sharding import ShardSpec, check_shard_runs
+from sql_blobs import BLOB_STORE_NAME, SqlBlobStore, preview_lines
+from sql_splitter import (
+    StatementSpan,
+    skip_trivia,
+    split_sql_file,
+    split_sql_stream,
+    split_sql_text,
+    split_sql_text_spans,
 )
+from statement_index import (
+    CsvRowFilter,
+    IndexBuilder,
+    IndexedStatement,
+    StatementIndex,
+    StatementRef,
+    iter_csv_records,
+)
+
+
+_JOIN_PATTERN = re.compile(r"\bJOIN\b", re.I)
+_CTE_PATTERN = re.compile(
+    r"(?:\bWITH(?:\s+RECURSIVE)?|,)\s*[\w\"]+\s*(?:\([^()]*\)\s*)?AS\s*\(", re.I
+)
+_SUBQUERY_PATTERN = re.compile(r"\(\s*SEL(?:ECT)?\b", re.I)
+_COMPLEXITY_COMMENT_PATTERN = re.compile(r"/\*.*?\*/|--[^\n]*", re.S)
+_NESTING_CHAR_PATTERN = re.compile(r"[()']")
+
+
+@dataclass(frozen=True)
+class StatementComplexity:
+    length: int
+    nesting_depth: int
+    join_count: int
+    cte_count: int
+    subquery_count: int
+
+    @property
+    def score(self) -> float:
+        return (
+            self.length / 1000
+            + 2 * self.nesting_depth
+            + self.join_count
+            + 2 * self.cte_count
+            + self.subquery_count
+        )
+
+
+def _measure_complexity(sql_text: str) -> StatementComplexity:
+    code = _COMPLEXITY_COMMENT_PATTERN.sub(" ", sql_text)
+    depth = max_depth = 0
+    in_quote = False
+    # Only quotes and parentheses matter; skip everything else in C.
+    for char in _NESTING_CHAR_PATTERN.findall(code):
+        if char == "'":
+            in_quote = not in_quote
+        elif in_quote:
+            continue
+        elif char == "(":
+            depth += 1
+            max_depth = max(max_depth, depth)
+        elif char == ")":
+            depth = max(0, depth - 1)
+    return StatementComplexity(
+        length=len(sql_text),
+        nesting_depth=max_depth,
+        join_count=len(_JOIN_PATTERN.findall(code)),
+        cte_count=len(_CTE_PATTERN.findall(code)),
+        subquery_count=len(_SUBQUERY_PATTERN.findall(code)),
+    )
 
 
 @dataclass
 class QueryTask:
     identifier: str
-    query_text: str
     origin: str
     context: str
     source_path: Path
+    text: Optional[str] = field(default=None, repr=False)
+    text_ref: Optional[StatementRef] = None
+    complexity: Optional[StatementComplexity] = None
+    sql_digest: Optional[str] = None
+    # Inferred from the leading keywords; recorded in statement indexes.
+    statement_type: Optional[str] = None
+
+    @property
+    def query_text(self) -> str:
+        # Tasks enumerated from a statement index only read their SQL when needed.
+        if self.text is None:
+            assert self.text_ref is not None
+            self.text = self.text_ref.read()
+        return self.text
+
+
+def _task_complexity(task: QueryTask) -> StatementComplexity:
+    # Scored on first use and kept, so runs that never schedule or index skip it.
+    if task.complexity is None:
+        task.complexity = _measure_complexity(task.query_text)
+    return task.complexity
+
+
+def _complexity_score(task: QueryTask) -> float:
+    return _task_complexity(task).score
+
+
+class _InFlightTasks:
+    """The tasks whose statements are on their way through the parse backends, by SQL.
+
+    Backends only see SQL text; this lets the heavy-lane check reuse the complexity
+    cached on a statement's task instead of measuring the statement again.
+    """
+
+    def __init__(self) -> None:
+        self._tasks: Dict[str, QueryTask] = {}
+
+    def add(self, task: QueryTask) -> None:
+        self._tasks[task.query_text] = task
+
+    def discard(self, task: QueryTask) -> None:
+        if self._tasks.get(task.query_text) is task:
+            del self._tasks[task.query_text]
+
+    def complexity(self, sql: str) -> StatementComplexity:
+        task = self._tasks.get(sql)
+        return _task_complexity(task) if task is not None else _measure_complexity(sql)
+
+
+def _task_digest(task: QueryTask) -> str:
+    if task.sql_digest is None:
+        task.sql_digest = statement_digest(task.query_text)
+    return task.sql_digest
+
+
+def _task_statement_type(task: QueryTask) -> str:
+    if task.statement_type is None:
+        task.statement_type = _infer_statement_type_from_sql(task.query_text)
+    return task.statement_type
+
+
+def _sample_stratum(task: QueryTask) -> Tuple[str, str]:
+    return str(task.source_path.parent), _task_statement_type(task)
 
 
 @dataclass
@@ -51,14 +244,20 @@ class QueryOutcome:
     statement_type: str = "UNKNOWN"
     statement_type_source: str = "unknown"
     parser_statement_type: Optional[str] = None
+    from_cache: bool = False
+    cached_timing_ms: Optional[float] = None
+    duplicate_of: Optional[str] = None
+    skipped: bool = False
+    timeout_error: Optional[str] = None
+    retries: int = 0
 
     @property
     def succeeded(self) -> bool:
-        return not (self.rpc_error or self.parser_error)
+        return not (self.rpc_error or self.parser_error or self.timeout_error)
 
 
 def _split_statements(sql_text: str) -> List[str]:
-    return [stmt.strip() for stmt in sql_text.split(";") if stmt.strip()]
+    return split_sql_text(sql_text)
 
 
 def _safe_filename(label: str) -> str:
@@ -66,32 +265,99 @@ def _safe_filename(label: str) -> str:
     return "".join(sanitized)[:128] or "result"
 
 
-def _load_tasks_from_file(path: Path) -> List[QueryTask]:
-    text = path.read_text(encoding="utf-8")
-    statements = _split_statements(text)
-    tasks: List[QueryTask] = []
-    for idx, statement in enumerate(statements, start=1):
-        identifier = f"{path}:{idx}"
-        tasks.append(
-            QueryTask(
-                identifier=identifier,
-                query_text=statement,
-                origin="file",
-                context=f"{path} (statement {idx})",
-                source_path=path,
-            )
+def _file_task(path: Path, idx: int, **fields: Any) -> QueryTask:
+    return QueryTask(
+        identifier=f"{path}:{idx}",
+        origin="file",
+        context=f"{path} (statement {idx})",
+        source_path=path,
+        **fields,
+    )
+
+
+def _csv_task(
+    csv_path: Path, column: str, row_idx: int, stmt_idx: int, **fields: Any
+) -> QueryTask:
+    return QueryTask(
+        identifier=f"{csv_path}:row{row_idx}:stmt{stmt_idx}",
+        origin="csv",
+        context=f"{csv_path} row {row_idx} column '{column}' (statement {stmt_idx})",
+        source_path=csv_path,
+        **fields,
+    )
+
+
+def _indexed_fields(statement: IndexedStatement) -> Dict[str, Any]:
+    return {
+        "text_ref": statement.ref,
+        "complexity": StatementComplexity(*statement.metrics),
+        "sql_digest": statement.digest,
+        "statement_type": statement.statement_type,
+    }
+
+
+def _index_task(
+    builder: Optional[IndexBuilder],
+    task: QueryTask,
+    start: int,
+    length: int,
+    row: int,
+    stmt: int,
+    cell_span: Optional[StatementSpan] = None,
+) -> None:
+    if builder is not None:
+        builder.add(
+            start,
+            length,
+            row,
+            stmt,
+            _task_digest(task),
+            astuple(_task_complexity(task)),
+            _task_statement_type(task),
+            cell_span.start if cell_span else 0,
+            cell_span.end - cell_span.start if cell_span else 0,
         )
-    return tasks
 
 
-def _load_tasks_from_directory(path: Path) -> List[QueryTask]:
-    tasks: List[QueryTask] = []
-    for sql_file in sorted(path.rglob("*.sql")):
-        tasks.extend(_load_tasks_from_file(sql_file))
-    return tasks
+def _load_tasks_from_file(
+    path: Path, index: Optional[StatementIndex] = None
+) -> Iterator[QueryTask]:
+    if compression_of(path):
+        # Offsets into a decompressed stream cannot be seeked to, so compressed
+        # inputs are always split afresh.
+        for idx, span in enumerate(split_sql_stream(open_binary(path)), start=1):
+            yield _file_task(path, idx, text=span.text)
+        return
+    indexed = index.entries(path) if index is not None else None
+    if indexed is not None:
+        for statement in indexed:
+            yield _file_task(path, statement.stmt, **_indexed_fields(statement))
+        return
+    builder_context = index.builder(path) if index is not None else nullcontext()
+    with builder_context as builder:
+        for idx, span in enumerate(split_sql_file(path), start=1):
+            task = _file_task(path, idx, text=span.text)
+            _index_task(builder, task, span.start, span.end - span.start, 0, idx)
+            yield task
+
+
+def _column_position(csv_path: Path, fieldnames: List[str], column: str) -> int:
+    if column not in fieldnames:
+        available = ", ".join(fieldnames)
+        raise ValueError(
+            f"Column '{column}' not found in {csv_path}. Available columns: {available}"
+        )
+    # Like csv.DictReader, a repeated column name resolves to its last occurrence.
+    return len(fieldnames) - 1 - fieldnames[::-1].index(column)
 
 
-def _load_tasks_from_csv(spec: str, delimiter: str) -> List[QueryTask]:
+def _load_tasks_from_csv(
+    spec: str,
+    delimiter: str,
+    index: Optional[StatementIndex] = None,
+    row_filter: Optional[CsvRowFilter] = None,
+    load_stats: Optional[LoadStats] = None,
+) -> Iterator[QueryTask]:
     try:
         csv_path_str, column = spec.split(":", 1)
     except ValueError as exc:
@@ -100,62 +366,163 @@ def _load_tasks_from_csv(spec: str, delimiter: str) -> List[QueryTask]:
         ) from exc
 
     csv_path = Path(csv_path_str)
-    with csv_path.open(encoding="utf-8", newline="") as handle:
-        reader = csv.DictReader(handle, delimiter=delimiter)
-        if not reader.fieldnames or column not in reader.fieldnames:
-            available = ", ".join(reader.fieldnames or [])
-            raise ValueError(
-                f"Column '{column}' not found in {csv_path}. Available columns: {available}"
+    if compression_of(csv_path):
+        index = None
+    filter_key = str(row_filter) if row_filter is not None else None
+    indexed = (
+        index.entries(csv_path, column=column, delimiter=delimiter, row_filter=filter_key)
+        if index
+        else None
+    )
+    if indexed is not None:
+        for statement in indexed:
+            yield _csv_task(
+                csv_path, column, statement.row, statement.stmt, **_indexed_fields(statement)
             )
-        tasks: List[QueryTask] = []
-        for row_idx, row in enumerate(reader, start=2):
-            cell_value = (row.get(column) or "").strip()
-            if not cell_value:
-                continue
-            statements = _split_statements(cell_value)
-            for stmt_idx, statement in enumerate(statements, start=1):
-                identifier = f"{csv_path}:row{row_idx}:stmt{stmt_idx}"
-                tasks.append(
-                    QueryTask(
-                        identifier=identifier,
-                        query_text=statement,
-                        origin="csv",
-                        context=(
-                            f"{csv_path} row {row_idx} column '{column}' (statement {stmt_idx})"
-                        ),
-                        source_path=csv_path,
+        return
+
+    # Byte offsets are only worth tracking when they go into an index.
+    started: Optional[float] = time.perf_counter()
+    records = iter_csv_records(csv_path, delimiter, offsets=index is not None)
+    header = next(records, None)
+    fieldnames = header.values if header else []
+    column_index = _column_position(csv_path, fieldnames, column)
+    filter_index = (
+        _column_position(csv_path, fieldnames, row_filter.column) if row_filter else -1
+    )
+    builder_context = (
+        index.builder(
+            csv_path,
+            column=column,
+            column_index=column_index,
+            delimiter=delimiter,
+            row_filter=filter_key,
+        )
+        if index is not None
+        else nullcontext()
+    )
+    scanned = filtered = 0
+    scan_s = 0.0
+    try:
+        with builder_context as builder:
+            for record in records:
+                scanned += 1
+                values = record.values
+                if row_filter is not None and not row_filter.matches(
+                    values[filter_index] if filter_index < len(values) else ""
+                ):
+                    filtered += 1
+                    continue
+                cell_value = values[column_index].strip() if column_index < len(values) else ""
+                if not cell_value:
+                    continue
+                for stmt_idx, span in enumerate(split_sql_text_spans(cell_value), start=1):
+                    task = _csv_task(csv_path, column, record.row, stmt_idx, text=span.text)
+                    _index_task(
+                        builder, task, record.start, record.length, record.row, stmt_idx, span
                     )
-                )
-        return tasks
+                    # Time spent suspended at a yield belongs to the consumer.
+                    scan_s += time.perf_counter() - started
+                    started = None
+                    yield task
+                    started = time.perf_counter()
+    finally:
+        if started is not None:
+            scan_s += time.perf_counter() - started
+        if load_stats is not None:
+            load_stats.add_csv_scan(scanned, filtered, scan_s)
+
+
+def _load_tasks_from_dbql(path: Path, delimiter: str, window: int) -> Iterator[QueryTask]:
+    incomplete = 0
+    for query in iter_dbql_queries(path, delimiter, window):
+        label = f"query{query.query_id}"
+        details = [f"QueryID {query.query_id}"]
+        if query.user_name:
+            details.append(f"user {query.user_name}")
+        if query.start_time:
+            details.append(f"started {query.start_time}")
+        if query.first_row_no != 1:
+            label += f":row{query.first_row_no}"
+        if not query.complete:
+            # Keep a part of a query from passing for the whole of it.
+            label += ":incomplete"
+            incomplete += 1
+            details.append(
+                f"incomplete: {query.fragment_count} fragments from SqlRowNo {query.first_row_no}"
+            )
+        for stmt_idx, statement in enumerate(_split_statements(query.sql_text), start=1):
+            yield QueryTask(
+                identifier=f"{path}:{label}:stmt{stmt_idx}",
+                origin="dbql",
+                context=f"{path} {', '.join(details)} (statement {stmt_idx})",
+                source_path=path,
+                text=statement,
+            )
+    if incomplete:
+        print(
+            f"Warning: {incomplete} DBQL queries in {path} are missing SqlRowNo fragments "
+            "or had them split by the reassembly window; sort the export by QueryID, "
+            "SqlRowNo or raise --dbql-window.",
+            file=sys.stderr,
+        )
 
 
-def _collect_tasks(
+def _iter_tasks(
     sql_files: List[str],
     sql_dirs: List[str],
     csv_specs: List[str],
     csv_delimiter: str,
     csv_dirs: List[str],
     csv_dir_column: Optional[str],
-) -> List[QueryTask]:
-    tasks: List[QueryTask] = []
+    index: Optional[StatementIndex] = None,
+    dbql_exports: Sequence[str] = (),
+    dbql_window: int = 10000,
+    load_workers: int = 1,
+    load_stats: Optional[LoadStats] = None,
+    csv_row_filter: Optional[CsvRowFilter] = None,
+) -> Iterator[QueryTask]:
+    """Validate the inputs up front, then load their statements lazily, source by source.
+
+    Every file is its own source: directories are walked as the sources are needed,
+    and ``load_workers`` sources are read and split ahead of the consumer. Statements
+    come out in the same order whatever the number of workers.
+    """
+    sources: List[Callable[[], Iterator[Callable[[], Iterator[QueryTask]]]]] = []
+
+    def _sql_directory(path: Path) -> Iterator[Callable[[], Iterator[QueryTask]]]:
+        for sql_file in find_inputs(path, ".sql", load_workers):
+            yield partial(_load_tasks_from_file, sql_file, index)
+
+    def _single(
+        loader: Callable[[], Iterator[QueryTask]],
+    ) -> Iterator[Callable[[], Iterator[QueryTask]]]:
+        yield loader
 
     for file_path in sql_files:
         path = Path(file_path)
         if not path.exists():
             raise FileNotFoundError(f"SQL file not found: {path}")
         if path.is_dir():
-            tasks.extend(_load_tasks_from_directory(path))
+            sources.append(partial(_sql_directory, path))
         else:
-            tasks.extend(_load_tasks_from_file(path))
+            sources.append(partial(_single, partial(_load_tasks_from_file, path, index)))
 
     for dir_path in sql_dirs:
         path = Path(dir_path)
         if not path.exists() or not path.is_dir():
             raise FileNotFoundError(f"SQL directory not found: {path}")
-        tasks.extend(_load_tasks_from_directory(path))
-
+        sources.append(partial(_sql_directory, path))
+
+    load_csv = partial(
+        _load_tasks_from_csv,
+        delimiter=csv_delimiter,
+        index=index,
+        row_filter=csv_row_filter,
+        load_stats=load_stats,
+    )
     for csv_spec in csv_specs:
-        tasks.extend(_load_tasks_from_csv(csv_spec, csv_delimiter))
+        sources.append(partial(_single, partial(load_csv, csv_spec)))
 
     if csv_dirs:
         if not csv_dir_column:
@@ -164,12 +531,27 @@ def _collect_tasks(
             path = Path(dir_path)
             if not path.exists() or not path.is_dir():
                 raise FileNotFoundError(f"CSV directory not found: {path}")
-            for csv_file in sorted(path.rglob("*.csv")):
-                tasks.extend(
-                    _load_tasks_from_csv(f"{csv_file}:{csv_dir_column}", csv_delimiter)
-                )
 
-    return tasks
+        def _csv_directories(
+            column: str = csv_dir_column,
+        ) -> Iterator[Callable[[], Iterator[QueryTask]]]:
+            for dir_path in csv_dirs:
+                for csv_file in find_inputs(Path(dir_path), ".csv", load_workers):
+                    yield partial(load_csv, f"{csv_file}:{column}")
+
+        sources.append(_csv_directories)
+
+    for export in dbql_exports:
+        path = Path(export)
+        if not path.is_file():
+            raise FileNotFoundError(f"DBQL export not found: {path}")
+        sources.append(
+            partial(_single, partial(_load_tasks_from_dbql, path, csv_delimiter, dbql_window))
+        )
+
+    return iter_loaded_in_order(
+        chain.from_iterable(source() for source in sources), load_workers, stats=load_stats
+    )
 
 
 def _column_lineage_edges(column_lineage: Optional[Iterable[object]]) -> List[str]:
@@ -200,18 +582,12 @@ def _sanitize_component(label: str) -> str:
     return cleaned[:128] or "result"
 
 
+def _preview_label(task: QueryTask) -> str:
+    return str(task.source_path) if task.source_path else task.identifier
+
+
 def _query_preview_lines(task: QueryTask, max_lines: Optional[int] = None) -> List[str]:
-    source_label = str(task.source_path) if task.source_path else task.identifier
-    lines = [line.rstrip() for line in task.query_text.strip().splitlines()]
-    if max_lines is not None:
-        lines = lines[:max_lines]
-    formatted: List[str] = [f"{source_label} ::"]
-    if not lines:
-        formatted.append("    <empty>")
-        return formatted
-    for line in lines:
-        formatted.append(f"    {line}" if line else "    ")
-    return formatted
+    return preview_lines(_preview_label(task), task.query_text, max_lines)
 
 
 def _query_preview(task: QueryTask, max_lines: Optional[int] = None) -> str:
@@ -248,20 +624,31 @@ def _extract_parser_statement_type(result_obj: Any, payload: Dict[str, Any]) ->
     return None
 
 
-def _clean_sql_for_classification(sql_text: str) -> str:
-    text = re.sub(r"/\*.*?\*/", " ", sql_text, flags=re.S)
-    text = re.sub(r"(?m)--.*?$", " ", text)
-    text = re.sub(r"(?m)//.*?$", " ", text)
-    text = re.sub(r"(?m)#.*?$", " ", text)
-    return text.strip()
+_SQL_WORD_PATTERN = re.compile(r"[A-Za-z_]+")
+# Line comments the splitter does not know about, still skipped when classifying.
+_EXTRA_LINE_COMMENT_PATTERN = re.compile(r"(?://|#)[^\n]*")
 
 
 def _leading_sql_tokens(sql_text: str, limit: int = 6) -> List[str]:
-    cleaned = _clean_sql_for_classification(sql_text)
-    if not cleaned:
-        return []
-    tokens = re.findall(r"[A-Za-z_#]+", cleaned)
-    return [token.upper() for token in tokens[:limit]]
+    """The first ``limit`` words of the statement, upper-cased, comments skipped.
+
+    Only the head of the statement is scanned, whatever its length.
+    """
+    tokens: List[str] = []
+    pos = 0
+    length = len(sql_text)
+    while len(tokens) < limit:
+        pos = skip_trivia(sql_text, pos)
+        if pos >= length:
+            break
+        word = _SQL_WORD_PATTERN.match(sql_text, pos)
+        if word is not None:
+            tokens.append(word.group(0).upper())
+            pos = word.end()
+            continue
+        comment = _EXTRA_LINE_COMMENT_PATTERN.match(sql_text, pos)
+        pos = comment.end() if comment is not None else pos + 1
+    return tokens
 
 
 def _infer_statement_type_from_sql(sql_text: str) -> str:
@@ -287,7 +674,7 @@ def _infer_statement_type_from_sql(sql_text: str) -> str:
         return "USING"
     if first in {"CALL", "EXEC", "EXECUTE"}:
         return "CALL"
-    if first == "COLLECT" and second == "STATISTICS":
+    if first == "COLLECT" and second in {"STATISTICS", "STATS", "STAT"}:
         return "COLLECT_STATISTICS"
     if first == "LOCKING":
         return "LOCKING"
@@ -332,6 +719,86 @@ def _infer_statement_type_from_sql(sql_text: str) -> str:
     return first or "UNKNOWN"
 
 
+_FINGERPRINT_TOKEN_PATTERN = re.compile(
+    r"""
+    (?P<comment>/\*.*?\*/|--[^\n]*)
+    | (?P<literal>'(?:[^']|'')*'|\b\d+(?:\.\d+)?(?:[eE][+-]?\d+)?\b)
+    | (?P<quoted>"(?:[^"]|"")*")
+    | (?P<space>\s+)
+    """,
+    re.S | re.X,
+)
+
+
+def _fingerprint_token(match: "re.Match[str]") -> str:
+    if match.group("literal") is not None:
+        return "?"
+    if match.group("quoted") is not None:
+        return match.group("quoted")
+    return " "
+
+
+def _statement_fingerprint(sql_text: str) -> str:
+    """Hash of the statement with comments, whitespace runs and literals normalized.
+
+    Statements that differ only in string/numeric literals (dates, IDs, ...) share a
+    fingerprint, because literals never change table or column lineage.
+    """
+    normalized = _FINGERPRINT_TOKEN_PATTERN.sub(_fingerprint_token, sql_text)
+    return content_digest(" ".join(normalized.split()))
+
+
+# Fingerprints --dedupe remembers at once (least recently used forgotten first).
+DEDUPE_MAX_REPRESENTATIVES = 100_000
+
+TRIAGE_STATEMENT_TYPES: Sequence[str] = (
+    "BT",
+    "ET",
+    "BEGIN_TRANSACTION",
+    "LOGON",
+    "LOGOFF",
+    "COLLECT_STATISTICS",
+    "GRANT",
+    "REVOKE",
+    "DATABASE",
+    "LOCKING",
+)
+
+# A lock request is only noise when no statement follows it.
+_LOCKED_STATEMENT_PATTERN = re.compile(
+    r"\b(?:SEL|SELECT|INS|INSERT|UPD|UPDATE|DEL|DELETE|MERGE)\b", re.I
+)
+
+
+class StatementTriage:
+    """Matches statements that are skipped before parsing.
+
+    A statement is triaged when _infer_statement_type_from_sql() classifies it as one
+    of ``statement_types``, so triage and the statement-type metrics always agree.
+    """
+
+    def __init__(self, statement_types: Iterable[str] = TRIAGE_STATEMENT_TYPES):
+        selected = [label.strip().upper() for label in statement_types if label.strip()]
+        unknown = sorted(set(selected) - set(TRIAGE_STATEMENT_TYPES))
+        if unknown:
+            raise ValueError(
+                f"Unsupported triage statement type(s): {', '.join(unknown)}. "
+                f"Choose from: {', '.join(TRIAGE_STATEMENT_TYPES)}"
+            )
+        self.statement_types = tuple(dict.fromkeys(selected))
+        self._selected = frozenset(self.statement_types)
+
+    def match(self, sql_text: str) -> Optional[str]:
+        if not self._selected:
+            return None
+        statement_type = _infer_statement_type_from_sql(sql_text)
+        if statement_type not in self._selected:
+            return None
+        if statement_type == "LOCKING" and _LOCKED_STATEMENT_PATTERN.search(sql_text):
+            return None
+        return statement_type
+
+
 def _resolve_statement_type(parser_type: Optional[str], sql_text: str) -> Tuple[str, str]:
     normalized_parser_type = _normalize_statement_type_label(parser_type)
     if normalized_parser_type and normalized_parser_type != "UNKNOWN":
@@ -346,7 +813,7 @@ def _resolve_statement_type(parser_type: Optional[str], sql_text: str) -> Tuple[
     return "UNKNOWN", "unknown"
 
 
-FLAG_PRIORITY: Sequence[str] = ("ERR", "GAP", "LIN", "SELF", "COL", "OK")
+FLAG_PRIORITY: Sequence[str] = ("ERR", "TIMEOUT", "GAP", "LIN", "SELF", "COL", "OK", "SKIP")
 
 
 def _build_flag_prefix(flags: Sequence[str]) -> str:
@@ -357,12 +824,16 @@ def _build_flag_prefix(flags: Sequence[str]) -> str:
 
 
 def _compute_query_flags(outcome: QueryOutcome) -> List[str]:
+    if outcome.skipped:
+        return ["SKIP"]
     flags: List[str] = []
     has_upstreams = bool(outcome.upstreams)
     has_downstreams = bool(outcome.downstreams)
     complete_lineage = has_upstreams and has_downstreams
     partial_lineage = has_upstreams ^ has_downstreams
 
+    if outcome.timeout_error:
+        flags.append("TIMEOUT")
     if outcome.rpc_error or outcome.parser_error:
         flags.append("ERR")
 
@@ -385,8 +856,11 @@ def _compute_query_flags(outcome: QueryOutcome) -> List[str]:
 
 
 def _aggregate_folder_flags(outcomes: Sequence[QueryOutcome]) -> List[str]:
-    flag_set = {flag for outcome in outcomes for flag in outcome.flags}
-    non_ok = flag_set - {"OK"}
+    return _aggregate_flag_set({flag for outcome in outcomes for flag in outcome.flags})
+
+
+def _aggregate_flag_set(flag_set: Set[str]) -> List[str]:
+    non_ok = flag_set - {"OK", "SKIP"}
     if non_ok:
         flag_set = non_ok
     if not flag_set:
@@ -411,13 +885,24 @@ def _build_query_filename(outcome: QueryOutcome) -> str:
     return f"{flag_prefix}{identifier_label}--{hash_suffix}.json"
 
 
-def _render_query_outcome(index: int, total: int, outcome: QueryOutcome) -> str:
+def _render_query_outcome(
+    index: int,
+    total: Optional[int],
+    outcome: QueryOutcome,
+    stored_blob: Optional[str] = None,
+) -> str:
+    """The transcript of one query; with ``stored_blob`` it names the stored SQL instead."""
     status = "OK"
-    if outcome.rpc_error:
+    if outcome.skipped:
+        status = "SKIPPED"
+    elif outcome.timeout_error:
+        status = "TIMEOUT"
+    elif outcome.rpc_error:
         status = "RPC_ERROR"
     elif outcome.parser_error:
         status = "PARSE_ERROR"
-    header = f"[{status}] Query {index}/{total}: {outcome.task.identifier}"
+    position = f"{index}/{total}" if total is not None else str(index)
+    header = f"[{status}] Query {position}: {outcome.task.identifier}"
     lines = [
         "",
         header,
@@ -427,13 +912,26 @@ def _render_query_outcome(index: int, total: int, outcome: QueryOutcome) -> str:
         f"Parse time: {outcome.timing_ms:.3f} ms",
         f"Self-referential lineage: {'YES' if outcome.self_referential else 'NO'}",
     ]
+    if outcome.retries:
+        lines.append(f"Retries: {outcome.retries}")
+    if outcome.duplicate_of:
+        lines.append(f"Lineage reused from: {outcome.duplicate_of}")
+    if outcome.skipped:
+        lines.append(f"Skipped before parsing: triage matched {outcome.statement_type}")
+    if outcome.timeout_error:
+        lines.append(f"Timeout: {outcome.timeout_error}")
     if outcome.rpc_error:
         lines.append(f"RPC error: {outcome.rpc_error}")
     if outcome.parser_error:
         lines.append(f"Parser error: {outcome.parser_error}")
 
     lines.append("Query preview:")
-    lines.append(_query_preview(outcome.task))
+    if stored_blob is not None:
+        lines.append(
+            f"{_preview_label(outcome.task)} :: sql_blob {stored_blob} ({BLOB_STORE_NAME})"
+        )
+    else:
+        lines.append(_query_preview(outcome.task))
 
     lines.append("Lineage summary:")
     if not outcome.downstreams and not outcome.upstreams:
@@ -458,13 +956,789 @@ def _render_query_outcome(index: int, total: int, outcome: QueryOutcome) -> str:
     return "\n".join(lines)
 
 
+def _build_outcome(task: QueryTask, attempt: ParseAttempt) -> QueryOutcome:
+    result = attempt.result
+    if attempt.skipped_as is not None:
+        return QueryOutcome(
+            task=task,
+            upstreams=[],
+            downstreams=[],
+            column_edges=[],
+            timing_ms=attempt.elapsed_ms,
+            parser_error=None,
+            rpc_error=None,
+            self_referential=False,
+            raw_payload=attempt.payload,
+            statement_type=attempt.skipped_as,
+            statement_type_source="triage",
+            skipped=True,
+        )
+    if attempt.error is not None or result is None:
+        parser_statement_type = None
+        statement_type, statement_type_source = _resolve_statement_type(
+            parser_statement_type, task.query_text
+        )
+        return QueryOutcome(
+            task=task,
+            upstreams=[],
+            downstreams=[],
+            column_edges=[],
+            timing_ms=attempt.elapsed_ms,
+            parser_error=None,
+            rpc_error=None if attempt.timed_out else attempt.error,
+            self_referential=False,
+            raw_payload=attempt.payload,
+            statement_type=statement_type,
+            statement_type_source=statement_type_source,
+            parser_statement_type=parser_statement_type,
+            timeout_error=attempt.error if attempt.timed_out else None,
+        )
+
+    payload = attempt.payload
+    debug_error = payload.get("debugInfoError")
+    upstreams = list(getattr(result, "in_tables", None) or [])
+    downstreams = list(getattr(result, "out_tables", None) or [])
+    column_edges = _column_lineage_edges(getattr(result, "column_lineage", None))
+    parser_statement_type = _extract_parser_statement_type(result, payload)
+    statement_type, statement_type_source = _resolve_statement_type(
+        parser_statement_type, task.query_text
+    )
+    self_ref = bool(
+        downstreams
+        and upstreams
+        and any(ds == us for ds in downstreams for us in upstreams)
+    )
+    return QueryOutcome(
+        task=task,
+        upstreams=upstreams,
+        downstreams=downstreams,
+        column_edges=column_edges,
+        timing_ms=attempt.elapsed_ms,
+        parser_error=debug_error,
+        rpc_error=None,
+        self_referential=self_ref,
+        raw_payload=payload,
+        statement_type=statement_type,
+        statement_type_source=statement_type_source,
+        parser_statement_type=parser_statement_type,
+        from_cache=attempt.cached,
+        cached_timing_ms=attempt.cached_timing_ms,
+    )
+
+
+def _parse_tasks(
+    tasks: Iterable[QueryTask],
+    backend: ParseBackend,
+    in_flight: Optional[_InFlightTasks] = None,
+) -> Iterator[Tuple[QueryTask, ParseAttempt, Optional[str]]]:
+    pending: Deque[QueryTask] = deque()
+
+    def _statements() -> Iterator[str]:
+        for task in tasks:
+            pending.append(task)
+            if in_flight is not None:
+                in_flight.add(task)
+            yield task.query_text
+
+    for attempt in backend.parse_many(_statements()):
+        task = pending.popleft()
+        if in_flight is not None:
+            in_flight.discard(task)
+        yield task, attempt, None
+
+
+def _duplicate_attempt(attempt: ParseAttempt) -> ParseAttempt:
+    # The duplicate was never sent: it costs no parse time, was never retried and gets
+    # a payload of its own rather than an alias of the representative's.
+    return replace(attempt, payload=copy.deepcopy(attempt.payload), elapsed_ms=0.0, retries=0)
+
+
+def _parse_deduplicated(
+    tasks: Iterable[QueryTask],
+    backend: ParseBackend,
+    max_representatives: int = DEDUPE_MAX_REPRESENTATIVES,
+    in_flight: Optional[_InFlightTasks] = None,
+) -> Iterator[Tuple[QueryTask, ParseAttempt, Optional[str]]]:
+    """Parse one representative per statement fingerprint and fan its attempt out.
+
+    Yields ``(task, attempt, representative_identifier)`` in the order given; the
+    identifier is ``None`` for tasks that were parsed themselves. Duplicates get a
+    copy of the representative's attempt with ``elapsed_ms`` 0. Only the
+    ``max_representatives`` most recently used fingerprints are remembered; a
+    statement whose fingerprint was forgotten is parsed again as a new representative.
+    """
+    # fingerprint -> [representative identifier, its attempt once answered]
+    representatives: "OrderedDict[str, List[Any]]" = OrderedDict()
+
+    def _reuse(
+        item: Tuple[QueryTask, str, List[Any]]
+    ) -> Optional[Callable[[], Tuple[ParseAttempt, Optional[str]]]]:
+        task, fingerprint, slot = item
+        representative = representatives.get(fingerprint)
+        if representative is None:
+            representative = [task.identifier, None]
+            representatives[fingerprint] = representative
+            if len(representatives) > max_representatives:
+                representatives.popitem(last=False)
+            slot.append(representative)
+            return None
+        representatives.move_to_end(fingerprint)
+        # Called only after the representative, which comes earlier, has been answered.
+        return lambda: (_duplicate_attempt(representative[1]), representative[0])
+
+    def _record(
+        item: Tuple[QueryTask, str, List[Any]], parsed_item: Tuple[ParseAttempt, None]
+    ) -> None:
+        item[2][0][1] = parsed_item[0]
+
+    merged = merge_in_order(
+        ((task, _statement_fingerprint(task.query_text), []) for task in tasks),
+        _reuse,
+        lambda unique: (
+            (attempt, None)
+            for _, attempt, _ in _parse_tasks((task for task, _, _ in unique), backend, in_flight)
+        ),
+        on_dispatched=_record,
+    )
+    for (task, _, _), (attempt, representative_id) in merged:
+        yield task, attempt, representative_id
+
+
+def _parse_with_triage(
+    tasks: Iterable[QueryTask],
+    triage: StatementTriage,
+    parse: Callable[
+        [Iterable[QueryTask]], Iterator[Tuple[QueryTask, ParseAttempt, Optional[str]]]
+    ],
+) -> Iterator[Tuple[QueryTask, ParseAttempt, Optional[str]]]:
+    """Answer triaged statements with a skipped attempt; ``parse`` handles the rest."""
+
+    def _skip(task: QueryTask) -> Optional[Callable[[], Tuple[ParseAttempt, Optional[str]]]]:
+        statement_type = triage.match(task.query_text)
+        if statement_type is None:
+            return None
+        attempt = ParseAttempt(
+            result=None,
+            payload={"skipped": "triage", "statement_type": statement_type},
+            elapsed_ms=0.0,
+            skipped_as=statement_type,
+        )
+        return lambda: (attempt, None)
+
+    merged = merge_in_order(
+        tasks,
+        _skip,
+        lambda remaining: (
+            (attempt, representative) for _, attempt, representative in parse(remaining)
+        ),
+    )
+    for task, (attempt, representative) in merged:
+        yield task, attempt, representative
+
+
+def _parse_with_replay(
+    tasks: Iterable[QueryTask],
+    replay: ManifestReplay,
+    parse: Callable[
+        [Iterable[QueryTask]], Iterator[Tuple[QueryTask, ParseAttempt, Optional[str]]]
+    ],
+) -> Iterator[Tuple[QueryTask, ParseAttempt, Optional[str]]]:
+    """Answer queries an earlier run already completed from its manifest."""
+
+    def _replayed(
+        task: QueryTask,
+    ) -> Optional[Callable[[], Tuple[ParseAttempt, Optional[str]]]]:
+        digest = _task_digest(task)
+        if not replay.reusable(task.identifier, digest):
+            return None
+        return lambda: replay.replay(task.identifier, digest)
+
+    merged = merge_in_order(
+        tasks,
+        _replayed,
+        lambda remaining: (
+            (attempt, representative) for _, attempt, representative in parse(remaining)
+        ),
+    )
+    for task, (attempt, representative) in merged:
+        yield task, attempt, representative
+
+
+def _record_completed(
+    manifest: RunManifest, outcome: QueryOutcome, attempt: ParseAttempt
+) -> None:
+    manifest.record(
+        outcome.task.identifier,
+        _task_digest(outcome.task),
+        outcome.task.source_path,
+        _build_query_filename(outcome),
+        attempt,
+        outcome.duplicate_of,
+    )
+
+
+# What a source folder's name can carry before ``_build_source_folder_name(source, [])``.
+_SOURCE_FOLDER_PREFIX = re.compile(r"(?:\.partial-)?(?:\[[A-Z]+\])*")
+
+
+def _clear_run_outputs(raw_dir: Path, sources: Iterable[str]) -> None:
+    """Remove the folders and reports an earlier attempt of this run wrote.
+
+    Only the folders of ``sources``, the sources its manifest recorded, are removed.
+    A query is recorded before its folder is created, so that is every folder the
+    attempt could have written, and nothing else in ``raw_dir`` is touched.
+    """
+    folder_names = {_build_source_folder_name(Path(source), []) for source in sources}
+    for child in raw_dir.iterdir():
+        if child.is_dir():
+            prefix = _SOURCE_FOLDER_PREFIX.match(child.name)
+            if child.name == OUTPUT_DIR_NAME or child.name[prefix.end() :] in folder_names:
+                shutil.rmtree(child)
+        elif child.name in {
+            "[[]]report.json",
+            "[[]]report.md",
+            BLOB_STORE_NAME,
+            RUN_INDEX_NAME,
+            COLUMNS_NAME,
+        }:
+            child.unlink()
+
+
+def _write_report_json(path: Path, report_data: Dict[str, Any], entries_path: Path) -> None:
+    """Write ``report_data`` with its ``queries`` list streamed from a JSON-lines spool.
+
+    The output is byte-for-byte what ``json.dumps(report_data, indent=2)`` would give
+    with the entries inlined, without holding the entries in memory.
+    """
+    head = json.dumps({**report_data, "queries": []}, indent=2)
+    assert head.endswith('"queries": []\n}')
+    with path.open("w", encoding="utf-8") as out, entries_path.open(encoding="utf-8") as spool:
+        out.write(head[: -len("[]\n}")])
+        first = True
+        for line in spool:
+            entry = json.dumps(json.loads(line), indent=2).replace("\n", "\n    ")
+            out.write(("[\n    " if first else ",\n    ") + entry)
+            first = False
+        out.write("[]\n}" if first else "\n  ]\n}")
+
+
+# Lines of each statement's SQL shown in a source's [[]]report.md.
+REPORT_PREVIEW_LINES = 10
+
+
+def _query_previews_markdown(
+    spool_path: Path, preview: Callable[[Dict[str, Any]], List[str]]
+) -> List[str]:
+    lines = [
+        "",
+        "## Queries",
+        "",
+        f"_The first {REPORT_PREVIEW_LINES} lines of each statement, in input order._",
+    ]
+    with spool_path.open(encoding="utf-8") as spool:
+        for line in spool:
+            entry = json.loads(line)
+            preview_lines = preview(entry)
+            shown = preview_lines[: REPORT_PREVIEW_LINES + 1]
+            if len(preview_lines) > len(shown):
+                shown.append("    ...")
+            lines.extend(
+                [
+                    "",
+                    f"### `{entry['identifier']}` {_build_flag_prefix(entry['flags'])}".rstrip(),
+                    "",
+                    "```text",
+                    *shown,
+                    "```",
+                ]
+            )
+    return lines
+
+
+def _write_reports(
+    folder_dir: Path,
+    source: Path,
+    report: ReportAccumulator,
+    spool_path: Path,
+    overview: Dict[str, Any],
+    preview: Optional[Callable[[Dict[str, Any]], List[str]]] = None,
+) -> List[str]:
+    """Write ``[[]]report.json`` and ``[[]]report.md``; with ``preview``, which renders a
+    query entry's preview lines, the markdown also shows every statement's SQL."""
+    flags = _aggregate_flag_set(report.flag_set)
+    statement_summary, flag_keys, error_class_keys = report.statement_type_metrics(
+        FLAG_PRIORITY
+    )
+    report_data = {
+        "source": str(source),
+        "flags": flags,
+        **overview,
+        "debug_info_error_counts": report.debug_error_summary(),
+        "statement_type_summary": statement_summary,
+        "statement_type_flag_keys": flag_keys,
+        "statement_type_error_classes": error_class_keys,
+    }
+    _write_report_json(folder_dir / "[[]]report.json", report_data, spool_path)
+    report_markdown = render_summary_markdown(
+        source,
+        _build_flag_prefix(flags),
+        overview,
+        statement_summary,
+        flag_keys,
+        error_class_keys,
+    )
+    if preview is not None:
+        previews = _query_previews_markdown(spool_path, preview)
+        report_markdown = "\n".join([report_markdown, *previews])
+    (folder_dir / "[[]]report.md").write_text(report_markdown, encoding="utf-8")
+    return flags
+
+
+@dataclass
+class _SourceState:
+    path: Path
+    folder_dir: Path
+    report: ReportAccumulator
+    spool_path: Path
+    spool: Any
+    first_row_id: Optional[int] = None
+    last_row_id: Optional[int] = None
+    # Run index rows of the source's earlier runs of statements, as (first, last) ids.
+    earlier_rows: List[Tuple[int, int]] = field(default_factory=list)
+
+
+@dataclass
+class _FinishedSource:
+    folder_dir: Path
+    spool_path: Path
+    rows: List[Tuple[int, int]]
+
+
+class OutcomeWriter:
+    """Prints and writes outcomes as they arrive, keeping only compact aggregates.
+
+    Outcomes must arrive grouped by source. Each outcome's JSON is written straight
+    away, and its report entry is spooled to disk. When the next source starts, the
+    finished source gets its ``[[]]report.json``/``.md``. The run-wide report is written
+    by ``finish()``. When ``folder_flags`` is not known up front, a source's files go to
+    a ``.partial-`` folder that is renamed to its flag-prefixed name once the source is
+    complete. A source that comes back later (a file listed twice, a CSV read for two
+    columns) continues where it stopped: its aggregates are rebuilt from its spooled
+    entries, and its folder and reports then cover both runs. With a ``query_output``
+    writer, each query's JSON goes to it as one record instead of its own file, and only
+    reports are written to the source folders. With ``sql_blobs``, each statement's text
+    goes to that store and the query JSON and report entries keep only its ``sql_blob``,
+    the digest of its exact text it is stored under, instead of the text and its
+    preview; the printed transcript still shows the preview, and a source's
+    ``[[]]report.md`` lists every statement's preview, rendered from the store. Every query is also recorded in the
+    run's ``RunIndex`` with where it was written, and in ``results_store`` when one is
+    given. With ``columns``, outcomes are collected column by column instead of into the
+    run-wide accumulator; ``finish()`` saves them and computes the run-wide report from
+    the columns. Timing percentiles are exact unless ``timing_exact_limit`` bounds the
+    timings kept per statement type, as ``--stream`` does.
+    """
+
+    def __init__(
+        self,
+        raw_dir: Path,
+        *,
+        total: Optional[int] = None,
+        folder_flags: Optional[Dict[Path, List[str]]] = None,
+        query_output: Optional[JsonlShardWriter] = None,
+        sql_blobs: Optional[SqlBlobStore] = None,
+        results_store: Optional[ResultsStore] = None,
+        columns: Optional[OutcomeColumns] = None,
+        timing_exact_limit: Optional[int] = None,
+    ):
+        self.raw_dir = raw_dir
+        self.timing_exact_limit = timing_exact_limit
+        self.total = total
+        self.folder_flags = folder_flags
+        self.query_output = query_output
+        self.sql_blobs = sql_blobs
+        self.results_store = results_store
+        self.columns = columns
+        self.run_index = RunIndex(raw_dir / RUN_INDEX_NAME)
+        if query_output is not None:
+            query_output.on_written = self.run_index.set_location
+        self.count = 0
+        self.run_report = ReportAccumulator(timing_exact_limit)
+        self._spool_dir = raw_dir / ".spool"
+        if self._spool_dir.exists():
+            # Left behind by a run that crashed; nothing in it is reused.
+            shutil.rmtree(self._spool_dir)
+        self._spool_dir.mkdir(parents=True)
+        self._run_spool_path = self._spool_dir / "run.jsonl"
+        self._run_spool = self._run_spool_path.open("w", encoding="utf-8")
+        self._source: Optional[_SourceState] = None
+        self._finished: Dict[Path, _FinishedSource] = {}
+
+    def _open_source(self, source_path: Path) -> _SourceState:
+        name = _build_source_folder_name(source_path, [])
+        if self.folder_flags is not None:
+            folder_dir = self.raw_dir / _build_source_folder_name(
+                source_path, self.folder_flags[source_path]
+            )
+        else:
+            folder_dir = self.raw_dir / f".partial-{name}"
+        finished = self._finished.pop(source_path, None)
+        if finished is None:
+            folder_dir.mkdir(parents=True, exist_ok=True)
+            spool_path = self._spool_dir / f"{name}.jsonl"
+            return _SourceState(
+                path=source_path,
+                folder_dir=folder_dir,
+                report=ReportAccumulator(self.timing_exact_limit),
+                spool_path=spool_path,
+                spool=spool_path.open("w", encoding="utf-8"),
+            )
+        report = ReportAccumulator(self.timing_exact_limit)
+        with finished.spool_path.open(encoding="utf-8") as spool:
+            for line in spool:
+                report.add_entry(json.loads(line))
+        if finished.folder_dir != folder_dir:
+            finished.folder_dir.rename(folder_dir)
+        return _SourceState(
+            path=source_path,
+            folder_dir=folder_dir,
+            report=report,
+            spool_path=finished.spool_path,
+            spool=finished.spool_path.open("a", encoding="utf-8"),
+            earlier_rows=finished.rows,
+        )
+
+    def add(self, outcome: QueryOutcome) -> None:
+        source_path = outcome.task.source_path
+        if self._source is None or self._source.path != source_path:
+            self._finish_source()
+            self._source = self._open_source(source_path)
+        state = self._source
+        self.count += 1
+
+        filename = _build_query_filename(outcome)
+        json_path = state.folder_dir / filename
+        # A partial folder is renamed later, so only the file name is stable. In JSONL
+        # output the file name is the record's key.
+        if self.folder_flags is not None and self.query_output is None:
+            outcome.raw_json_path = json_path
+        else:
+            outcome.raw_json_path = Path(filename)
+        outcome.terminal_output = _render_query_outcome(self.count, self.total, outcome)
+        print(outcome.terminal_output)
+
+        sql_digest = _task_digest(outcome.task)
+        sql_fields: Dict[str, Any]
+        if self.sql_blobs is not None:
+            sql_blob = content_digest(outcome.task.query_text)
+            self.sql_blobs.put(sql_blob, sql_digest, outcome.task.query_text)
+            terminal_output = _render_query_outcome(self.count, self.total, outcome, sql_blob)
+            sql_fields = {"sql_blob": sql_blob}
+            content = {
+                "flags": outcome.flags,
+                "retries": outcome.retries,
+                "terminal_output": terminal_output,
+                "raw_payload": outcome.raw_payload,
+                "sql_digest": sql_digest,
+                **sql_fields,
+            }
+        else:
+            sql_fields = {"preview": _query_preview_lines(outcome.task)}
+            content = {
+                "flags": outcome.flags,
+                "retries": outcome.retries,
+                "terminal_output": outcome.terminal_output,
+                "raw_payload": outcome.raw_payload,
+                "source_query": outcome.task.query_text,
+                **sql_fields,
+            }
+        row_id = self.run_index.add(
+            identifier=outcome.task.identifier,
+            source=str(source_path),
+            sql_digest=sql_digest,
+            folder=state.folder_dir.name,
+            raw_output_file=filename,
+            flags=_build_flag_prefix(outcome.flags),
+            statement_type=outcome.statement_type,
+            timing_ms=outcome.timing_ms,
+            succeeded=outcome.succeeded,
+        )
+        if self.results_store is not None:
+            self.results_store.add(
+                outcome,
+                flags=_build_flag_prefix(outcome.flags),
+                sql_digest=sql_digest,
+                raw_output_file=filename,
+            )
+        if state.first_row_id is None:
+            state.first_row_id = row_id
+        state.last_row_id = row_id
+        if self.query_output is not None:
+            self.query_output.write(
+                {
+                    "identifier": outcome.task.identifier,
+                    "source": str(source_path),
+                    "raw_output_file": filename,
+                    **content,
+                },
+                key=row_id,
+            )
+        else:
+            json_path.write_text(json.dumps(content, indent=2), encoding="utf-8")
+
+        entry = json.dumps(
+            {
+                "identifier": outcome.task.identifier,
+                "flags": outcome.flags,
+                "raw_output_file": filename,
+                "succeeded": outcome.succeeded,
+                "timing_ms": outcome.timing_ms,
+                **sql_fields,
+                "statement_type": outcome.statement_type,
+                "statement_type_source": outcome.statement_type_source,
+                "parser_statement_type": outcome.parser_statement_type,
+                "from_cache": outcome.from_cache,
+                "cached_timing_ms": outcome.cached_timing_ms,
+                "duplicate_of": outcome.duplicate_of,
+                "sql_digest": sql_digest,
+                "retries": outcome.retries,
+                # What ReportAccumulator.add_entry() needs to rebuild the aggregates.
+                "parser_error": outcome.parser_error,
+                "rpc_error": outcome.rpc_error,
+                "timeout_error": outcome.timeout_error,
+                "skipped": outcome.skipped,
+                "debug_info_error": debug_error_label(outcome.raw_payload),
+            }
+        )
+        state.spool.write(entry + "\n")
+        self._run_spool.write(entry + "\n")
+        state.report.add(outcome)
+        if self.columns is not None:
+            self.columns.add(outcome, sql_digest)
+        else:
+            self.run_report.add(outcome)
+
+    def _finish_source(self) -> None:
+        state = self._source
+        if state is None:
+            return
+        self._source = None
+        state.spool.close()
+        rows = list(state.earlier_rows)
+        if state.first_row_id is not None and state.last_row_id is not None:
+            rows.append((state.first_row_id, state.last_row_id))
+        folder_dir = state.folder_dir
+        if self.folder_flags is None:
+            flags = _aggregate_flag_set(state.report.flag_set)
+            folder_dir = self.raw_dir / _build_source_folder_name(state.path, flags)
+            state.folder_dir.rename(folder_dir)
+            for first_row_id, last_row_id in rows:
+                self.run_index.rename_folder(first_row_id, last_row_id, folder_dir.name)
+        preview = None
+        if self.sql_blobs is not None:
+            preview = partial(self._entry_preview, self.sql_blobs, state.path)
+        _write_reports(
+            folder_dir,
+            state.path,
+            state.report,
+            state.spool_path,
+            state.report.overview(),
+            preview,
+        )
+        # The spool stays until the run is finished in case the source comes back.
+        self._finished[state.path] = _FinishedSource(folder_dir, state.spool_path, rows)
+
+    @staticmethod
+    def _entry_preview(
+        sql_blobs: SqlBlobStore, source_path: Path, entry: Dict[str, Any]
+    ) -> List[str]:
+        return sql_blobs.preview_lines(entry["sql_blob"], str(source_path))
+
+    def finish(self, extra_overview: Dict[str, Any]) -> Dict[str, Any]:
+        """Finish the last source, write the run-wide report and return its overview."""
+        self._finish_source()
+        self._run_spool.close()
+        run_report = self.run_report
+        if self.columns is not None:
+            columns_path = self.raw_dir / COLUMNS_NAME
+            run_report = report_from_columns(self.columns.save(columns_path))
+        run_overview = run_report.overview()
+        run_overview.update(extra_overview)
+        if self.columns is not None:
+            run_overview["columnar"] = {
+                "path": str(columns_path),
+                "rows": self.columns.count,
+                "bytes": columns_path.stat().st_size,
+            }
+        if self.query_output is not None:
+            self.query_output.close()
+            run_overview["query_output"] = self.query_output.stats()
+        if self.sql_blobs is not None:
+            self.sql_blobs.close()
+            run_overview["sql_store"] = self.sql_blobs.stats()
+        self.run_index.close()
+        if self.results_store is not None:
+            run_overview["results_db"] = self.results_store.finish_run()
+            self.results_store.close()
+        _write_reports(self.raw_dir, self.raw_dir, run_report, self._run_spool_path, run_overview)
+        shutil.rmtree(self._spool_dir)
+        return run_overview
+
+    def abort(self) -> None:
+        """Close the spools and remove them after a failed run.
+
+        Query files, folders and the run index stay as written; ``--resume`` rebuilds
+        the reports from the manifest.
+        """
+        if self._source is not None:
+            self._source.spool.close()
+            self._source = None
+        self._run_spool.close()
+        shutil.rmtree(self._spool_dir, ignore_errors=True)
+
+
+def _merge_shard_runs(runs: List[Tuple[ShardSpec, Path]], output_dir: Path) -> Dict[str, Any]:
+    """Combine the run-wide reports of ``--shard`` runs into one run-wide report.
+
+    Counts, totals and per-statement-type timing percentiles are rebuilt from every
+    shard's query entries rather than from the shards' summaries, and timings are
+    kept exactly however many there are. Entries keep their ``raw_output_file`` and
+    gain ``shard_dir``, the run directory that holds it.
+    """
+    output_dir.mkdir(parents=True, exist_ok=True)
+    spool_dir = output_dir / ".spool"
+    spool_dir.mkdir(exist_ok=True)
+    spool_path = spool_dir / "run.jsonl"
+    report = ReportAccumulator(timing_exact_limit=None)
+    shard_runs: List[Dict[str, Any]] = []
+    with spool_path.open("w", encoding="utf-8") as spool:
+        for shard, run_dir in runs:
+            query_count = 0
+            for entry in iter_report_queries(run_dir / RUN_REPORT_NAME):
+                query_count += 1
+                if "debug_info_error" not in entry:
+                    raise ValueError(
+                        f"{run_dir} was written by an older version whose reports cannot "
+                        "be merged; run that shard again."
+                    )
+                report.add_entry(entry)
+                spool.write(json.dumps({**entry, "shard_dir": str(run_dir)}) + "\n")
+            shard_runs.append(
+                {"shard": str(shard), "run_dir": str(run_dir), "query_count": query_count}
+            )
+    overview = report.overview()
+    overview["shards"] = {"count": runs[0][0].count, "runs": shard_runs}
+    _write_reports(output_dir, output_dir, report, spool_path, overview)
+    shutil.rmtree(spool_dir)
+    return overview
+
+
+def _merge_main(argv: Sequence[str]) -> None:
+    parser = argparse.ArgumentParser(
+        prog="parse_sql_minimal.py merge",
+        description=(
+            "Combine the run directories of a --shard run into one run-wide "
+            "[[]]report.json/[[]]report.md."
+        ),
+    )
+    parser.add_argument(
+        "run_dirs",
+        nargs="+",
+        metavar="SHARD_RUN_DIR",
+        help="Run directory of each shard, 1/N through N/N, in any order.",
+    )
+    parser.add_argument(
+        "--output-dir",
+        help="Where to write the merged reports (default: lineage_outputs/<timestamp>-merged).",
+    )
+    args = parser.parse_args(argv)
+
+    try:
+        runs = check_shard_runs([Path(run_dir) for run_dir in args.run_dirs])
+    except (OSError, ValueError) as exc:
+        parser.error(str(exc))
+    timestamp = time.strftime("%Y%m%d_%H%M%S")
+    output_dir = Path(args.output_dir or (Path("lineage_outputs") / f"{timestamp}-merged"))
+    if any(output_dir.resolve() == run_dir.resolve() for _, run_dir in runs):
+        parser.error("--output-dir must not be one of the shard run directories.")
+
+    try:
+        overview = _merge_shard_runs(runs, output_dir)
+    except (OSError, ValueError) as exc:
+        print(f"Failed to merge shard runs: {exc}", file=sys.stderr)
+        sys.exit(1)
+    print_overview(overview, output_dir)
+
+
+def _lookup_main(argv: Sequence[str]) -> None:
+    parser = argparse.ArgumentParser(
+        prog="parse_sql_minimal.py lookup",
+        description=(
+            f"Find queries of a run through its {RUN_INDEX_NAME} and print their "
+            "results, without walking the run directory."
+        ),
+    )
+    parser.add_argument("run_dir", help="Run directory to search.")
+    parser.add_argument(
+        "identifier", nargs="?", help="Query identifier, e.g. reports.csv:row1234:stmt2."
+    )
+    parser.add_argument("--sql-digest", help="Match the normalized-SQL digest (sql_digest).")
+    parser.add_argument(
+        "--json",
+        action="store_true",
+        help="Print each match's index row and query JSON as one JSON object per line.",
+    )
+    args = parser.parse_args(argv)
+
+    run_dir = Path(args.run_dir)
+    try:
+        rows = lookup_queries(
+            run_dir,
+            identifier=args.identifier,
+            sql_digest=args.sql_digest,
+        )
+    except (OSError, ValueError, sqlite3.Error) as exc:
+        parser.error(str(exc))
+    if not rows:
+        print("No matching query in this run.", file=sys.stderr)
+        sys.exit(1)
+    for row in rows:
+        try:
+            output = read_query_output(run_dir, row)
+        except (OSError, ValueError) as exc:
+            print(f"Failed to read the output of {row['identifier']}: {exc}", file=sys.stderr)
+            sys.exit(1)
+        if args.json:
+            print(json.dumps({"index": row, "output": output}))
+            continue
+        if row["shard_file"] is not None:
+            location = (
+                f"{OUTPUT_DIR_NAME}/{row['shard_file']} "
+                f"bytes {row['byte_offset']}+{row['byte_length']}"
+            )
+        else:
+            location = f"{row['folder']}/{row['raw_output_file']}"
+        print(output["terminal_output"])
+        print(f"Stored in: {location}")
+
+
 def main() -> None:
+    if sys.argv[1:2] == ["merge"]:
+        _merge_main(sys.argv[2:])
+        return
+    if sys.argv[1:2] == ["lookup"]:
+        _lookup_main(sys.argv[2:])
+        return
+
     parser = argparse.ArgumentParser(
         prog="parse_sql_minimal.py",
         description=(
             "Bulk-parse SQL via DataHub's lineage parser from files, directories, or CSV columns, "
             "and print human-readable lineage plus a run summary."
         ),
+        epilog=(
+            "Combine the outputs of --shard runs with: parse_sql_minimal.py merge --help. "
+            "Find one query's result with: parse_sql_minimal.py lookup --help"
+        ),
     )
     parser.add_argument(
         "--sql-file",
@@ -501,6 +1775,45 @@ def main() -> None:
         default=",",
         help="Delimiter to use when reading CSV files (default: ',').",
     )
+    parser.add_argument(
+        "--csv-filter",
+        metavar="COLUMN=VALUE[,VALUE...]",
+        help=(
+            "Only take SQL from CSV rows whose COLUMN holds one of the listed values "
+            "(trimmed, case-insensitive), e.g. StatementType=Insert,Merge Into. Applies to "
+            "--csv-spec and --csv-dir."
+        ),
+    )
+    parser.add_argument(
+        "--dbql",
+        action="append",
+        default=[],
+        metavar="PATH",
+        help=(
+            "CSV export of DBC.DBQLSqlTbl (QueryID, SqlRowNo, SqlTextInfo; UserName and "
+            "StartTime when joined in). Rows of one QueryID are reassembled in SqlRowNo "
+            "order into a single query. Uses --csv-delimiter. Repeat to add more."
+        ),
+    )
+    parser.add_argument(
+        "--dbql-window",
+        type=int,
+        default=10000,
+        help=(
+            "Queries kept open while reassembling a DBQL export; the oldest is flushed "
+            "when a new QueryID arrives with the window full, and held back for as many "
+            "flushes again in case more of its fragments arrive (default: %(default)s)."
+        ),
+    )
+    parser.add_argument(
+        "--load-workers",
+        type=int,
+        default=8,
+        help=(
+            "Threads that list input directories and read/split input files ahead of the "
+            "parse stage; statement order does not depend on it (default: %(default)s)."
+        ),
+    )
     parser.add_argument(
         "--server",
         default=os.getenv("DATAHUB_SERVER", "http://localhost:8080"),
@@ -577,23 +1890,425 @@ def main() -> None:
             "(default: %(default)s or DATAHUB_DATAJOB_TYPE)."
         ),
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help=(
+            "Number of parse requests to keep in flight concurrently (default: 1, or one "
+            "process per CPU core with --backend local). Results are still reported in "
+            "input order."
+        ),
+    )
+    parser.add_argument(
+        "--backend",
+        choices=("sync", "local"),
+        default="sync",
+        help=(
+            "How statements are parsed: 'sync' calls DataHubGraph directly "
+            "(optionally from --workers threads); 'local' runs the acryl-datahub "
+            "sqlglot parser in a process pool without contacting GMS "
+            "(default: %(default)s)."
+        ),
+    )
+    cache_mode = parser.add_mutually_exclusive_group()
+    cache_mode.add_argument(
+        "--cache",
+        action="store_true",
+        help=(
+            "Serve statements parsed by earlier runs from a parser result cache and store "
+            "new results in it (see --cache-path). Off by default, so a run writes no "
+            "cache file unless asked to."
+        ),
+    )
+    cache_mode.add_argument(
+        "--refresh-cache",
+        action="store_true",
+        help="Like --cache, but re-parse every statement and overwrite its cached payload.",
+    )
+    parser.add_argument(
+        "--cache-path",
+        default=os.getenv(
+            "SQL_PARSER_CACHE", str(Path("lineage_outputs") / ".parse_cache.sqlite3")
+        ),
+        help=(
+            "SQLite file holding cached parser payloads keyed by normalized SQL and parse "
+            "options (default: %(default)s or SQL_PARSER_CACHE)."
+        ),
+    )
+    parser.add_argument(
+        "--cache-max-mb",
+        type=float,
+        default=512.0,
+        help="Size budget for cached payloads before LRU eviction (default: %(default)s MB).",
+    )
+    parser.add_argument(
+        "--index-dir",
+        help=(
+            "Keep a statement index per input file here (byte offsets, row/statement "
+            "numbers, content digest). Unchanged inputs are enumerated from their index "
+            "instead of being re-split, and statement text is read only when needed."
+        ),
+    )
+    parser.add_argument(
+        "--dedupe",
+        action="store_true",
+        help=(
+            "Parse only one statement per fingerprint (comments, whitespace and literals "
+            "stripped) and reuse its lineage for every statement that matches it."
+        ),
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=1,
+        help=(
+            "With --backend local, send up to this many statements to a parser process in "
+            "one round trip (default: %(default)s). The GMS backend has no multi-statement "
+            "endpoint and always sends statements one by one."
+        ),
+    )
+    parser.add_argument(
+        "--batch-max-kb",
+        type=int,
+        default=256,
+        help="Upper bound on SQL bytes per batch (default: %(default)s KiB).",
+    )
+    parser.add_argument(
+        "--triage",
+        action="store_true",
+        help=(
+            "Skip statements that never carry lineage (see --triage-types) before any "
+            "parse request is sent; they are reported with the SKIP flag."
+        ),
+    )
+    parser.add_argument(
+        "--triage-types",
+        default=",".join(TRIAGE_STATEMENT_TYPES),
+        help="Comma-separated statement types skipped by --triage (default: %(default)s).",
+    )
+    parser.add_argument(
+        "--heavy-deadline",
+        type=float,
+        default=None,
+        metavar="SECONDS",
+        help=(
+            "Route statements scoring at least --heavy-threshold to a separate lane and "
+            "give up on any of them still unanswered after SECONDS (reported as TIMEOUT)."
+        ),
+    )
+    parser.add_argument(
+        "--heavy-threshold",
+        type=float,
+        default=20.0,
+        help=(
+            "Complexity score (KB of SQL + 2x nesting depth + joins + 2x CTEs + "
+            "subqueries) at which a statement counts as heavy (default: %(default)s)."
+        ),
+    )
+    parser.add_argument(
+        "--heavy-workers",
+        type=int,
+        default=2,
+        help="Concurrent parse calls in the heavy lane (default: %(default)s).",
+    )
+    parser.add_argument(
+        "--rate-limit",
+        type=float,
+        default=None,
+        metavar="QPS",
+        help=(
+            "Start the remote backends at QPS parse calls per second and adapt the rate "
+            "(additive increase, multiplicative decrease on 429/5xx or slow responses)."
+        ),
+    )
+    parser.add_argument(
+        "--rate-limit-max",
+        type=float,
+        default=None,
+        metavar="QPS",
+        help="Ceiling for the adaptive rate (default: 4x --rate-limit).",
+    )
+    parser.add_argument(
+        "--latency-target-ms",
+        type=float,
+        default=2000.0,
+        help="Responses slower than this lower the adaptive rate (default: %(default)s).",
+    )
+    parser.add_argument(
+        "--max-retries",
+        type=int,
+        default=3,
+        help=(
+            "Times a statement that failed transiently (429/5xx, dropped connection) is "
+            "re-sent with exponential backoff; 0 disables retries (default: %(default)s)."
+        ),
+    )
+    parser.add_argument(
+        "--retry-backoff",
+        type=float,
+        default=1.0,
+        help="Initial retry backoff in seconds, doubled every round (default: %(default)s).",
+    )
+    parser.add_argument(
+        "--breaker-threshold",
+        type=int,
+        default=5,
+        help=(
+            "Consecutive transient failures that open the circuit breaker and pause "
+            "dispatch; 0 disables it (default: %(default)s)."
+        ),
+    )
+    parser.add_argument(
+        "--breaker-cooldown",
+        type=float,
+        default=10.0,
+        help="Seconds the breaker stays open before a probe call (default: %(default)s).",
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help=(
+            "Load, parse, print and write statements one at a time and keep only running "
+            "aggregates for the reports, so memory stays flat however large the input is."
+        ),
+    )
+    parser.add_argument(
+        "--schedule",
+        choices=("input", "longest-first"),
+        default="input",
+        help=(
+            "Order in which statements are dispatched. longest-first starts the statements "
+            "expected to parse slowest first; outputs keep input order (default: %(default)s)."
+        ),
+    )
+    parser.add_argument(
+        "--cost-history",
+        default=None,
+        help=(
+            "Directory of earlier run folders whose [[]]report.json timings feed the "
+            "longest-first cost model (default: the parent of the raw output directory)."
+        ),
+    )
+    rerun_mode = parser.add_mutually_exclusive_group()
+    rerun_mode.add_argument(
+        "--resume",
+        metavar="RUN_DIR",
+        help=(
+            "Continue an interrupted run in RUN_DIR: queries its manifest records as "
+            "completed are not parsed again, and every output and report is regenerated."
+        ),
+    )
+    rerun_mode.add_argument(
+        "--incremental",
+        metavar="PREVIOUS_RUN_DIR",
+        help=(
+            "Reuse the results of PREVIOUS_RUN_DIR for statements whose identifier and SQL "
+            "digest are unchanged, and parse only new or edited statements."
+        ),
+    )
+    parser.add_argument(
+        "--shard",
+        metavar="I/N",
+        help=(
+            "Only parse shard I of N (1-based), chosen by a stable hash of each statement's "
+            "identifier. Give every shard the same inputs by the same paths, and combine "
+            "the run directories with the merge subcommand."
+        ),
+    )
+    parser.add_argument(
+        "--sample",
+        type=int,
+        metavar="SIZE",
+        help=(
+            "Parse a stratified random sample of about SIZE statements instead of all of "
+            "them. Strata are source folder x inferred statement type, sampled in "
+            "proportion to their size (at least 2 each). The report estimates full-run "
+            "success and flag rates with 95%% confidence intervals, plus projected run time."
+        ),
+    )
+    parser.add_argument(
+        "--sample-seed",
+        type=int,
+        default=0,
+        help="Seed that picks the sampled statements (default: %(default)s).",
+    )
+    parser.add_argument(
+        "--output-format",
+        choices=("files", "jsonl"),
+        default="files",
+        help=(
+            "How each query's raw output is stored: one JSON file per query in its source "
+            "folder, or compact JSON lines in size-rotated shards under "
+            f"{OUTPUT_DIR_NAME}/, written by a background thread (default: %(default)s)."
+        ),
+    )
+    parser.add_argument(
+        "--jsonl-shard-mb",
+        type=int,
+        default=256,
+        help="Size at which --output-format jsonl starts a new shard (default: %(default)s).",
+    )
+    parser.add_argument(
+        "--sql-store",
+        action="store_true",
+        help=(
+            f"Store every distinct SQL text once in {BLOB_STORE_NAME} and keep only its "
+            "sql_blob, the digest of its exact text, in query JSON and report entries, "
+            "instead of repeating the SQL and its preview in each. Each source's report.md "
+            "then ends with the preview of every statement."
+        ),
+    )
+    parser.add_argument(
+        "--results-db",
+        metavar="PATH",
+        help=(
+            "Also record every outcome, with its flags, datasets and column edges, in this "
+            "SQLite database. Many runs can share one database for cross-run queries."
+        ),
+    )
+    parser.add_argument(
+        "--columnar",
+        action="store_true",
+        help=(
+            f"Save every outcome to {COLUMNS_NAME} (NumPy arrays) at the end of the run and "
+            "compute the run-wide report from it with vectorized group-bys, with exact "
+            "timing percentiles. Needs the numpy package."
+        ),
+    )
     args = parser.parse_args()
 
-    if not (args.sql_file or args.sql_dir or args.csv_spec or args.csv_dir):
-        parser.error("Provide at least one --sql-file/--sql-dir/--csv-spec/--csv-dir input.")
+    if not (args.sql_file or args.sql_dir or args.csv_spec or args.csv_dir or args.dbql):
+        parser.error(
+            "Provide at least one --sql-file/--sql-dir/--csv-spec/--csv-dir/--dbql input."
+        )
+
+    if args.dbql_window < 1:
+        parser.error("--dbql-window must be at least 1.")
+
+    if args.load_workers < 1:
+        parser.error("--load-workers must be at least 1.")
+
+    csv_row_filter: Optional[CsvRowFilter] = None
+    if args.csv_filter:
+        try:
+            csv_row_filter = CsvRowFilter.parse(args.csv_filter)
+        except ValueError as exc:
+            parser.error(f"--csv-filter: {exc}")
 
     if args.csv_dir and not args.csv_dir_column:
         parser.error("--csv-dir-column is required when using --csv-dir.")
 
-    try:
-        tasks = _collect_tasks(
+    if args.workers is not None and args.workers < 1:
+        parser.error("--workers must be at least 1.")
+
+    if args.batch_size < 1 or args.batch_max_kb < 1:
+        parser.error("--batch-size and --batch-max-kb must be at least 1.")
+
+    if args.batch_size > 1 and args.backend != "local":
+        parser.error("--batch-size only applies to --backend local.")
+
+    if args.heavy_deadline is not None and args.heavy_deadline <= 0:
+        parser.error("--heavy-deadline must be positive.")
+
+    if args.heavy_workers < 1:
+        parser.error("--heavy-workers must be at least 1.")
+
+    if args.stream and args.schedule != "input":
+        parser.error("--schedule longest-first needs every statement up front; drop --stream.")
+
+    if args.rate_limit is not None and args.rate_limit <= 0:
+        parser.error("--rate-limit must be positive.")
+
+    if args.max_retries < 0 or args.breaker_threshold < 0:
+        parser.error("--max-retries and --breaker-threshold cannot be negative.")
+
+    triage: Optional[StatementTriage] = None
+    if args.triage:
+        try:
+            triage = StatementTriage(args.triage_types.split(","))
+        except ValueError as exc:
+            parser.error(str(exc))
+
+    if args.sample is not None and args.sample < 1:
+        parser.error("--sample must be at least 1.")
+
+    if args.columnar and not numpy_available():
+        parser.error("--columnar needs NumPy: install the 'numpy' package.")
+
+    if args.jsonl_shard_mb < 1:
+        parser.error("--jsonl-shard-mb must be at least 1.")
+
+    shard: Optional[ShardSpec] = None
+    if args.shard:
+        try:
+            shard = ShardSpec.parse(args.shard)
+        except ValueError as exc:
+            parser.error(f"--shard: {exc}")
+
+    if args.resume:
+        resume_dir = Path(args.resume).resolve()
+        if args.raw_output_dir and Path(args.raw_output_dir).resolve() != resume_dir:
+            parser.error("--resume writes to RUN_DIR; drop --raw-output-dir or point it there.")
+        if not (Path(args.resume) / MANIFEST_NAME).is_file():
+            parser.error(f"--resume: no {MANIFEST_NAME} in {args.resume}.")
+    if args.incremental and not (Path(args.incremental) / MANIFEST_NAME).is_file():
+        parser.error(f"--incremental: no {MANIFEST_NAME} in {args.incremental}.")
+
+    statement_index = StatementIndex(Path(args.index_dir)) if args.index_dir else None
+    load_stats = LoadStats(workers=args.load_workers)
+    sampler: Optional[StratifiedSampler[str]] = (
+        StratifiedSampler(args.sample, args.sample_seed) if args.sample else None
+    )
+    sample_strata: Dict[str, Tuple[str, str]] = {}
+    tasks: Iterable[QueryTask]
+
+    def _load(stats: Optional[LoadStats]) -> Iterator[QueryTask]:
+        task_stream = _iter_tasks(
             args.sql_file,
             args.sql_dir,
             args.csv_spec,
             args.csv_delimiter,
             args.csv_dir,
             args.csv_dir_column,
+            statement_index,
+            args.dbql,
+            args.dbql_window,
+            args.load_workers,
+            stats,
+            csv_row_filter,
         )
+        if shard is not None:
+            task_stream = (task for task in task_stream if shard.owns(task.identifier))
+        return task_stream
+
+    def _reload_sampled() -> Iterator[QueryTask]:
+        reloaded = 0
+        for task in _load(None):
+            if task.identifier in sample_strata:
+                reloaded += 1
+                yield task
+        if reloaded < len(sample_strata):
+            print(
+                f"Warning: {len(sample_strata) - reloaded} sampled statements were not found "
+                "when the inputs were read again; the inputs changed during the run.",
+                file=sys.stderr,
+            )
+
+    try:
+        task_stream = _load(load_stats)
+        if sampler is not None:
+            # Sampling keeps only identifiers; the sampled statements are then read
+            # again, so no statement text is held per stratum while the input is scanned.
+            for task in task_stream:
+                sampler.add(task.identifier, task.identifier, _sample_stratum(task))
+            sample_strata = dict(sampler.sample())
+            task_stream = _reload_sampled()
+        if args.stream:
+            first_task = next(task_stream, None)
+            tasks = chain([first_task], task_stream) if first_task is not None else []
+        else:
+            tasks = list(task_stream)
     except Exception as exc:  # pragma: no cover - defensive
         print(f"Failed to load SQL inputs: {exc}", file=sys.stderr)
         sys.exit(1)
@@ -603,12 +2318,60 @@ def main() -> None:
         sys.exit(1)
 
     timestamp = time.strftime("%Y%m%d_%H%M%S")
-    raw_dir = Path(args.raw_output_dir or (Path("lineage_outputs") / timestamp))
+    raw_dir = Path(args.resume or args.raw_output_dir or (Path("lineage_outputs") / timestamp))
     raw_dir.mkdir(parents=True, exist_ok=True)
 
-    graph = DataHubGraph(DatahubClientConfig(server=args.server, token=args.token))
+    # Anything that changes a statement's outcome; results are only reused between
+    # runs that agree on all of it.
+    run_settings = {
+        "platform": args.platform,
+        "env": args.env,
+        "default_db": args.default_db,
+        "default_schema": args.default_schema,
+        "override_dialect": args.override_dialect,
+        "parser": "local" if args.backend == "local" else f"gms:{args.server}",
+        "triage": list(triage.statement_types) if triage else None,
+        "dedupe": args.dedupe,
+    }
+    replay: Optional[ManifestReplay] = None
+    if args.resume or args.incremental:
+        try:
+            replay = ManifestReplay(Path(args.resume or args.incremental), run_settings)
+        except (OSError, ValueError) as exc:
+            parser.error(str(exc))
+        if args.resume and replay.shard != (str(shard) if shard else None):
+            parser.error(
+                f"--resume: {args.resume} was run with --shard {replay.shard or '(none)'}."
+            )
+    if args.resume:
+        assert replay is not None
+        _clear_run_outputs(raw_dir, replay.sources)
+    manifest = RunManifest(
+        raw_dir / MANIFEST_NAME,
+        run_settings,
+        completed=replay.completed if replay is not None and args.resume else None,
+        shard=str(shard) if shard else None,
+    )
+    results_store: Optional[ResultsStore] = None
+    if args.results_db:
+        try:
+            results_store = ResultsStore(Path(args.results_db))
+            results_store.begin_run(raw_dir, run_settings, str(shard) if shard else None)
+        except (OSError, sqlite3.Error) as exc:
+            parser.error(f"--results-db: {exc}")
+
+    graph: Optional[DataHubGraph] = None
+    if args.backend != "local" or args.emit_lineage:
+        graph = DataHubGraph(DatahubClientConfig(server=args.server, token=args.token))
+    options = ParseOptions(
+        platform=args.platform,
+        env=args.env,
+        default_db=args.default_db,
+        default_schema=args.default_schema,
+        override_dialect=args.override_dialect,
+    )
     emitter: Optional[LineageEmitter] = None
-    if args.emit_lineage:
+    if graph is not None and args.emit_lineage:
         dataflow_cluster = args.dataflow_cluster or args.env
         emitter = LineageEmitter(
             graph,
@@ -619,223 +2382,252 @@ def main() -> None:
             flow_id_prefix=args.dataflow_prefix,
         )
 
-    outcomes: List[QueryOutcome] = []
-
-    for task in tasks:
-        start_ns = time.perf_counter_ns()
-        try:
-            result = graph.parse_sql_lineage(
-                task.query_text,
-                platform=args.platform,
-                env=args.env,
-                default_db=args.default_db,
-                default_schema=args.default_schema,
-                override_dialect=args.override_dialect,
-            )
-            elapsed_ms = (time.perf_counter_ns() - start_ns) / 1_000_000
-            payload = json.loads(result.json())
-            debug_error = getattr(getattr(result, "debug_info", None), "error", None)
-            payload["debugInfoError"] = str(debug_error) if debug_error else None
-            upstreams = list(getattr(result, "in_tables", None) or [])
-            downstreams = list(getattr(result, "out_tables", None) or [])
-            column_edges = _column_lineage_edges(getattr(result, "column_lineage", None))
-            parser_statement_type = _extract_parser_statement_type(result, payload)
-            statement_type, statement_type_source = _resolve_statement_type(
-                parser_statement_type, task.query_text
-            )
-            self_ref = bool(
-                downstreams
-                and upstreams
-                and any(ds == us for ds in downstreams for us in upstreams)
-            )
-            outcome = QueryOutcome(
-                task=task,
-                upstreams=upstreams,
-                downstreams=downstreams,
-                column_edges=column_edges,
-                timing_ms=elapsed_ms,
-                parser_error=str(debug_error) if debug_error else None,
-                rpc_error=None,
-                self_referential=self_ref,
-                raw_payload=payload,
-                statement_type=statement_type,
-                statement_type_source=statement_type_source,
-                parser_statement_type=parser_statement_type,
-            )
-            outcomes.append(outcome)
-            if emitter:
-                emitter.collect(
-                    LineageTaskContext(
-                        identifier=task.identifier,
-                        context_label=task.context,
-                        source_path=task.source_path,
-                        query_text=task.query_text,
-                    ),
-                    result,
-                )
-        except Exception as exc:  # pragma: no cover - network failure
-            elapsed_ms = (time.perf_counter_ns() - start_ns) / 1_000_000
-            payload = {"error": str(exc), "query": task.query_text}
-            parser_statement_type = None
-            statement_type, statement_type_source = _resolve_statement_type(
-                parser_statement_type, task.query_text
-            )
-            outcome = QueryOutcome(
-                task=task,
-                upstreams=[],
-                downstreams=[],
-                column_edges=[],
-                timing_ms=elapsed_ms,
-                parser_error=None,
-                rpc_error=str(exc),
-                self_referential=False,
-                raw_payload=payload,
-                statement_type=statement_type,
-                statement_type_source=statement_type_source,
-                parser_statement_type=parser_statement_type,
+    batching = BatchPolicy(max_statements=args.batch_size, max_bytes=args.batch_max_kb * 1024)
+    parse_backend: Any
+    guard: Optional[DispatchGuard] = None
+    if args.backend == "local":
+        parse_backend = LocalParseBackend(options, processes=args.workers, batching=batching)
+    else:
+        assert graph is not None
+        guard = DispatchGuard(
+            limiter=AimdRateLimiter(
+                args.rate_limit,
+                max_rate=args.rate_limit_max,
+                latency_target_ms=args.latency_target_ms,
             )
-            outcomes.append(outcome)
-
-    for outcome in outcomes:
-        if not outcome.flags:
-            outcome.flags = _compute_query_flags(outcome)
+            if args.rate_limit
+            else None,
+            breaker=CircuitBreaker(args.breaker_threshold, args.breaker_cooldown)
+            if args.breaker_threshold
+            else None,
+        )
+        parse_backend = GraphParseBackend(
+            graph, options, workers=args.workers or 1, guard=guard
+        )
+    backend: ParseBackend = parse_backend
+
+    heavy_lane: Optional[DeadlineLane] = None
+    router: Optional[RoutedParseBackend] = None
+    in_flight: Optional[_InFlightTasks] = None
+    if args.heavy_deadline is not None:
+        heavy_tasks = in_flight = _InFlightTasks()
+        heavy_lane = DeadlineLane(
+            parse_backend.parse_one, args.heavy_workers, args.heavy_deadline
+        )
+        router = RoutedParseBackend(
+            parse_backend,
+            heavy_lane,
+            is_heavy=lambda sql: heavy_tasks.complexity(sql).score >= args.heavy_threshold,
+        )
+        backend = router
+
+    retrying: Optional[RetryingParseBackend] = None
+    if args.backend != "local" and args.max_retries > 0:
+        # Transient failures are sent again between new statements once their
+        # backoff has passed.
+        retrying = RetryingParseBackend(
+            backend, max_retries=args.max_retries, backoff_s=args.retry_backoff
+        )
+        backend = retrying
 
-    grouped: Dict[Path, List[QueryOutcome]] = defaultdict(list)
-    for outcome in outcomes:
-        grouped[outcome.task.source_path].append(outcome)
+    cache: Optional[ParseResultCache] = None
+    if args.cache or args.refresh_cache:
+        cache = ParseResultCache(
+            Path(args.cache_path), max_bytes=int(args.cache_max_mb * 1024 * 1024)
+        )
+        # Remote results depend on the schemas registered in that GMS, so they are
+        # never mixed with local-parser results or another server's.
+        namespace = "local" if args.backend == "local" else f"gms:{args.server}"
+        backend = CachingParseBackend(
+            backend, cache, options, namespace=namespace, refresh=args.refresh_cache
+        )
 
-    source_metadata: Dict[Path, Dict[str, Any]] = {}
-    for source_path, group in grouped.items():
-        folder_flags = _aggregate_folder_flags(group)
-        folder_name = _build_source_folder_name(source_path, folder_flags)
-        folder_dir = raw_dir / folder_name
-        folder_dir.mkdir(parents=True, exist_ok=True)
+    def _parse(
+        selected: Iterable[QueryTask],
+    ) -> Iterator[Tuple[QueryTask, ParseAttempt, Optional[str]]]:
+        if args.dedupe:
+            return _parse_deduplicated(selected, backend, in_flight=in_flight)
+        return _parse_tasks(selected, backend, in_flight)
+
+    cost_model: Optional[CostModel] = None
+    dispatch_order = tasks
+    if args.schedule == "longest-first":
+        assert isinstance(tasks, list)
+        history_root = Path(args.cost_history) if args.cost_history else raw_dir.parent
+        cost_model = CostModel.from_reports(history_root, exclude=raw_dir)
+        predicted_ms = cost_model.predict_many(
+            [
+                (task.identifier, task.query_text, _complexity_score(task))
+                for task in tasks
+            ]
+        )
+        if args.dedupe:
+            # Members of a fingerprint group share the cost of its first statement, so
+            # the stable sort still dispatches (and reuses) the same representative.
+            group_cost: Dict[str, float] = {}
+            predicted_ms = [
+                group_cost.setdefault(_statement_fingerprint(task.query_text), cost)
+                for task, cost in zip(tasks, predicted_ms)
+            ]
+        dispatch_order = longest_first(tasks, predicted_ms)
+
+    def _collect_lineage(task: QueryTask, result: Any) -> None:
+        assert emitter is not None
+        emitter.collect(
+            LineageTaskContext(
+                identifier=task.identifier,
+                context_label=task.context,
+                source_path=task.source_path,
+                query_text=task.query_text,
+            ),
+            result,
+        )
 
-        for outcome in group:
-            if not outcome.flags:
-                outcome.flags = _compute_query_flags(outcome)
-            filename = _build_query_filename(outcome)
-            outcome.raw_json_path = folder_dir / filename
+    parse_new: Callable[
+        [Iterable[QueryTask]], Iterator[Tuple[QueryTask, ParseAttempt, Optional[str]]]
+    ] = _parse
+    if triage:
+        parse_new = partial(_parse_with_triage, triage=triage, parse=_parse)
+    parsed_tasks = (
+        _parse_with_replay(dispatch_order, replay, parse_new)
+        if replay is not None
+        else parse_new(dispatch_order)
+    )
+    produced = (
+        (_build_outcome(task, attempt), attempt, representative)
+        for task, attempt, representative in parsed_tasks
+    )
+    sample_report = SampleReport(sampler, sample_strata) if sampler is not None else None
 
-        source_metadata[source_path] = {
-            "folder_dir": folder_dir,
-            "folder_flags": folder_flags,
-            "outcomes": group,
-        }
+    def _record(outcome: QueryOutcome, attempt: ParseAttempt) -> None:
+        _record_completed(manifest, outcome, attempt)
+        if sample_report is not None:
+            sample_report.add(
+                outcome.task.identifier, outcome.succeeded, outcome.flags, outcome.timing_ms
+            )
 
-    total_outcomes = len(outcomes)
-    for idx, outcome in enumerate(outcomes, start=1):
-        outcome.terminal_output = _render_query_outcome(idx, total_outcomes, outcome)
-        print(outcome.terminal_output)
+    query_output: Optional[JsonlShardWriter] = None
+    if args.output_format == "jsonl":
+        query_output = JsonlShardWriter(
+            raw_dir / OUTPUT_DIR_NAME, shard_bytes=args.jsonl_shard_mb * 1024 * 1024
+        )
 
-    for outcome in outcomes:
-        if not outcome.raw_json_path:
-            continue
-        content = {
-            "flags": outcome.flags,
-            "terminal_output": outcome.terminal_output,
-            "raw_payload": outcome.raw_payload,
-            "source_query": outcome.task.query_text,
-            "preview": _query_preview_lines(outcome.task),
+    sql_blobs = SqlBlobStore(raw_dir / BLOB_STORE_NAME) if args.sql_store else None
+
+    parse_started = time.perf_counter()
+    writer: OutcomeWriter
+    if args.stream:
+        writer = OutcomeWriter(
+            raw_dir,
+            query_output=query_output,
+            sql_blobs=sql_blobs,
+            results_store=results_store,
+            columns=OutcomeColumns() if args.columnar else None,
+            timing_exact_limit=TIMING_EXACT_LIMIT,
+        )
+        try:
+            for outcome, attempt, representative in produced:
+                outcome.duplicate_of = representative
+                outcome.retries = attempt.retries
+                outcome.flags = _compute_query_flags(outcome)
+                _record(outcome, attempt)
+                if emitter and attempt.result is not None:
+                    _collect_lineage(outcome.task, attempt.result)
+                writer.add(outcome)
+        except BaseException:
+            writer.abort()
+            raise
+    else:
+        assert isinstance(tasks, list)
+        # Outcomes arrive in dispatch order; folders, reports and emitted lineage follow
+        # input order regardless of scheduling. Lineage is collected as it arrives
+        # unless the schedule reordered dispatch, so results are only held when needed.
+        reordered = dispatch_order is not tasks
+        parsed: List[Tuple[QueryOutcome, Any]] = []
+        for outcome, attempt, representative in produced:
+            outcome.duplicate_of = representative
+            outcome.retries = attempt.retries
+            outcome.flags = _compute_query_flags(outcome)
+            _record(outcome, attempt)
+            result = attempt.result if emitter else None
+            if result is not None and not reordered:
+                _collect_lineage(outcome.task, result)
+                result = None
+            parsed.append((outcome, result))
+        if reordered:
+            input_position = {id(task): index for index, task in enumerate(tasks)}
+            parsed.sort(key=lambda item: input_position[id(item[0].task)])
+            for outcome, result in parsed:
+                if result is not None:
+                    _collect_lineage(outcome.task, result)
+        grouped: Dict[Path, List[QueryOutcome]] = defaultdict(list)
+        for outcome, _ in parsed:
+            grouped[outcome.task.source_path].append(outcome)
+        del parsed
+        writer = OutcomeWriter(
+            raw_dir,
+            total=len(tasks),
+            folder_flags={
+                source_path: _aggregate_folder_flags(group)
+                for source_path, group in grouped.items()
+            },
+            query_output=query_output,
+            sql_blobs=sql_blobs,
+            results_store=results_store,
+            columns=OutcomeColumns() if args.columnar else None,
+        )
+        try:
+            for group in grouped.values():
+                for outcome in group:
+                    writer.add(outcome)
+        except BaseException:
+            writer.abort()
+            raise
+        del grouped
+    manifest.close()
+    if replay is not None:
+        replay.close()
+    if cache is not None:
+        cache.close()
+    if heavy_lane is not None:
+        heavy_lane.close()
+
+    run_extras: Dict[str, Any] = {"loading": load_stats.as_dict()}
+    if cache is not None:
+        run_extras["cache"] = cache.stats()
+    if batching.max_statements > 1:
+        run_extras["batching"] = parse_backend.batch_stats.as_dict(batching)
+    if router is not None and heavy_lane is not None:
+        run_extras["routing"] = {
+            "threshold": args.heavy_threshold,
+            "deadline_s": args.heavy_deadline,
+            "heavy_statements": router.heavy_count,
+            "timeouts": heavy_lane.timeouts,
+            "rejected": heavy_lane.rejected,
         }
-        outcome.raw_json_path.write_text(json.dumps(content, indent=2), encoding="utf-8")
-
-    for group_info in source_metadata.values():
-        folder_dir = group_info["folder_dir"]
-        folder_flags = group_info["folder_flags"]
-        group_outcomes: List[QueryOutcome] = group_info["outcomes"]
-        report_path = folder_dir / "[[]]report.json"
-        report_md_path = folder_dir / "[[]]report.md"
-
-        overview = compute_overview(group_outcomes)
-        debug_error_summary = build_debug_error_summary(group_outcomes)
-
-        statement_summary, flag_keys, error_class_keys = compute_statement_type_metrics(
-            group_outcomes, FLAG_PRIORITY
-        )
-
-        report_data = {
-            "source": str(group_outcomes[0].task.source_path) if group_outcomes else "",
-            "flags": folder_flags,
-            **overview,
-            "debug_info_error_counts": debug_error_summary,
-            "statement_type_summary": statement_summary,
-            "statement_type_flag_keys": flag_keys,
-            "statement_type_error_classes": error_class_keys,
-            "queries": [
-                {
-                    "identifier": outcome.task.identifier,
-                    "flags": outcome.flags,
-                    "raw_output_file": outcome.raw_json_path.name
-                    if outcome.raw_json_path
-                    else None,
-                    "succeeded": outcome.succeeded,
-                    "timing_ms": outcome.timing_ms,
-                    "preview": _query_preview_lines(outcome.task),
-                    "statement_type": outcome.statement_type,
-                    "statement_type_source": outcome.statement_type_source,
-                    "parser_statement_type": outcome.parser_statement_type,
-                }
-                for outcome in group_outcomes
-            ],
+    if guard is not None or retrying is not None:
+        resilience: Dict[str, Any] = retrying.stats() if retrying is not None else {}
+        if guard is not None and guard.breaker is not None:
+            resilience["breaker_trips"] = guard.breaker.trips
+        if guard is not None and guard.limiter is not None:
+            resilience["final_rate"] = guard.limiter.rate
+            resilience["rate_decreases"] = guard.limiter.decreases
+        run_extras["resilience"] = resilience
+    if cost_model is not None:
+        run_extras["scheduling"] = {"strategy": args.schedule, **cost_model.stats()}
+    if statement_index is not None:
+        run_extras["statement_index"] = statement_index.stats()
+    if sample_report is not None:
+        run_extras["sample"] = sample_report.summary(time.perf_counter() - parse_started)
+    if shard is not None:
+        run_extras["shard"] = {"shard": str(shard), "statements_loaded": load_stats.statements}
+    if replay is not None:
+        run_extras["rerun"] = {
+            "mode": "resume" if args.resume else "incremental",
+            "from_run": str(replay.path.parent),
+            "reused": replay.reused,
         }
-        report_data.setdefault("column_lineage_count", overview.get("column_lineage_count", 0))
-        report_path.write_text(json.dumps(report_data, indent=2), encoding="utf-8")
-        source_path_for_report = group_outcomes[0].task.source_path if group_outcomes else Path("")
-        report_markdown = render_report_markdown(
-            source_path_for_report,
-            _build_flag_prefix(folder_flags),
-            group_outcomes,
-            statement_summary,
-            flag_keys,
-            error_class_keys,
-        )
-        report_md_path.write_text(report_markdown, encoding="utf-8")
-
-    run_overview = compute_overview(outcomes)
-    run_flags = _aggregate_folder_flags(outcomes)
-    run_statement_summary, run_flag_keys, run_error_class_keys = (
-        compute_statement_type_metrics(outcomes, FLAG_PRIORITY)
-    )
-    run_debug_summary = build_debug_error_summary(outcomes)
-    run_report_path = raw_dir / "[[]]report.json"
-    run_report_md_path = raw_dir / "[[]]report.md"
-    run_report_data = {
-        "source": str(raw_dir),
-        "flags": run_flags,
-        **run_overview,
-        "debug_info_error_counts": run_debug_summary,
-        "statement_type_summary": run_statement_summary,
-        "statement_type_flag_keys": run_flag_keys,
-        "statement_type_error_classes": run_error_class_keys,
-        "queries": [
-            {
-                "identifier": outcome.task.identifier,
-                "flags": outcome.flags,
-                "raw_output_file": outcome.raw_json_path.name if outcome.raw_json_path else None,
-                "succeeded": outcome.succeeded,
-                "timing_ms": outcome.timing_ms,
-                "preview": _query_preview_lines(outcome.task),
-                "statement_type": outcome.statement_type,
-                "statement_type_source": outcome.statement_type_source,
-                "parser_statement_type": outcome.parser_statement_type,
-            }
-            for outcome in outcomes
-        ],
-    }
-    run_report_data.setdefault(
-        "column_lineage_count", run_overview.get("column_lineage_count", 0)
-    )
-    run_report_path.write_text(json.dumps(run_report_data, indent=2), encoding="utf-8")
-    run_report_markdown = render_report_markdown(
-        raw_dir,
-        _build_flag_prefix(run_flags),
-        outcomes,
-        run_statement_summary,
-        run_flag_keys,
-        run_error_class_keys,
-    )
-    run_report_md_path.write_text(run_report_markdown, encoding="utf-8")
+    run_overview = writer.finish(run_extras)
 
     print_overview(run_overview, raw_dir)
 
@@ -1,11 +1,24 @@
 from __future__ import annotations
 
+import json
 import math
 import re
 import statistics
 from collections import defaultdict
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Sequence, Set, Tuple, TYPE_CHECKING
+from typing import (
+    IO,
+    Any,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    TYPE_CHECKING,
+)
 
 ANSI_ESCAPE_PATTERN = re.compile(r"\x1b\[[0-9;]*[A-Za-z]")
 
@@ -31,6 +44,106 @@ def _normalize_error_label(error_value: Any) -> str:
     return text.strip() or "<unknown>"
 
 
+# Characters read from a report at a time while its query entries are streamed.
+REPORT_READ_CHUNK = 1024 * 1024
+
+_JSON_DECODER = json.JSONDecoder()
+_JSON_WHITESPACE = re.compile(r"[ \t\n\r]*")
+
+
+class _JsonStream:
+    """Decodes JSON values one at a time from a text handle, reading as needed."""
+
+    def __init__(self, handle: IO[str]):
+        self._handle = handle
+        self._buffer = ""
+        self._pos = 0
+        self._eof = False
+
+    def _read_more(self, size: int) -> bool:
+        if self._eof:
+            return False
+        chunk = self._handle.read(size)
+        if not chunk:
+            self._eof = True
+            return False
+        self._buffer = self._buffer[self._pos :] + chunk
+        self._pos = 0
+        return True
+
+    def peek(self) -> str:
+        """The next character that is not whitespace, without consuming it."""
+        while True:
+            self._pos = _JSON_WHITESPACE.match(self._buffer, self._pos).end()
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if not self._read_more(REPORT_READ_CHUNK):
+                raise ValueError("Unexpected end of JSON input")
+
+    def expect(self, character: str) -> None:
+        if self.peek() != character:
+            raise ValueError(f"Expected {character!r} at offset {self._pos} of the JSON chunk")
+        self._pos += 1
+
+    def value(self) -> Any:
+        self.peek()
+        size = REPORT_READ_CHUNK
+        while True:
+            try:
+                decoded, end = _JSON_DECODER.raw_decode(self._buffer, self._pos)
+            except ValueError:
+                decoded, end = None, -1
+            # A value that reaches the end of the buffer (a number, say) may go on in
+            # the next chunk, so it only counts once something follows it.
+            if end != -1 and (end < len(self._buffer) or self._eof):
+                self._pos = end
+                return decoded
+            if not self._read_more(size):
+                if end != -1:
+                    self._pos = end
+                    return decoded
+                raise ValueError("Truncated or invalid JSON value")
+            # Values longer than a chunk are retried on doubling reads, not once per chunk.
+            size *= 2
+
+
+def iter_report_queries(path: Path) -> Iterator[Dict[str, Any]]:
+    """Yield the ``queries`` entries of a ``[[]]report.json`` one by one.
+
+    Only one entry (and the small summary values before it) is held at a time, so
+    reports of any size can be read.
+    """
+    with path.open(encoding="utf-8") as handle:
+        stream = _JsonStream(handle)
+        stream.expect("{")
+        if stream.peek() == "}":
+            return
+        while True:
+            key = stream.value()
+            stream.expect(":")
+            if key == "queries":
+                stream.expect("[")
+                if stream.peek() == "]":
+                    stream.expect("]")
+                else:
+                    while True:
+                        yield stream.value()
+                        if stream.peek() == "]":
+                            stream.expect("]")
+                            break
+                        stream.expect(",")
+            else:
+                stream.value()
+            if stream.peek() == "}":
+                return
+            stream.expect(",")
+
+
+def debug_error_label(raw_payload: Dict[str, Any]) -> str:
+    """The class of a payload's ``debugInfoError`` that reports group errors by."""
+    return _normalize_error_label(raw_payload.get("debugInfoError"))
+
+
 def _percentile(values: Sequence[float], quantile: float) -> float:
     if not values:
         return 0.0
@@ -57,33 +170,298 @@ def _build_timing_summary(timings: List[float]) -> Dict[str, float]:
     }
 
 
+# Timings kept per statement type before a streaming report switches to a histogram.
+TIMING_EXACT_LIMIT = 20_000
+
+
+class TimingDigest:
+    """Timing samples of one group with bounded memory.
+
+    Samples are kept exactly until there are ``exact_limit`` of them; after that
+    they are folded into a log-scale histogram whose buckets are 1% wide, so the
+    median and p95 stay within about 1% while the count, sum, min and max stay exact,
+    and the summary is marked ``approximate``. With ``exact_limit=None`` every sample
+    is kept.
+    """
+
+    _BUCKET_BASE = math.log(1.01)
+
+    def __init__(self, exact_limit: Optional[int] = TIMING_EXACT_LIMIT):
+        self.exact_limit = exact_limit
+        self.count = 0
+        self.total = 0.0
+        self.minimum = math.inf
+        self.maximum = -math.inf
+        self._values: Optional[List[float]] = []
+        self._buckets: Dict[int, int] = defaultdict(int)
+
+    def add(self, value: float) -> None:
+        self.count += 1
+        self.total += value
+        self.minimum = min(self.minimum, value)
+        self.maximum = max(self.maximum, value)
+        if self._values is not None:
+            self._values.append(value)
+            if self.exact_limit is None or len(self._values) <= self.exact_limit:
+                return
+            for sample in self._values:
+                self._buckets[self._bucket(sample)] += 1
+            self._values = None
+            return
+        self._buckets[self._bucket(value)] += 1
+
+    def _bucket(self, value: float) -> int:
+        return math.floor(math.log(value) / self._BUCKET_BASE) if value > 0 else -(2**31)
+
+    def _quantile(self, quantile: float) -> float:
+        rank = (self.count - 1) * quantile
+        seen = 0
+        for bucket in sorted(self._buckets):
+            seen += self._buckets[bucket]
+            if seen > rank:
+                if bucket == -(2**31):
+                    return 0.0
+                midpoint = math.exp((bucket + 0.5) * self._BUCKET_BASE)
+                return min(self.maximum, max(self.minimum, midpoint))
+        return self.maximum
+
+    def summary(self) -> Dict[str, float]:
+        if self._values is not None:
+            summary = _build_timing_summary(self._values)
+            if self.count:
+                # The running total, as below, so every summary averages the same sum.
+                summary["avg"] = self.total / self.count
+            return summary
+        return {
+            "avg": self.total / self.count,
+            "median": self._quantile(0.5),
+            "p95": self._quantile(0.95),
+            "min": self.minimum,
+            "max": self.maximum,
+            "approximate": True,
+        }
+
+
+def _new_statement_type_stats(timing_exact_limit: Optional[int]) -> Dict[str, Any]:
+    return {
+        "total_queries": 0,
+        "success_count": 0,
+        "error_count": 0,
+        "timings": TimingDigest(timing_exact_limit),
+        "flag_counts": defaultdict(int),
+        "error_class_counts": defaultdict(int),
+        "parser_error_counts": defaultdict(int),
+        "source_breakdown": defaultdict(int),
+        "parser_reported_types": defaultdict(int),
+    }
+
+
+class ReportAccumulator:
+    """Running aggregates behind the overview, debug-error and statement-type reports.
+
+    Outcomes are folded in one at a time through ``add()`` and can be dropped right
+    after, so a report over millions of statements needs no per-statement state.
+    ``timing_exact_limit`` is passed to each statement type's ``TimingDigest``.
+    """
+
+    def __init__(self, timing_exact_limit: Optional[int] = TIMING_EXACT_LIMIT) -> None:
+        self.timing_exact_limit = timing_exact_limit
+        self.query_count = 0
+        self.success_count = 0
+        self.parser_error_count = 0
+        self.rpc_error_count = 0
+        self.timeout_count = 0
+        self.skipped_count = 0
+        self.duplicate_count = 0
+        self.timing_ms_total = 0.0
+        self.flag_counts: Dict[str, int] = defaultdict(int)
+        self.debug_error_counts: Dict[str, int] = defaultdict(int)
+        self.error_classes: Set[str] = set()
+        self.statement_types: Dict[str, Dict[str, Any]] = {}
+
+    def add(self, outcome: "QueryOutcome") -> None:
+        self._fold(
+            succeeded=outcome.succeeded,
+            parser_error=outcome.parser_error,
+            rpc_error=bool(outcome.rpc_error),
+            timed_out=bool(outcome.timeout_error),
+            skipped=outcome.skipped,
+            duplicate=bool(outcome.duplicate_of),
+            timing_ms=outcome.timing_ms,
+            flags=outcome.flags,
+            error_label=debug_error_label(outcome.raw_payload),
+            statement_type=outcome.statement_type,
+            statement_type_source=outcome.statement_type_source,
+            parser_statement_type=outcome.parser_statement_type,
+        )
+
+    def add_entry(self, entry: Dict[str, Any]) -> None:
+        """Fold in one query entry of a ``[[]]report.json``, as ``add()`` did for it."""
+        self._fold(
+            succeeded=entry["succeeded"],
+            parser_error=entry["parser_error"],
+            rpc_error=bool(entry["rpc_error"]),
+            timed_out=bool(entry["timeout_error"]),
+            skipped=entry["skipped"],
+            duplicate=bool(entry["duplicate_of"]),
+            timing_ms=entry["timing_ms"],
+            flags=entry["flags"],
+            error_label=entry["debug_info_error"],
+            statement_type=entry["statement_type"],
+            statement_type_source=entry["statement_type_source"],
+            parser_statement_type=entry["parser_statement_type"],
+        )
+
+    def _fold(
+        self,
+        *,
+        succeeded: bool,
+        parser_error: Optional[str],
+        rpc_error: bool,
+        timed_out: bool,
+        skipped: bool,
+        duplicate: bool,
+        timing_ms: float,
+        flags: Sequence[str],
+        error_label: str,
+        statement_type: Optional[str],
+        statement_type_source: Optional[str],
+        parser_statement_type: Optional[str],
+    ) -> None:
+        self.query_count += 1
+        self.success_count += bool(succeeded)
+        self.parser_error_count += bool(parser_error)
+        self.rpc_error_count += rpc_error
+        self.timeout_count += timed_out
+        self.skipped_count += bool(skipped)
+        self.duplicate_count += duplicate
+        self.timing_ms_total += timing_ms
+        for flag in set(flags):
+            self.flag_counts[flag] += 1
+        self.debug_error_counts[error_label] += 1
+        self.error_classes.add(error_label)
+
+        stats = self.statement_types.get(statement_type or "UNKNOWN")
+        if stats is None:
+            stats = self.statement_types[statement_type or "UNKNOWN"] = (
+                _new_statement_type_stats(self.timing_exact_limit)
+            )
+        stats["total_queries"] += 1
+        stats["timings"].add(timing_ms)
+        if succeeded:
+            stats["success_count"] += 1
+        else:
+            stats["error_count"] += 1
+        stats["source_breakdown"][statement_type_source or "unknown"] += 1
+        stats["parser_reported_types"][parser_statement_type or "UNAVAILABLE"] += 1
+        for flag in flags:
+            stats["flag_counts"][flag] += 1
+        stats["error_class_counts"][error_label] += 1
+        stats["parser_error_counts"][parser_error or "<none>"] += 1
+
+    def extend(self, outcomes: Iterable["QueryOutcome"]) -> "ReportAccumulator":
+        for outcome in outcomes:
+            self.add(outcome)
+        return self
+
+    @property
+    def flag_set(self) -> Set[str]:
+        return set(self.flag_counts)
+
+    def overview(self) -> Dict[str, Any]:
+        return {
+            "query_count": self.query_count,
+            "success_count": self.success_count,
+            "parser_error_count": self.parser_error_count,
+            "rpc_error_count": self.rpc_error_count,
+            "timeout_count": self.timeout_count,
+            "error_count": self.flag_counts.get("ERR", 0),
+            "lineage_count": self.flag_counts.get("LIN", 0),
+            "gap_lineage_count": self.flag_counts.get("GAP", 0),
+            "self_referential_count": self.flag_counts.get("SELF", 0),
+            "column_lineage_count": self.flag_counts.get("COL", 0),
+            "timing_ms_total": self.timing_ms_total,
+            "skipped_count": self.skipped_count,
+            "deduplicated_count": self.duplicate_count,
+            "dedup_ratio": (self.duplicate_count / self.query_count) if self.query_count else 0.0,
+        }
+
+    def debug_error_summary(self) -> List[Dict[str, Any]]:
+        sorted_debug_errors = sorted(
+            self.debug_error_counts.items(), key=lambda item: (-item[1], item[0].lower())
+        )
+        return [{"message": label, "count": count} for label, count in sorted_debug_errors]
+
+    def statement_type_metrics(
+        self, flag_priority: Sequence[str]
+    ) -> Tuple[Dict[str, Any], List[str], List[str]]:
+        final_summary: Dict[str, Any] = {}
+        for statement_type, stats in self.statement_types.items():
+            success_count = stats["success_count"]
+            total = stats["total_queries"]
+            success_rate = (success_count / total * 100.0) if total else 0.0
+            final_summary[statement_type] = {
+                "total_queries": total,
+                "success_count": success_count,
+                "error_count": stats["error_count"],
+                "success_rate": success_rate,
+                "error_rate": 100.0 - success_rate if total else 0.0,
+                "timing_ms": stats["timings"].summary(),
+                "flag_counts": dict(stats["flag_counts"]),
+                "error_class_counts": dict(stats["error_class_counts"]),
+                "parser_error_counts": dict(stats["parser_error_counts"]),
+                "source_breakdown": dict(stats["source_breakdown"]),
+                "parser_reported_types": dict(stats["parser_reported_types"]),
+            }
+
+        all_flags = self.flag_set
+        flag_keys = [flag for flag in flag_priority if flag in all_flags]
+        flag_keys += sorted(all_flags - set(flag_keys))
+        error_class_keys = sorted(self.error_classes)
+
+        return final_summary, flag_keys, error_class_keys
+
+
 def build_debug_error_summary(
     outcomes: Sequence["QueryOutcome"],
 ) -> List[Dict[str, Any]]:
-    debug_error_counts: Dict[str, int] = defaultdict(int)
-    for outcome in outcomes:
-        debug_error = outcome.raw_payload.get("debugInfoError")
-        error_label = _normalize_error_label(debug_error)
-        debug_error_counts[error_label] += 1
-    sorted_debug_errors = sorted(
-        debug_error_counts.items(), key=lambda item: (-item[1], item[0].lower())
-    )
-    return [{"message": label, "count": count} for label, count in sorted_debug_errors]
+    return ReportAccumulator().extend(outcomes).debug_error_summary()
 
 
 def compute_overview(outcomes: Sequence["QueryOutcome"]) -> Dict[str, Any]:
-    return {
-        "query_count": len(outcomes),
-        "success_count": sum(1 for outcome in outcomes if outcome.succeeded),
-        "parser_error_count": sum(1 for outcome in outcomes if outcome.parser_error),
-        "rpc_error_count": sum(1 for outcome in outcomes if outcome.rpc_error),
-        "error_count": sum(1 for outcome in outcomes if "ERR" in outcome.flags),
-        "lineage_count": sum(1 for outcome in outcomes if "LIN" in outcome.flags),
-        "gap_lineage_count": sum(1 for outcome in outcomes if "GAP" in outcome.flags),
-        "self_referential_count": sum(1 for outcome in outcomes if "SELF" in outcome.flags),
-        "column_lineage_count": sum(1 for outcome in outcomes if "COL" in outcome.flags),
-        "timing_ms_total": sum(outcome.timing_ms for outcome in outcomes),
-    }
+    return ReportAccumulator().extend(outcomes).overview()
+
+
+def _format_rate(rate: Dict[str, float]) -> str:
+    return (
+        f"{rate['estimate'] * 100.0:.1f}% "
+        f"({rate['low'] * 100.0:.1f}–{rate['high'] * 100.0:.1f}%)"
+    )
+
+
+def _sample_lines(sample: Dict[str, Any]) -> List[str]:
+    timing = sample["projected_timing_ms"]
+    wall = sample["projected_wall_s"]
+    confidence = f"{sample['confidence'] * 100.0:g}%"
+    lines = [
+        f"Sample: {sample['sampled']} of {sample['population']} statements across "
+        f"{sample['strata_count']} strata (seed {sample['seed']}); rates are estimates "
+        f"for all {sample['population']} with {confidence} confidence intervals",
+        f"Estimated success rate: {_format_rate(sample['success_rate'])}",
+    ]
+    if sample["flag_rates"]:
+        lines.append(
+            "Estimated flag rates: "
+            + ", ".join(
+                f"{flag} {_format_rate(rate)}" for flag, rate in sample["flag_rates"].items()
+            )
+        )
+    lines.append(
+        f"Projected full run: {timing['estimate'] / 1000.0:.1f}s parser time "
+        f"({timing['low'] / 1000.0:.1f}–{timing['high'] / 1000.0:.1f}s), about "
+        f"{wall['estimate']:.0f}s wall-clock at this run's throughput"
+    )
+    return lines
 
 
 def print_overview(overview: Dict[str, Any], raw_dir: Optional[Path] = None) -> None:
@@ -92,12 +470,129 @@ def print_overview(overview: Dict[str, Any], raw_dir: Optional[Path] = None) ->
     print(f"Successful parses: {overview['success_count']}")
     print(f"Parser errors: {overview['parser_error_count']}")
     print(f"RPC errors: {overview['rpc_error_count']}")
+    if overview.get("timeout_count"):
+        print(f"Client-side timeouts (TIMEOUT): {overview['timeout_count']}")
     print(f"Queries flagged with ERR: {overview['error_count']}")
     print(f"Queries with lineage: {overview['lineage_count']}")
     print(f"Queries missing lineage (GAP): {overview['gap_lineage_count']}")
     print(f"Self-referential lineage: {overview['self_referential_count']}")
     print(f"Queries with column lineage (COL): {overview['column_lineage_count']}")
     print(f"Total parser time (ms): {overview['timing_ms_total']:.3f}")
+    loading = overview.get("loading")
+    if loading:
+        print(
+            f"Input loading: {loading['statements']} statements from {loading['sources']} "
+            f"sources, {loading['busy_s']:.2f}s reading/splitting on "
+            f"{loading['workers']} workers, parse stage waited {loading['wait_s']:.2f}s"
+        )
+        if loading.get("csv_rows"):
+            rate = loading["csv_rows_per_s"]
+            print(
+                f"CSV scan: {loading['csv_rows']} rows "
+                f"({loading['csv_rows_filtered']} filtered out) in {loading['csv_scan_s']:.2f}s"
+                + (f", {rate:,.0f} rows/s" if rate else "")
+            )
+    if overview.get("skipped_count"):
+        print(f"Skipped by triage (SKIP): {overview['skipped_count']}")
+    sample = overview.get("sample")
+    if sample:
+        for line in _sample_lines(sample):
+            print(line)
+    shard = overview.get("shard")
+    if shard:
+        print(
+            f"Shard {shard['shard']}: {overview['query_count']} of "
+            f"{shard['statements_loaded']} loaded statements"
+        )
+    shards = overview.get("shards")
+    if shards:
+        print(
+            f"Merged {len(shards['runs'])} of {shards['count']} shards: "
+            + ", ".join(f"{run['shard']} ({run['query_count']})" for run in shards["runs"])
+        )
+    rerun = overview.get("rerun")
+    if rerun:
+        print(
+            f"{rerun['mode'].capitalize()}: {rerun['reused']} statements reused from "
+            f"{rerun['from_run']}, {overview['query_count'] - rerun['reused']} processed this run"
+        )
+    statement_index = overview.get("statement_index")
+    if statement_index:
+        print(
+            f"Statement index: {statement_index['sources_from_index']} inputs enumerated "
+            f"from their index ({statement_index['statements_from_index']} statements), "
+            f"{statement_index['sources_indexed']} indexed this run"
+        )
+    routing = overview.get("routing")
+    if routing:
+        print(
+            f"Heavy lane: {routing['heavy_statements']} statements at score >= "
+            f"{routing['threshold']:g}, {routing['timeouts']} exceeded the "
+            f"{routing['deadline_s']:g}s deadline"
+        )
+    batching = overview.get("batching")
+    if batching:
+        print(
+            f"Batching: {batching['statements']} statements in {batching['batches']} batches "
+            f"(avg {batching['avg_batch_size']:.1f}, largest {batching['largest_batch']}, "
+            f"limit {batching['max_statements']} statements / {batching['max_bytes']} bytes)"
+        )
+    resilience = overview.get("resilience")
+    if resilience and (resilience.get("retries") or resilience.get("breaker_trips")):
+        print(
+            f"Retries: {resilience.get('retries', 0)} sent, {resilience.get('recovered', 0)} "
+            f"statements recovered, {resilience.get('exhausted', 0)} still failing; "
+            f"circuit breaker tripped {resilience.get('breaker_trips', 0)} times"
+        )
+    if resilience and "final_rate" in resilience:
+        print(
+            f"Adaptive rate limit: ended at {resilience['final_rate']:.1f} calls/s "
+            f"after {resilience['rate_decreases']} decreases"
+        )
+    scheduling = overview.get("scheduling")
+    if scheduling:
+        print(
+            f"Scheduling: {scheduling['strategy']} ({scheduling['predicted_from_history']} "
+            f"costs from {scheduling['history_runs']} earlier runs, "
+            f"{scheduling['predicted_from_shape']} estimated from statement shape)"
+        )
+    if overview.get("deduplicated_count"):
+        print(
+            f"Deduplicated statements: {overview['deduplicated_count']} "
+            f"({overview['dedup_ratio'] * 100.0:.1f}% reused lineage)"
+        )
+    cache_stats = overview.get("cache")
+    if cache_stats:
+        print(
+            f"Parse cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses, "
+            f"{cache_stats['evictions']} evictions"
+        )
+    query_output = overview.get("query_output")
+    if query_output:
+        print(
+            f"JSONL output: {query_output['records']} records, "
+            f"{query_output['bytes'] / (1024 * 1024):.1f} MiB in {query_output['shards']} "
+            f"shards ({query_output['batches']} batched writes), producer blocked "
+            f"{query_output['producer_wait_s']:.2f}s"
+        )
+    sql_store = overview.get("sql_store")
+    if sql_store:
+        print(
+            f"SQL store: {sql_store['references']} statements reference {sql_store['blobs']} "
+            f"distinct texts ({sql_store['bytes'] / (1024 * 1024):.1f} MiB)"
+        )
+    results_db = overview.get("results_db")
+    if results_db:
+        print(
+            f"Results database: {results_db['outcomes']} outcomes recorded as run "
+            f"{results_db['run_id']} in {results_db['path']}"
+        )
+    columnar = overview.get("columnar")
+    if columnar:
+        print(
+            f"Columnar outcomes: {columnar['rows']} rows "
+            f"({columnar['bytes'] / (1024 * 1024):.1f} MiB) in {columnar['path']}"
+        )
     if raw_dir is not None:
         print(f"Raw outputs stored in: {raw_dir}")
 
@@ -139,79 +634,7 @@ def compute_statement_type_metrics(
     outcomes: Sequence["QueryOutcome"],
     flag_priority: Sequence[str],
 ) -> Tuple[Dict[str, Any], List[str], List[str]]:
-    summary: Dict[str, Dict[str, Any]] = {}
-    all_flags: Set[str] = set()
-    all_error_classes: Set[str] = set()
-
-    for outcome in outcomes:
-        statement_type = outcome.statement_type or "UNKNOWN"
-        stats = summary.setdefault(
-            statement_type,
-            {
-                "total_queries": 0,
-                "success_count": 0,
-                "error_count": 0,
-                "timings": [],
-                "flag_counts": defaultdict(int),
-                "error_class_counts": defaultdict(int),
-                "parser_error_counts": defaultdict(int),
-                "source_breakdown": defaultdict(int),
-                "parser_reported_types": defaultdict(int),
-            },
-        )
-        stats["total_queries"] += 1
-        stats["timings"].append(outcome.timing_ms)
-        if outcome.succeeded:
-            stats["success_count"] += 1
-        else:
-            stats["error_count"] += 1
-
-        stats["source_breakdown"][outcome.statement_type_source or "unknown"] += 1
-        parser_label = outcome.parser_statement_type or "UNAVAILABLE"
-        stats["parser_reported_types"][parser_label] += 1
-
-        for flag in outcome.flags:
-            stats["flag_counts"][flag] += 1
-            all_flags.add(flag)
-
-        error_label = _normalize_error_label(outcome.raw_payload.get("debugInfoError"))
-        stats["error_class_counts"][error_label] += 1
-        all_error_classes.add(error_label)
-
-        parser_error_label = outcome.parser_error or "<none>"
-        stats["parser_error_counts"][parser_error_label] += 1
-
-    final_summary: Dict[str, Any] = {}
-    for statement_type, stats in summary.items():
-        timings = stats.pop("timings")
-        timing_summary = _build_timing_summary(timings)
-        success_count = stats["success_count"]
-        total = stats["total_queries"]
-        success_rate = (success_count / total * 100.0) if total else 0.0
-        flag_counts = dict(stats["flag_counts"])
-        error_class_counts = dict(stats["error_class_counts"])
-        parser_error_counts = dict(stats["parser_error_counts"])
-        source_breakdown = dict(stats["source_breakdown"])
-        parser_reported_types = dict(stats["parser_reported_types"])
-        final_summary[statement_type] = {
-            "total_queries": total,
-            "success_count": success_count,
-            "error_count": stats["error_count"],
-            "success_rate": success_rate,
-            "error_rate": 100.0 - success_rate if total else 0.0,
-            "timing_ms": timing_summary,
-            "flag_counts": flag_counts,
-            "error_class_counts": error_class_counts,
-            "parser_error_counts": parser_error_counts,
-            "source_breakdown": source_breakdown,
-            "parser_reported_types": parser_reported_types,
-        }
-
-    flag_keys = [flag for flag in flag_priority if flag in all_flags]
-    flag_keys += sorted(all_flags - set(flag_keys))
-    error_class_keys = sorted(all_error_classes)
-
-    return final_summary, flag_keys, error_class_keys
+    return ReportAccumulator().extend(outcomes).statement_type_metrics(flag_priority)
 
 
 def render_report_markdown(
@@ -222,8 +645,28 @@ def render_report_markdown(
     flag_keys: Sequence[str],
     error_class_keys: Sequence[str],
 ) -> str:
-    total_queries = len(outcomes)
-    total_timing_ms = sum(outcome.timing_ms for outcome in outcomes)
+    return render_summary_markdown(
+        source_path,
+        folder_flag_label,
+        compute_overview(outcomes),
+        statement_summary,
+        flag_keys,
+        error_class_keys,
+    )
+
+
+def render_summary_markdown(
+    source_path: Path,
+    folder_flag_label: str,
+    overview: Dict[str, Any],
+    statement_summary: Dict[str, Any],
+    flag_keys: Sequence[str],
+    error_class_keys: Sequence[str],
+) -> str:
+    total_queries = overview["query_count"]
+    total_timing_ms = overview["timing_ms_total"]
+    duplicate_count = overview["deduplicated_count"]
+    timeout_count = overview["timeout_count"]
 
     parser_count = sum(
         stats["source_breakdown"].get("parser", 0) for stats in statement_summary.values()
@@ -234,6 +677,9 @@ def render_report_markdown(
     unresolved_count = sum(
         stats["source_breakdown"].get("unknown", 0) for stats in statement_summary.values()
     )
+    triage_count = sum(
+        stats["source_breakdown"].get("triage", 0) for stats in statement_summary.values()
+    )
     parser_unknown_total = sum(
         stats["parser_reported_types"].get("UNKNOWN", 0)
         for stats in statement_summary.values()
@@ -249,6 +695,16 @@ def render_report_markdown(
         f"* Statement types via parser: {parser_count}",
         f"* Statement types via fallback: {fallback_count}",
     ]
+    if triage_count:
+        lines.append(f"* Statements skipped by triage before parsing: {triage_count}")
+    if timeout_count:
+        lines.append(f"* Statements abandoned at the client-side deadline: {timeout_count}")
+    if duplicate_count:
+        lines.append(
+            f"* Deduplicated statements: {duplicate_count} of {total_queries} "
+            f"({duplicate_count / total_queries * 100.0:.1f}%) reused lineage from an "
+            "identical or literal-only-different statement"
+        )
     if unresolved_count:
         lines.append(f"* Statement types still unknown: {unresolved_count}")
     if parser_unknown_total:
@@ -262,11 +718,52 @@ def render_report_markdown(
             "### Legend",
             "",
             "- `Parser` vs `Fallback`: whether the parser supplied the statement type or the regex fallback classifier did.",
-            "- Flags: `ERR`=parser/RPC error, `GAP`=missing upstream or downstream lineage, `LIN`=complete table lineage, "
-            "`SELF`=self-referential lineage, `COL`=column-level lineage detected.",
+            "- Flags: `ERR`=parser/RPC error, `TIMEOUT`=client-side deadline exceeded, `GAP`=missing upstream or downstream lineage, `LIN`=complete table lineage, "
+            "`SELF`=self-referential lineage, `COL`=column-level lineage detected, "
+            "`SKIP`=skipped by triage without parsing.",
         ]
     )
 
+    sample = overview.get("sample")
+    if sample:
+        flags = list(sample["flag_rates"])
+        stratum_rows = [
+            [
+                stratum["folder"],
+                stratum["statement_type"],
+                str(stratum["population"]),
+                str(stratum["sampled"]),
+                _format_rate(stratum["success_rate"]),
+                *(_format_rate(stratum["flag_rates"][flag]) for flag in flags),
+                f"{stratum['timing_ms_avg']:.2f}",
+            ]
+            for stratum in sample["strata"]
+        ]
+        lines.extend(
+            [
+                "",
+                "## Sample Estimates",
+                "",
+                "_This run parsed a stratified sample. Rates are estimates for the whole input, "
+                "with 95% confidence intervals in parentheses._",
+                "",
+                *(f"* {line}" for line in _sample_lines(sample)),
+                "",
+                *_format_markdown_table(
+                    [
+                        "Folder",
+                        "Statement Type",
+                        "Population",
+                        "Sampled",
+                        "Success %",
+                        *(f"{flag} %" for flag in flags),
+                        "Avg ms",
+                    ],
+                    stratum_rows,
+                ),
+            ]
+        )
+
     if statement_summary:
         overview_rows: List[List[str]] = []
         for statement_type, stats in sorted(
@@ -281,7 +778,7 @@ def render_report_markdown(
                     str(stats["error_count"]),
                     f"{stats['success_rate']:.1f}%",
                     f"{timing['avg']:.2f}",
-                    f"{timing['p95']:.2f}",
+                    f"{'~' if timing.get('approximate') else ''}{timing['p95']:.2f}",
                 ]
             )
         lines.extend(
@@ -297,6 +794,14 @@ def render_report_markdown(
                 ),
             ]
         )
+        if any(stats["timing_ms"].get("approximate") for stats in statement_summary.values()):
+            lines.extend(
+                [
+                    "",
+                    f"_~ marks a P95 estimated from a histogram (within about 1%) for a type "
+                    f"with more than {TIMING_EXACT_LIMIT:,} statements._",
+                ]
+            )
 
         classification_rows: List[List[str]] = []
         for statement_type, stats in sorted(
@@ -410,9 +915,15 @@ def render_report_markdown(
 
 
 __all__ = [
+    "TIMING_EXACT_LIMIT",
+    "ReportAccumulator",
+    "TimingDigest",
     "build_debug_error_summary",
+    "debug_error_label",
     "compute_overview",
+    "iter_report_queries",
     "compute_statement_type_metrics",
     "print_overview",
     "render_report_markdown",
+    "render_summary_markdown",
 ]
@@ -0,0 +1,256 @@
+from __future__ import annotations
+
+import json
+import sqlite3
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+
+if TYPE_CHECKING:  # pragma: no cover - type checking only
+    from parse_sql_minimal import QueryOutcome
+
+_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS runs (
+        id INTEGER PRIMARY KEY,
+        run_dir TEXT NOT NULL UNIQUE,
+        started_at REAL NOT NULL,
+        finished_at REAL,
+        settings TEXT NOT NULL,
+        shard TEXT,
+        query_count INTEGER NOT NULL DEFAULT 0
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS outcomes (
+        id INTEGER PRIMARY KEY,
+        run_id INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+        identifier TEXT NOT NULL,
+        source TEXT NOT NULL,
+        sql_digest TEXT NOT NULL,
+        statement_type TEXT,
+        statement_type_source TEXT,
+        parser_statement_type TEXT,
+        flags TEXT NOT NULL,
+        succeeded INTEGER NOT NULL,
+        parser_error TEXT,
+        rpc_error TEXT,
+        timeout_error TEXT,
+        skipped INTEGER NOT NULL,
+        from_cache INTEGER NOT NULL,
+        duplicate_of TEXT,
+        retries INTEGER NOT NULL,
+        timing_ms REAL NOT NULL,
+        raw_output_file TEXT
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS outcome_flags (
+        outcome_id INTEGER NOT NULL REFERENCES outcomes(id) ON DELETE CASCADE,
+        flag TEXT NOT NULL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS datasets (
+        outcome_id INTEGER NOT NULL REFERENCES outcomes(id) ON DELETE CASCADE,
+        direction TEXT NOT NULL,
+        urn TEXT NOT NULL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS column_edges (
+        outcome_id INTEGER NOT NULL REFERENCES outcomes(id) ON DELETE CASCADE,
+        upstream TEXT NOT NULL,
+        downstream TEXT NOT NULL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS outcomes_run ON outcomes(run_id, identifier)",
+    "CREATE INDEX IF NOT EXISTS outcomes_identifier ON outcomes(identifier, run_id)",
+    "CREATE INDEX IF NOT EXISTS outcomes_source ON outcomes(source, run_id)",
+    "CREATE INDEX IF NOT EXISTS outcomes_statement_type ON outcomes(statement_type, run_id)",
+    "CREATE INDEX IF NOT EXISTS outcomes_sql_digest ON outcomes(sql_digest)",
+    "CREATE INDEX IF NOT EXISTS outcome_flags_flag ON outcome_flags(flag, outcome_id)",
+    "CREATE INDEX IF NOT EXISTS outcome_flags_outcome ON outcome_flags(outcome_id)",
+    "CREATE INDEX IF NOT EXISTS datasets_urn ON datasets(urn, direction)",
+    "CREATE INDEX IF NOT EXISTS datasets_outcome ON datasets(outcome_id)",
+    "CREATE INDEX IF NOT EXISTS column_edges_outcome ON column_edges(outcome_id)",
+    "CREATE INDEX IF NOT EXISTS column_edges_downstream ON column_edges(downstream)",
+)
+
+
+class ResultsStore:
+    """A SQLite database of query outcomes that many runs write into.
+
+    Each run gets a ``runs`` row keyed by its run directory; its outcomes, their flags
+    (one ``outcome_flags`` row per flag), upstream/downstream ``datasets`` and
+    ``column_edges`` reference it. Everything is indexed by run, source, statement
+    type, flag and content hash, so comparing runs is a query instead of a re-read
+    of their reports. Writing a run directory again (``--resume``) replaces its rows.
+    Several runs may share the file; writers wait for each other's transactions.
+    """
+
+    def __init__(self, path: Path, *, commit_every: int = 500):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self.commit_every = max(1, commit_every)
+        self.run_id: Optional[int] = None
+        self.query_count = 0
+        self._pending_writes = 0
+        self._conn = sqlite3.connect(str(path), timeout=60)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA foreign_keys=ON")
+        for statement in _SCHEMA:
+            self._conn.execute(statement)
+        self._conn.commit()
+
+    def begin_run(
+        self, run_dir: Path, settings: Dict[str, Any], shard: Optional[str] = None
+    ) -> int:
+        """Start recording ``run_dir``, dropping whatever was recorded for it before."""
+        run_key = str(run_dir.resolve())
+        self._conn.execute("DELETE FROM runs WHERE run_dir = ?", (run_key,))
+        cursor = self._conn.execute(
+            "INSERT INTO runs (run_dir, started_at, settings, shard) VALUES (?, ?, ?, ?)",
+            (run_key, time.time(), json.dumps(settings, sort_keys=True), shard),
+        )
+        self._conn.commit()
+        self.run_id = cursor.lastrowid
+        assert self.run_id is not None
+        return self.run_id
+
+    def add(
+        self,
+        outcome: "QueryOutcome",
+        *,
+        flags: str,
+        sql_digest: str,
+        raw_output_file: Optional[str],
+    ) -> None:
+        assert self.run_id is not None, "begin_run() first"
+        cursor = self._conn.execute(
+            "INSERT INTO outcomes (run_id, identifier, source, sql_digest, "
+            "statement_type, statement_type_source, parser_statement_type, flags, succeeded, "
+            "parser_error, rpc_error, timeout_error, skipped, from_cache, duplicate_of, "
+            "retries, timing_ms, raw_output_file) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                self.run_id,
+                outcome.task.identifier,
+                str(outcome.task.source_path),
+                sql_digest,
+                outcome.statement_type,
+                outcome.statement_type_source,
+                outcome.parser_statement_type,
+                flags,
+                int(outcome.succeeded),
+                outcome.parser_error,
+                outcome.rpc_error,
+                outcome.timeout_error,
+                int(outcome.skipped),
+                int(outcome.from_cache),
+                outcome.duplicate_of,
+                outcome.retries,
+                outcome.timing_ms,
+                raw_output_file,
+            ),
+        )
+        outcome_id = cursor.lastrowid
+        self._conn.executemany(
+            "INSERT INTO outcome_flags (outcome_id, flag) VALUES (?, ?)",
+            [(outcome_id, flag) for flag in dict.fromkeys(outcome.flags)],
+        )
+        self._conn.executemany(
+            "INSERT INTO datasets (outcome_id, direction, urn) VALUES (?, ?, ?)",
+            [(outcome_id, "upstream", urn) for urn in outcome.upstreams]
+            + [(outcome_id, "downstream", urn) for urn in outcome.downstreams],
+        )
+        edges = []
+        for edge in outcome.column_edges:
+            upstream, _, downstream = edge.partition(" -> ")
+            edges.append((outcome_id, upstream, downstream))
+        self._conn.executemany(
+            "INSERT INTO column_edges (outcome_id, upstream, downstream) VALUES (?, ?, ?)",
+            edges,
+        )
+        self.query_count += 1
+        self._pending_writes += 1
+        if self._pending_writes >= self.commit_every:
+            self._conn.commit()
+            self._pending_writes = 0
+
+    def finish_run(self) -> Dict[str, Any]:
+        assert self.run_id is not None, "begin_run() first"
+        self._conn.execute(
+            "UPDATE runs SET finished_at = ?, query_count = ? WHERE id = ?",
+            (time.time(), self.query_count, self.run_id),
+        )
+        self._conn.commit()
+        self._pending_writes = 0
+        return {"path": str(self.path), "run_id": self.run_id, "outcomes": self.query_count}
+
+    def close(self) -> None:
+        self._conn.commit()
+        self._conn.close()
+
+
+def flag_transitions(
+    db_path: Path,
+    before_run_dir: Path,
+    after_run_dir: Path,
+    before_flag: str,
+    after_flag: str,
+) -> List[Dict[str, Any]]:
+    """Statements flagged ``before_flag`` in one run and ``after_flag`` (without it) in another.
+
+    Statements are matched by identifier and normalized-SQL digest, so an edited
+    statement is not reported as a regression. For example ``LIN`` then ``GAP``
+    lists the statements whose table lineage was lost between the two runs.
+    """
+    if not db_path.is_file():
+        raise ValueError(f"No results database at {db_path}.")
+    conn = sqlite3.connect(str(db_path), timeout=60)
+    try:
+        run_ids = []
+        for run_dir in (before_run_dir, after_run_dir):
+            row = conn.execute(
+                "SELECT id FROM runs WHERE run_dir = ?", (str(run_dir.resolve()),)
+            ).fetchone()
+            if row is None:
+                raise ValueError(f"{run_dir} is not recorded in {db_path}.")
+            run_ids.append(row[0])
+        rows = conn.execute(
+            """
+            SELECT before.identifier, after.statement_type, before.flags, after.flags
+            FROM outcomes AS before
+            JOIN outcome_flags AS was ON was.outcome_id = before.id AND was.flag = ?
+            JOIN outcomes AS after
+                ON after.run_id = ? AND after.identifier = before.identifier
+                AND after.sql_digest = before.sql_digest
+            JOIN outcome_flags AS now ON now.outcome_id = after.id AND now.flag = ?
+            WHERE before.run_id = ?
+                AND NOT EXISTS (
+                    SELECT 1 FROM outcome_flags
+                    WHERE outcome_id = after.id AND flag = was.flag
+                )
+            ORDER BY before.id
+            """,
+            (before_flag, run_ids[1], after_flag, run_ids[0]),
+        ).fetchall()
+    finally:
+        conn.close()
+    return [
+        {
+            "identifier": identifier,
+            "statement_type": statement_type,
+            "flags_before": flags_before,
+            "flags_after": flags_after,
+        }
+        for identifier, statement_type, flags_before, flags_after in rows
+    ]
+
+
+__all__ = [
+    "ResultsStore",
+    "flag_transitions",
+]
@@ -0,0 +1,190 @@
+from __future__ import annotations
+
+import json
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from jsonl_output import OUTPUT_DIR_NAME
+
+RUN_INDEX_NAME = "[[]]index.sqlite3"
+
+_COLUMNS = (
+    "id",
+    "identifier",
+    "source",
+    "sql_digest",
+    "folder",
+    "raw_output_file",
+    "shard_file",
+    "byte_offset",
+    "byte_length",
+    "flags",
+    "statement_type",
+    "timing_ms",
+    "succeeded",
+)
+
+
+class RunIndex:
+    """Where each query of a run was written, keyed by identifier and SQL digest.
+
+    One SQLite file per run maps every query's identifier and ``sql_digest`` to its
+    source folder and output file (or JSONL shard, offset and
+    length), together with its flags, statement type and timing. Finding one query's
+    result is then an indexed lookup rather than a walk of the run directory, whose
+    folder and file names change with their flags.
+
+    Rows are added as queries are written. Locations in JSONL shards are filled in
+    from the shard writer's thread, so every statement runs under a lock.
+    """
+
+    def __init__(self, path: Path, *, commit_every: int = 500):
+        self.path = path
+        self.commit_every = max(1, commit_every)
+        self._pending_writes = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS queries (
+                id INTEGER PRIMARY KEY,
+                identifier TEXT NOT NULL,
+                source TEXT NOT NULL,
+                sql_digest TEXT NOT NULL,
+                folder TEXT NOT NULL,
+                raw_output_file TEXT NOT NULL,
+                shard_file TEXT,
+                byte_offset INTEGER,
+                byte_length INTEGER,
+                flags TEXT NOT NULL,
+                statement_type TEXT,
+                timing_ms REAL NOT NULL,
+                succeeded INTEGER NOT NULL
+            )
+            """
+        )
+        for column in ("identifier", "sql_digest"):
+            self._conn.execute(
+                f"CREATE INDEX IF NOT EXISTS queries_{column} ON queries({column})"
+            )
+
+    def add(
+        self,
+        *,
+        identifier: str,
+        source: str,
+        sql_digest: str,
+        folder: str,
+        raw_output_file: str,
+        flags: str,
+        statement_type: Optional[str],
+        timing_ms: float,
+        succeeded: bool,
+    ) -> int:
+        """Record one query and return its row id, the key for ``set_location()``."""
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT INTO queries (identifier, source, sql_digest, folder, "
+                "raw_output_file, flags, statement_type, timing_ms, succeeded) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    identifier,
+                    source,
+                    sql_digest,
+                    folder,
+                    raw_output_file,
+                    flags,
+                    statement_type,
+                    timing_ms,
+                    int(succeeded),
+                ),
+            )
+            self._note_write()
+            assert cursor.lastrowid is not None
+            return cursor.lastrowid
+
+    def set_location(self, row_id: int, shard_file: str, offset: int, length: int) -> None:
+        with self._lock:
+            self._conn.execute(
+                "UPDATE queries SET shard_file = ?, byte_offset = ?, byte_length = ? "
+                "WHERE id = ?",
+                (shard_file, offset, length, row_id),
+            )
+            self._note_write()
+
+    def rename_folder(self, first_row_id: int, last_row_id: int, folder: str) -> None:
+        """Point the rows ``first_row_id`` to ``last_row_id`` at ``folder``, once it has its
+        final name."""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE queries SET folder = ? WHERE id BETWEEN ? AND ?",
+                (folder, first_row_id, last_row_id),
+            )
+            self._note_write()
+
+    def _note_write(self) -> None:
+        self._pending_writes += 1
+        if self._pending_writes >= self.commit_every:
+            self._conn.commit()
+            self._pending_writes = 0
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.commit()
+            # Leave a single self-contained file, so read-only readers need no WAL files.
+            self._conn.execute("PRAGMA journal_mode=DELETE")
+            self._conn.close()
+
+
+def lookup_queries(
+    run_dir: Path,
+    *,
+    identifier: Optional[str] = None,
+    sql_digest: Optional[str] = None,
+) -> List[Dict[str, Any]]:
+    """The index rows of ``run_dir`` matching every key given, in the order they were run."""
+    index_path = run_dir / RUN_INDEX_NAME
+    if not index_path.is_file():
+        raise ValueError(f"{run_dir} has no {RUN_INDEX_NAME}; it predates run indexes.")
+    conditions = [
+        (column, value)
+        for column, value in (
+            ("identifier", identifier),
+            ("sql_digest", sql_digest),
+        )
+        if value is not None
+    ]
+    if not conditions:
+        raise ValueError("Give an identifier or sql_digest to look up.")
+    where = " AND ".join(f"{column} = ?" for column, _ in conditions)
+    conn = sqlite3.connect(f"{index_path.resolve().as_uri()}?mode=ro", uri=True)
+    try:
+        rows = conn.execute(
+            f"SELECT {', '.join(_COLUMNS)} FROM queries WHERE {where} ORDER BY id",
+            [value for _, value in conditions],
+        ).fetchall()
+    finally:
+        conn.close()
+    return [dict(zip(_COLUMNS, row)) for row in rows]
+
+
+def read_query_output(run_dir: Path, row: Dict[str, Any]) -> Dict[str, Any]:
+    """Load the query JSON an index row points at, seeking straight to it in a shard."""
+    if row["shard_file"] is not None:
+        with (run_dir / OUTPUT_DIR_NAME / row["shard_file"]).open("rb") as handle:
+            handle.seek(row["byte_offset"])
+            return json.loads(handle.read(row["byte_length"]))
+    path = run_dir / row["folder"] / row["raw_output_file"]
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+__all__ = [
+    "RUN_INDEX_NAME",
+    "RunIndex",
+    "lookup_queries",
+    "read_query_output",
+]
@@ -0,0 +1,187 @@
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+from typing import IO, Any, Dict, Optional, Set, Tuple
+
+from parse_backends import LineagePayloadResult, ParseAttempt
+
+MANIFEST_NAME = "[[]]manifest.jsonl"
+MANIFEST_VERSION = 1
+
+
+class RunManifest:
+    """Append-only log of the queries a run has completed.
+
+    The first line holds the settings the run parsed with. Every completed query
+    then adds one line with its identifier, SQL digest, output file and the parser
+    attempt (payload, timing, error) needed to rebuild its outcome. Lines are
+    flushed as they are written, so a run that dies keeps everything it finished.
+    Queries in ``completed`` are already in the file and are not written again.
+    A sharded run also records its ``I/N`` shard in the first line.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        settings: Dict[str, Any],
+        *,
+        completed: Optional[Set[Tuple[str, str]]] = None,
+        shard: Optional[str] = None,
+    ):
+        self.path = path
+        self.completed = completed or set()
+        append = bool(completed) and path.exists()
+        if append:
+            _drop_partial_line(path)
+        self._handle: IO[str] = path.open("a" if append else "w", encoding="utf-8")
+        if not append:
+            header: Dict[str, Any] = {"manifest_version": MANIFEST_VERSION, "settings": settings}
+            if shard is not None:
+                header["shard"] = shard
+            self._write(header)
+
+    def _write(self, record: Dict[str, Any]) -> None:
+        self._handle.write(json.dumps(record) + "\n")
+        self._handle.flush()
+
+    def record(
+        self,
+        identifier: str,
+        sql_digest: str,
+        source: Path,
+        output: str,
+        attempt: ParseAttempt,
+        duplicate_of: Optional[str] = None,
+    ) -> None:
+        if (identifier, sql_digest) in self.completed:
+            return
+        self._write(
+            {
+                "identifier": identifier,
+                "sql_digest": sql_digest,
+                "source": str(source),
+                "output": output,
+                "timing_ms": attempt.elapsed_ms,
+                "error": attempt.error,
+                "timed_out": attempt.timed_out,
+                "cached": attempt.cached,
+                "cached_timing_ms": attempt.cached_timing_ms,
+                "skipped_as": attempt.skipped_as,
+                "retries": attempt.retries,
+                "duplicate_of": duplicate_of,
+                "payload": attempt.payload,
+            }
+        )
+
+    def close(self) -> None:
+        self._handle.close()
+
+
+def _drop_partial_line(path: Path) -> None:
+    # A run killed mid-write leaves a last line without its newline; cut it off so
+    # the next record starts on a line of its own.
+    with path.open("r+b") as handle:
+        end = handle.seek(0, os.SEEK_END)
+        while end > 0:
+            start = max(0, end - 4096)
+            handle.seek(start)
+            newline = handle.read(end - start).rfind(b"\n")
+            if newline >= 0:
+                end = start + newline + 1
+                break
+            end = start
+        handle.truncate(end)
+
+
+def read_manifest_header(run_dir: Path) -> Dict[str, Any]:
+    """Return the first line of ``run_dir``'s manifest: version, settings and shard."""
+    path = run_dir / MANIFEST_NAME
+    with path.open("rb") as handle:
+        try:
+            header = json.loads(handle.readline())
+        except ValueError:
+            header = {}
+    if not isinstance(header, dict) or header.get("manifest_version") != MANIFEST_VERSION:
+        raise ValueError(f"{path} is not a run manifest this version can read.")
+    return header
+
+
+class ManifestReplay:
+    """Serves the recorded attempts of an earlier run's manifest.
+
+    Only the byte offset of each query's line is kept in memory; the line itself is
+    read back when the query is replayed. A query is replayed when its identifier
+    and SQL digest both match and its recorded attempt reached the parser (or was
+    skipped by triage); RPC errors and client-side timeouts are sent again.
+    """
+
+    def __init__(self, run_dir: Path, settings: Dict[str, Any]):
+        self.path = run_dir / MANIFEST_NAME
+        self.reused = 0
+        # Every source a query was recorded for, which is every source the run wrote.
+        self.sources: Set[str] = set()
+        self._offsets: Dict[Tuple[str, str], int] = {}
+        header = read_manifest_header(run_dir)
+        self.shard: Optional[str] = header.get("shard")
+        with self.path.open("rb") as handle:
+            handle.readline()
+            if header.get("settings") != settings:
+                raise ValueError(
+                    f"{run_dir} was produced with different parse settings "
+                    f"({header.get('settings')}); its results cannot be reused."
+                )
+            offset = handle.tell()
+            for line in handle:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # A run killed mid-write leaves a truncated last line.
+                    break
+                self.sources.add(record["source"])
+                if record.get("error") is None:
+                    self._offsets[(record["identifier"], record["sql_digest"])] = offset
+                else:
+                    self._offsets.pop((record["identifier"], record["sql_digest"]), None)
+                offset += len(line)
+        self._handle: Optional[IO[bytes]] = None
+
+    @property
+    def completed(self) -> Set[Tuple[str, str]]:
+        return set(self._offsets)
+
+    def reusable(self, identifier: str, sql_digest: str) -> bool:
+        return (identifier, sql_digest) in self._offsets
+
+    def replay(self, identifier: str, sql_digest: str) -> Tuple[ParseAttempt, Optional[str]]:
+        """Rebuild the recorded ``(attempt, duplicate_of)`` of a reusable query."""
+        if self._handle is None:
+            self._handle = self.path.open("rb")
+        self._handle.seek(self._offsets[(identifier, sql_digest)])
+        record = json.loads(self._handle.readline())
+        payload = record["payload"]
+        self.reused += 1
+        attempt = ParseAttempt(
+            result=None if record["skipped_as"] else LineagePayloadResult(payload),
+            payload=payload,
+            elapsed_ms=record["timing_ms"],
+            cached=record["cached"],
+            cached_timing_ms=record.get("cached_timing_ms"),
+            skipped_as=record["skipped_as"],
+            retries=record["retries"],
+        )
+        return attempt, record["duplicate_of"]
+
+    def close(self) -> None:
+        if self._handle is not None:
+            self._handle.close()
+            self._handle = None
+
+
+__all__ = [
+    "MANIFEST_NAME",
+    "ManifestReplay",
+    "RunManifest",
+    "read_manifest_header",
+]
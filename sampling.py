@@ -0,0 +1,229 @@
+from __future__ import annotations
+
+import hashlib
+import heapq
+import math
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Generic, List, Sequence, Set, Tuple, TypeVar
+
+_T = TypeVar("_T")
+
+Stratum = Tuple[str, str]
+
+# Two-sided 95% normal quantile; every interval in a sample report uses it.
+CONFIDENCE = 0.95
+_Z = 1.959963984540054
+
+
+def sample_key(seed: int, identifier: str) -> float:
+    """A uniform value in [0, 1) fixed by ``seed`` and ``identifier``."""
+    digest = hashlib.sha1(f"{seed}:{identifier}".encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big") / 2**64
+
+
+@dataclass
+class _StratumPool(Generic[_T]):
+    population: int = 0
+    # Max-heap (negated keys) of the smallest keys seen: (-key, arrival, item).
+    kept: List[Tuple[float, int, _T]] = field(default_factory=list)
+
+
+class StratifiedSampler(Generic[_T]):
+    """Draws a stratified random sample of about ``size`` items in one pass.
+
+    Items are grouped by stratum, and each gets a pseudo-random key from ``seed`` and
+    its identifier. Each stratum keeps its ``size`` smallest keys, which covers any
+    allocation it can get, so items should be small: identifiers rather than whole
+    statements. Once every item has been seen, the sample is allocated
+    across strata in proportion to their populations (largest remainder). Each
+    stratum gets at least ``min_per_stratum`` items so its rates have a variance.
+    Within a stratum the items with the smallest keys are taken, which is a simple
+    random sample that does not depend on input order.
+    """
+
+    def __init__(self, size: int, seed: int = 0, min_per_stratum: int = 2):
+        self.size = size
+        self.seed = seed
+        self.min_per_stratum = min_per_stratum
+        self._pools: Dict[Stratum, _StratumPool[_T]] = defaultdict(_StratumPool)
+        self._arrivals = 0
+
+    def add(self, item: _T, identifier: str, stratum: Stratum) -> None:
+        pool = self._pools[stratum]
+        pool.population += 1
+        entry = (-sample_key(self.seed, identifier), self._arrivals, item)
+        self._arrivals += 1
+        if len(pool.kept) < self.size:
+            heapq.heappush(pool.kept, entry)
+        elif entry[0] > pool.kept[0][0]:
+            heapq.heapreplace(pool.kept, entry)
+
+    @property
+    def populations(self) -> Dict[Stratum, int]:
+        return {stratum: pool.population for stratum, pool in self._pools.items()}
+
+    def allocation(self) -> Dict[Stratum, int]:
+        populations = self.populations
+        total = sum(populations.values())
+        if total <= self.size:
+            return dict(populations)
+        shares = {stratum: self.size * count / total for stratum, count in populations.items()}
+        allocated = {stratum: int(share) for stratum, share in shares.items()}
+        leftover = self.size - sum(allocated.values())
+        by_remainder = sorted(
+            shares, key=lambda stratum: (allocated[stratum] - shares[stratum], stratum)
+        )
+        for stratum in by_remainder[:leftover]:
+            allocated[stratum] += 1
+        return {
+            stratum: min(populations[stratum], max(count, self.min_per_stratum))
+            for stratum, count in allocated.items()
+        }
+
+    def sample(self) -> List[Tuple[_T, Stratum]]:
+        """The sampled items with their strata, in the order they were added."""
+        chosen: List[Tuple[int, _T, Stratum]] = []
+        for stratum, count in self.allocation().items():
+            smallest = heapq.nlargest(count, self._pools[stratum].kept)
+            chosen.extend((arrival, item, stratum) for _, arrival, item in smallest)
+        chosen.sort(key=lambda entry: entry[0])
+        return [(item, stratum) for _, item, stratum in chosen]
+
+
+def wilson_interval(successes: int, trials: int) -> Tuple[float, float]:
+    """95% Wilson score interval of a proportion; stays inside [0, 1] for small samples."""
+    if not trials:
+        return 0.0, 1.0
+    p = successes / trials
+    denominator = 1 + _Z**2 / trials
+    centre = (p + _Z**2 / (2 * trials)) / denominator
+    margin = _Z * math.sqrt(p * (1 - p) / trials + _Z**2 / (4 * trials**2)) / denominator
+    return max(0.0, centre - margin), min(1.0, centre + margin)
+
+
+def _proportion(count: int, trials: int) -> Dict[str, float]:
+    low, high = wilson_interval(count, trials)
+    return {"estimate": count / trials if trials else 0.0, "low": low, "high": high}
+
+
+def _interval(
+    estimate: float, variance: float, low: float = 0.0, high: float = math.inf
+) -> Dict[str, float]:
+    margin = _Z * math.sqrt(max(variance, 0.0))
+    return {
+        "estimate": estimate,
+        "low": max(low, estimate - margin),
+        "high": min(high, estimate + margin),
+    }
+
+
+@dataclass
+class _StratumOutcomes:
+    parsed: int = 0
+    succeeded: int = 0
+    flags: Dict[str, int] = field(default_factory=lambda: defaultdict(int))
+    timing_total: float = 0.0
+    timing_squares: float = 0.0
+
+
+class SampleReport:
+    """Estimates full-run rates and parser time from the outcomes of a sample.
+
+    Each stratum reports its success and flag rates with Wilson intervals. Run-wide
+    rates are stratified estimates, weighted by stratum population, with normal
+    intervals built from Agresti-Coull stratum variances and the finite population
+    correction. Projected parser time
+    is the sum over strata of population times mean ``timing_ms``.
+    """
+
+    def __init__(self, sampler: StratifiedSampler[Any], strata: Dict[str, Stratum]):
+        self.seed = sampler.seed
+        self.populations = sampler.populations
+        self._strata = strata
+        self._outcomes: Dict[Stratum, _StratumOutcomes] = defaultdict(_StratumOutcomes)
+        self._flags: Set[str] = set()
+
+    def add(
+        self, identifier: str, succeeded: bool, flags: Sequence[str], timing_ms: float
+    ) -> None:
+        outcomes = self._outcomes[self._strata[identifier]]
+        outcomes.parsed += 1
+        outcomes.succeeded += bool(succeeded)
+        for flag in set(flags):
+            outcomes.flags[flag] += 1
+            self._flags.add(flag)
+        outcomes.timing_total += timing_ms
+        outcomes.timing_squares += timing_ms * timing_ms
+
+    def _rate(self, count_of: Callable[[_StratumOutcomes], int]) -> Dict[str, float]:
+        population = sum(self.populations.values())
+        estimate = variance = 0.0
+        for stratum, outcomes in self._outcomes.items():
+            n, size = outcomes.parsed, self.populations[stratum]
+            weight = size / population
+            count = count_of(outcomes)
+            estimate += weight * count / n
+            if n < size:
+                # Agresti-Coull adjusted, so a stratum with no failures in its sample
+                # still widens the interval instead of claiming certainty.
+                adjusted_n = n + _Z**2
+                adjusted_p = (count + _Z**2 / 2) / adjusted_n
+                spread = adjusted_p * (1 - adjusted_p) / adjusted_n
+                variance += weight**2 * (1 - n / size) * spread
+        return _interval(estimate, variance, 0.0, 1.0)
+
+    def summary(self, elapsed_s: float) -> Dict[str, Any]:
+        flags = sorted(self._flags)
+        strata: List[Dict[str, Any]] = []
+        projected_ms = projected_variance = sampled_ms = 0.0
+        for stratum, outcomes in self._outcomes.items():
+            n, size = outcomes.parsed, self.populations[stratum]
+            mean = outcomes.timing_total / n
+            projected_ms += size * mean
+            sampled_ms += outcomes.timing_total
+            if n > 1 and n < size:
+                sample_variance = (outcomes.timing_squares - n * mean * mean) / (n - 1)
+                projected_variance += size**2 * (1 - n / size) * sample_variance / n
+            strata.append(
+                {
+                    "folder": stratum[0],
+                    "statement_type": stratum[1],
+                    "population": size,
+                    "sampled": n,
+                    "success_rate": _proportion(outcomes.succeeded, n),
+                    "flag_rates": {flag: _proportion(outcomes.flags[flag], n) for flag in flags},
+                    "timing_ms_avg": mean,
+                }
+            )
+        strata.sort(
+            key=lambda entry: (-entry["population"], entry["folder"], entry["statement_type"])
+        )
+        projected_timing = _interval(projected_ms, projected_variance, 0.0)
+        # Wall-clock time scales with parser time at the throughput this run achieved.
+        scale = elapsed_s / sampled_ms if sampled_ms else 0.0
+        return {
+            "seed": self.seed,
+            "confidence": CONFIDENCE,
+            "population": sum(self.populations.values()),
+            "sampled": sum(outcomes.parsed for outcomes in self._outcomes.values()),
+            "strata_count": len(self.populations),
+            "success_rate": self._rate(lambda outcomes: outcomes.succeeded),
+            "flag_rates": {
+                flag: self._rate(lambda outcomes, flag=flag: outcomes.flags[flag])
+                for flag in flags
+            },
+            "projected_timing_ms": projected_timing,
+            "projected_wall_s": {key: value * scale for key, value in projected_timing.items()},
+            "sample_wall_s": elapsed_s,
+            "strata": strata,
+        }
+
+
+__all__ = [
+    "CONFIDENCE",
+    "SampleReport",
+    "StratifiedSampler",
+    "sample_key",
+    "wilson_interval",
+]
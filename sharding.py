@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import hashlib
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from run_manifest import MANIFEST_NAME, read_manifest_header
+
+
+def shard_of(identifier: str, count: int) -> int:
+    """The 1-based shard of ``count`` that owns ``identifier``, stable across hosts."""
+    digest = hashlib.sha1(identifier.encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big") % count + 1
+
+
+@dataclass(frozen=True)
+class ShardSpec:
+    """Shard ``index`` of ``count`` (1-based), as given to ``--shard I/N``."""
+
+    index: int
+    count: int
+
+    @classmethod
+    def parse(cls, spec: str) -> "ShardSpec":
+        index, separator, count = spec.partition("/")
+        try:
+            shard = cls(index=int(index), count=int(count))
+        except ValueError:
+            separator = ""
+        if not separator or not 1 <= shard.index <= shard.count:
+            raise ValueError(f"Shard must look like I/N with 1 <= I <= N, got {spec!r}.")
+        return shard
+
+    def __str__(self) -> str:
+        return f"{self.index}/{self.count}"
+
+    def owns(self, identifier: str) -> bool:
+        return shard_of(identifier, self.count) == self.index
+
+
+def _comparable_settings(settings: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    # Each shard may talk to its own GMS replica; only the kind of parser must agree.
+    if not settings or not isinstance(settings.get("parser"), str):
+        return settings
+    return {**settings, "parser": settings["parser"].split(":", 1)[0]}
+
+
+def check_shard_runs(run_dirs: Sequence[Path]) -> List[Tuple[ShardSpec, Path]]:
+    """Check that ``run_dirs`` are the complete set of shards of one sharded run.
+
+    Every directory must hold the manifest of a ``--shard`` run; all shards must
+    share the shard count and parse settings (apart from the GMS server each one
+    used), and each index must appear exactly once. Returns the runs ordered by
+    shard index; raises ``ValueError`` otherwise.
+    """
+    runs: List[Tuple[ShardSpec, Path]] = []
+    settings = None
+    for run_dir in run_dirs:
+        if not (run_dir / MANIFEST_NAME).is_file():
+            raise ValueError(f"{run_dir} has no {MANIFEST_NAME}; is it a run directory?")
+        header = read_manifest_header(run_dir)
+        if not header.get("shard"):
+            raise ValueError(f"{run_dir} was not run with --shard.")
+        if settings is None:
+            settings = _comparable_settings(header.get("settings"))
+        elif _comparable_settings(header.get("settings")) != settings:
+            raise ValueError(
+                f"{run_dir} was parsed with different settings ({header.get('settings')}) "
+                f"than {runs[0][1]} ({settings})."
+            )
+        runs.append((ShardSpec.parse(header["shard"]), run_dir))
+    if not runs:
+        raise ValueError("No shard runs given.")
+    count = runs[0][0].count
+    if any(shard.count != count for shard, _ in runs):
+        raise ValueError("The runs were split into different numbers of shards.")
+    seen = [shard.index for shard, _ in runs]
+    duplicates = sorted({index for index in seen if seen.count(index) > 1})
+    missing = sorted(set(range(1, count + 1)) - set(seen))
+    if duplicates:
+        raise ValueError(f"Shard(s) {', '.join(map(str, duplicates))} given more than once.")
+    if missing:
+        raise ValueError(f"Missing shard(s) {', '.join(f'{i}/{count}' for i in missing)}.")
+    return sorted(runs, key=lambda run: run[0].index)
+
+
+__all__ = [
+    "ShardSpec",
+    "check_shard_runs",
+    "shard_of",
+]
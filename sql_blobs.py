@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+import sqlite3
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+BLOB_STORE_NAME = "[[]]sql.sqlite3"
+
+
+def preview_lines(label: str, text: str, max_lines: Optional[int] = None) -> List[str]:
+    """``label ::`` followed by the statement's lines, indented, as the transcripts show it."""
+    lines = [line.rstrip() for line in text.strip().splitlines()]
+    if max_lines is not None:
+        lines = lines[:max_lines]
+    formatted: List[str] = [f"{label} ::"]
+    if not lines:
+        formatted.append("    <empty>")
+        return formatted
+    for line in lines:
+        formatted.append(f"    {line}" if line else "    ")
+    return formatted
+
+
+class SqlBlobStore:
+    """Content-addressed store of the SQL texts of one run.
+
+    Each distinct text is stored once in a single SQLite file, so a run of many short
+    statements does not cost a file each. A text is keyed by the content digest of its
+    exact characters (``parse_cache.content_digest``), its ``sql_blob``, so every
+    statement reads back as it was written. The statement's SQL digest, which ignores
+    whitespace outside quotes and comments, is kept alongside for lookups by
+    ``blobs_for_digest``. Query JSON and report entries refer to a text by its
+    ``sql_blob``, and previews are rendered from the stored text when the reports are.
+    """
+
+    def __init__(self, path: Path, *, commit_every: int = 500):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self.commit_every = max(1, commit_every)
+        self.references = 0
+        self.blobs_written = 0
+        self.bytes_written = 0
+        self._pending_writes = 0
+        self._conn = sqlite3.connect(str(path))
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS sql_blobs "
+            "(blob TEXT PRIMARY KEY, sql_digest TEXT NOT NULL, sql TEXT NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS sql_blobs_by_digest ON sql_blobs (sql_digest)"
+        )
+
+    def put(self, blob: str, sql_digest: str, text: str) -> None:
+        """Store ``text`` under ``blob``, the digest of its exact text, unless present."""
+        self.references += 1
+        cursor = self._conn.execute(
+            "INSERT OR IGNORE INTO sql_blobs (blob, sql_digest, sql) VALUES (?, ?, ?)",
+            (blob, sql_digest, text),
+        )
+        if cursor.rowcount:
+            self.blobs_written += 1
+            self.bytes_written += len(text.encode("utf-8"))
+            self._pending_writes += 1
+            if self._pending_writes >= self.commit_every:
+                self._conn.commit()
+                self._pending_writes = 0
+
+    def get(self, blob: str) -> Optional[str]:
+        row = self._conn.execute("SELECT sql FROM sql_blobs WHERE blob = ?", (blob,)).fetchone()
+        return row[0] if row else None
+
+    def blobs_for_digest(self, sql_digest: str) -> List[str]:
+        """The keys of every stored text whose SQL digest is ``sql_digest``."""
+        rows = self._conn.execute(
+            "SELECT blob FROM sql_blobs WHERE sql_digest = ? ORDER BY rowid", (sql_digest,)
+        )
+        return [row[0] for row in rows]
+
+    def preview_lines(
+        self, blob: str, label: str, max_lines: Optional[int] = None
+    ) -> List[str]:
+        """Render the preview of a stored statement, for readers of the reports."""
+        text = self.get(blob)
+        if text is None:
+            raise KeyError(f"No SQL stored under {blob} in {self.path}.")
+        return preview_lines(label, text, max_lines)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "path": str(self.path),
+            "references": self.references,
+            "blobs": self.blobs_written,
+            "bytes": self.bytes_written,
+        }
+
+    def close(self) -> None:
+        self._conn.commit()
+        self._conn.close()
+
+
+__all__ = [
+    "BLOB_STORE_NAME",
+    "SqlBlobStore",
+    "preview_lines",
+]
@@ -0,0 +1,234 @@
+from __future__ import annotations
+
+import mmap
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import IO, Iterator, List, Tuple, Union
+
+Buffer = Union[bytes, bytearray, memoryview, mmap.mmap]
+
+_WORD_EDGE_AFTER = rb"(?![A-Za-z0-9_$#])"
+# Whitespace and comments. Each branch can match a given position in one way only:
+# one whitespace character, a line comment up to its newline, a block comment up to
+# its terminator (or the end of the input). A failed match after a run of trivia
+# then backtracks in linear time instead of trying every way of dividing the run
+# between the branches.
+_TRIVIA_SOURCE = r"(?:\s|--[^\n]*(?![^\n])|/\*(?:[^*]|\*(?!/))*(?:\*/|\Z))*"
+_TRIVIA = _TRIVIA_SOURCE.encode("ascii")
+_TEXT_TRIVIA_PATTERN = re.compile(_TRIVIA_SOURCE)
+
+# Only the tokens that can change the splitter's state are matched; everything else
+# (ordinary words, numbers, operators) is skipped by the regex engine itself. The
+# leading lookahead lets the engine reject most positions on a single character
+# class test instead of trying every alternative, and the keyword branch checks the
+# word edge after its first letter for the same reason.
+_TOKEN_PATTERN = re.compile(
+    rb"(?=[-'\"/;()BbEeCc])(?:"
+    rb"(?P<semicolon>;)"
+    rb"|(?P<open>\()"
+    rb"|(?P<close>\))"
+    rb"|(?P<string>'(?:[^']|'')*'?)"
+    rb'|(?P<ident>"(?:[^"]|"")*"?)'
+    rb"|(?P<comment>--[^\n]*|/\*(?:[^*]|\*(?!/))*(?:\*/)?)"
+    rb"|(?P<keyword>[BbEeCc](?<![A-Za-z0-9_$#].)"
+    rb"(?:(?<=[Bb])[Ee][Gg][Ii][Nn]|(?<=[Ee])[Nn][Dd]|(?<=[Cc])[Aa][Ss][Ee])"
+    + _WORD_EDGE_AFTER
+    + rb"))",
+    re.S,
+)
+_NEXT_TOKEN_PATTERN = re.compile(_TRIVIA + rb"([A-Za-z_][A-Za-z0-9_$#]*|.)?", re.S)
+_ROUTINE_HEAD_PATTERN = re.compile(
+    _TRIVIA
+    + rb"(?:CREATE|REPLACE)(?:\s+OR\s+REPLACE)?\s+(?:PROCEDURE|FUNCTION|TRIGGER)"
+    + _WORD_EDGE_AFTER,
+    re.I,
+)
+_LEADING_TRIVIA_PATTERN = re.compile(_TRIVIA)
+_LEADING_SPACE_PATTERN = re.compile(rb"\s*")
+
+# BEGIN followed by one of these is a statement (BEGIN TRANSACTION, BEGIN QUERY
+# LOGGING, ...) rather than the start of a compound block.
+_BEGIN_STATEMENT_WORDS = {b"TRANSACTION", b"TRAN", b"WORK", b"QUERY", b"LOGGING", b"ISOLATED"}
+# END followed by one of these closes a control-flow construct whose body already
+# sits inside a BEGIN ... END block, so the block depth does not change.
+_END_CONTROL_WORDS = {b"IF", b"LOOP", b"WHILE", b"FOR", b"REPEAT"}
+
+
+@dataclass(frozen=True)
+class StatementSpan:
+    """One statement and where it sits in the input, as byte offsets.
+
+    ``start`` is the first byte of the statement (leading comments included) and
+    ``end`` is one past its last byte; the terminating ``;`` is not part of it.
+    """
+
+    start: int
+    end: int
+    text: str
+
+
+def skip_trivia(text: str, pos: int = 0) -> int:
+    """The offset of the first character at or after ``pos`` that is not whitespace or
+    part of a ``--`` or ``/* */`` comment."""
+    return _TEXT_TRIVIA_PATTERN.match(text, pos).end()
+
+
+def _next_word(buffer: Buffer, pos: int) -> bytes:
+    match = _NEXT_TOKEN_PATTERN.match(buffer, pos)
+    return (match.group(1) or b"").upper() if match else b""
+
+
+def _span(buffer: Buffer, start: int, end: int) -> Iterator[StatementSpan]:
+    if _LEADING_TRIVIA_PATTERN.match(buffer, start, end).end() == end:
+        # Nothing but whitespace and comments before the terminator.
+        return
+    start = _LEADING_SPACE_PATTERN.match(buffer, start, end).end()
+    raw = bytes(buffer[start:end]).rstrip()
+    yield StatementSpan(start=start, end=start + len(raw), text=raw.decode("utf-8"))
+
+
+def _iter_terminators(buffer: Buffer) -> Iterator[Tuple[int, int]]:
+    """Yield ``(statement_start, semicolon_offset)`` for every statement-ending ``;``."""
+    statement_start = 0
+    paren_depth = 0
+    blocks: List[bytes] = []
+    # Set by END CASE, whose CASE closes a block rather than opening one.
+    closing_case = False
+    in_routine = bool(_ROUTINE_HEAD_PATTERN.match(buffer, 0))
+    for match in _TOKEN_PATTERN.finditer(buffer):
+        kind = match.lastgroup
+        if kind == "semicolon":
+            if paren_depth or blocks:
+                continue
+            yield statement_start, match.start()
+            statement_start = match.end()
+            in_routine = bool(_ROUTINE_HEAD_PATTERN.match(buffer, statement_start))
+        elif kind == "open":
+            paren_depth += 1
+        elif kind == "close":
+            paren_depth = max(0, paren_depth - 1)
+        elif kind == "keyword":
+            keyword = match.group("keyword").upper()
+            if keyword == b"BEGIN":
+                following = _next_word(buffer, match.end())
+                opens_block = following not in _BEGIN_STATEMENT_WORDS | {b";", b""}
+                at_statement_start = (
+                    _LEADING_TRIVIA_PATTERN.match(buffer, statement_start).end()
+                    == match.start()
+                )
+                if opens_block and (in_routine or blocks or at_statement_start):
+                    blocks.append(keyword)
+            elif keyword == b"CASE":
+                if closing_case:
+                    closing_case = False
+                elif blocks:
+                    blocks.append(keyword)
+            elif blocks:
+                following = _next_word(buffer, match.end())
+                if following not in _END_CONTROL_WORDS:
+                    blocks.pop()
+                    closing_case = following == b"CASE"
+
+
+def iter_statement_spans(buffer: Buffer) -> Iterator[StatementSpan]:
+    """Split SQL into statements in a single pass over ``buffer``.
+
+    Semicolons only end a statement outside string literals, quoted identifiers,
+    comments, parentheses (Teradata macro bodies) and ``BEGIN ... END`` blocks of
+    procedure, function and trigger bodies. Chunks that hold nothing but comments
+    are dropped.
+    """
+    tail_start = 0
+    for statement_start, semicolon in _iter_terminators(buffer):
+        yield from _span(buffer, statement_start, semicolon)
+        tail_start = semicolon + 1
+    yield from _span(buffer, tail_start, len(buffer))
+
+
+def iter_stream_statement_spans(
+    stream: IO[bytes], chunk_size: int = 4 * 1024 * 1024
+) -> Iterator[StatementSpan]:
+    """Split SQL read from a binary stream, holding about one chunk in memory.
+
+    Each chunk is appended to the unfinished statement left by the previous one and
+    only statements whose terminating ``;`` is already buffered are emitted; every
+    token they depend on is then complete, so the result matches splitting the whole
+    input at once. A statement longer than the buffer doubles the next read instead
+    of being rescanned chunk after chunk. Offsets count bytes of the stream.
+    """
+    buffer = b""
+    base = 0
+    read_size = chunk_size
+    while True:
+        chunk = stream.read(read_size)
+        if not chunk:
+            break
+        buffer += chunk
+        consumed = 0
+        for statement_start, semicolon in _iter_terminators(buffer):
+            for span in _span(buffer, statement_start, semicolon):
+                yield StatementSpan(start=base + span.start, end=base + span.end, text=span.text)
+            consumed = semicolon + 1
+        if consumed:
+            buffer = buffer[consumed:]
+            base += consumed
+            read_size = chunk_size
+        else:
+            read_size *= 2
+    for span in _span(buffer, 0, len(buffer)):
+        yield StatementSpan(start=base + span.start, end=base + span.end, text=span.text)
+
+
+def split_sql_text_spans(sql_text: str) -> List[StatementSpan]:
+    """Split ``sql_text``; span offsets count bytes of its UTF-8 encoding."""
+    buffer = sql_text.encode("utf-8")
+    if b";" not in buffer:
+        # Nothing to split on; most single-statement CSV cells skip the token scan.
+        return list(_span(buffer, 0, len(buffer)))
+    return list(iter_statement_spans(buffer))
+
+
+def split_sql_text(sql_text: str) -> List[str]:
+    return [span.text for span in split_sql_text_spans(sql_text)]
+
+
+def _universal_newlines(span: StatementSpan) -> StatementSpan:
+    if "\r" not in span.text:
+        return span
+    text = span.text.replace("\r\n", "\n").replace("\r", "\n")
+    return StatementSpan(start=span.start, end=span.end, text=text)
+
+
+def split_sql_file(path: Path) -> Iterator[StatementSpan]:
+    """Split a ``.sql`` file through a read-only memory map.
+
+    Only the statements themselves are copied out of the map, so arbitrarily large
+    dumps are split without being read into memory. Statement text gets universal
+    newlines, as when the file is read in text mode; offsets refer to the raw bytes.
+    """
+    with path.open("rb") as handle:
+        if path.stat().st_size == 0:
+            return
+        with mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            for span in iter_statement_spans(mapped):
+                yield _universal_newlines(span)
+
+
+def split_sql_stream(stream: IO[bytes]) -> Iterator[StatementSpan]:
+    """Split SQL from a stream that cannot be mapped, such as a decompressor."""
+    with stream:
+        for span in iter_stream_statement_spans(stream):
+            yield _universal_newlines(span)
+
+
+__all__ = [
+    "StatementSpan",
+    "iter_statement_spans",
+    "iter_stream_statement_spans",
+    "skip_trivia",
+    "split_sql_file",
+    "split_sql_stream",
+    "split_sql_text",
+    "split_sql_text_spans",
+]
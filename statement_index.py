@@ -0,0 +1,346 @@
+from __future__ import annotations
+
+import csv
+import hashlib
+import io
+import json
+import os
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import IO, Any, Dict, FrozenSet, Iterator, List, Optional, Sequence, Tuple
+
+from input_files import open_binary, open_text
+
+INDEX_VERSION = 4
+# Bytes read from disk at a time when record offsets are not needed.
+CSV_CHUNK_SIZE = 4 * 1024 * 1024
+
+# Exported SQL cells can be far longer than the csv module's 128 KiB default.
+csv.field_size_limit(2**31 - 1)
+
+
+@dataclass(frozen=True)
+class StatementRef:
+    """Where one statement's text lives, so it can be read back on demand.
+
+    For a ``.sql`` file the byte range is the statement itself. For a CSV it is the
+    whole record, and ``cell_start``/``cell_length`` are the statement's bytes within
+    the trimmed cell in ``column_index``, so reading it back never re-splits the cell.
+    """
+
+    path: Path
+    start: int
+    length: int
+    stmt: int = 1
+    column_index: Optional[int] = None
+    delimiter: str = ","
+    cell_start: int = 0
+    cell_length: int = 0
+
+    def read(self) -> str:
+        with self.path.open("rb") as handle:
+            handle.seek(self.start)
+            raw = handle.read(self.length).decode("utf-8")
+        if self.column_index is None:
+            return raw.replace("\r\n", "\n").replace("\r", "\n")
+        record = next(csv.reader(io.StringIO(raw, newline=""), delimiter=self.delimiter), [])
+        cell = record[self.column_index] if self.column_index < len(record) else ""
+        statement = cell.strip().encode("utf-8")[
+            self.cell_start : self.cell_start + self.cell_length
+        ]
+        return statement.decode("utf-8")
+
+
+@dataclass(frozen=True)
+class IndexedStatement:
+    ref: StatementRef
+    row: int
+    stmt: int
+    digest: str
+    metrics: Tuple[int, ...]
+    statement_type: str
+
+
+@dataclass(frozen=True)
+class CsvRecord:
+    row: int
+    start: int
+    length: int
+    values: List[str]
+
+
+@dataclass(frozen=True)
+class CsvRowFilter:
+    """Keeps the CSV rows whose ``column`` holds one of ``values``.
+
+    Values are compared trimmed and case-insensitively, so ``StatementType=insert``
+    matches a cell holding ``Insert ``.
+    """
+
+    column: str
+    values: FrozenSet[str]
+
+    @classmethod
+    def parse(cls, spec: str) -> "CsvRowFilter":
+        column, separator, listed = spec.partition("=")
+        values = frozenset(value.strip().lower() for value in listed.split(",") if value.strip())
+        if not separator or not column.strip() or not values:
+            raise ValueError(f"Row filter must look like COLUMN=VALUE[,VALUE...], got {spec!r}.")
+        return cls(column=column.strip(), values=values)
+
+    def __str__(self) -> str:
+        return f"{self.column}={','.join(sorted(self.values))}"
+
+    def matches(self, value: str) -> bool:
+        return value.strip().lower() in self.values
+
+
+def iter_csv_records(path: Path, delimiter: str, *, offsets: bool = True) -> Iterator[CsvRecord]:
+    """Read a CSV like ``csv.reader`` while tracking each record's byte range.
+
+    Rows are numbered the way ``csv.DictReader`` sees them: the header is row 1 and
+    blank lines are skipped without taking a number. Compressed inputs are
+    decompressed as they are read, and their offsets count decompressed bytes.
+    With ``offsets=False`` the byte ranges are left at 0 and the file is handed to
+    ``csv.reader`` directly in ``CSV_CHUNK_SIZE`` reads, which is several times faster.
+    """
+    if not offsets:
+        with open_text(path, CSV_CHUNK_SIZE) as text:
+            row = 0
+            for values in csv.reader(text, delimiter=delimiter):
+                if values:
+                    row += 1
+                    yield CsvRecord(row=row, start=0, length=0, values=values)
+        return
+
+    offset = 0
+
+    def _lines(handle: IO[bytes]) -> Iterator[str]:
+        nonlocal offset
+        for line in handle:
+            offset += len(line)
+            yield line.decode("utf-8")
+
+    with open_binary(path, CSV_CHUNK_SIZE) as handle:
+        row = 0
+        start = 0
+        # csv.reader pulls exactly the lines one record needs, so ``offset`` always
+        # sits at the end of the record that was just returned.
+        for values in csv.reader(_lines(handle), delimiter=delimiter):
+            if values:
+                row += 1
+                yield CsvRecord(row=row, start=start, length=offset - start, values=values)
+            start = offset
+
+
+class IndexBuilder:
+    """Collects the statements of one input and commits them as its index.
+
+    The index only replaces the previous one when every statement was recorded and
+    the input did not change while it was being read.
+    """
+
+    def __init__(self, index_path: Path, source: Path, header: Dict[str, Any]):
+        self.index_path = index_path
+        self.source = source
+        self.header = header
+        self._stat = source.stat()
+        self._tmp_path = index_path.with_name(
+            f"{index_path.name}.{os.getpid()}.{threading.get_ident()}.tmp"
+        )
+        self._handle: Optional[IO[str]] = None
+
+    def __enter__(self) -> "IndexBuilder":
+        self.index_path.parent.mkdir(parents=True, exist_ok=True)
+        self._handle = self._tmp_path.open("w", encoding="utf-8")
+        header = dict(
+            self.header, size=self._stat.st_size, mtime_ns=self._stat.st_mtime_ns
+        )
+        self._handle.write(json.dumps(header) + "\n")
+        return self
+
+    def add(
+        self,
+        start: int,
+        length: int,
+        row: int,
+        stmt: int,
+        digest: str,
+        metrics: Sequence[int],
+        statement_type: str,
+        cell_start: int = 0,
+        cell_length: int = 0,
+    ) -> None:
+        assert self._handle is not None
+        self._handle.write(
+            f"{start} {length} {row} {stmt} {digest} {','.join(map(str, metrics))} "
+            f"{statement_type} {cell_start} {cell_length}\n"
+        )
+
+    def __exit__(self, exc_type, exc, traceback) -> None:
+        assert self._handle is not None
+        self._handle.close()
+        current = self.source.stat()
+        unchanged = (current.st_size, current.st_mtime_ns) == (
+            self._stat.st_size,
+            self._stat.st_mtime_ns,
+        )
+        if exc_type is None and unchanged:
+            os.replace(self._tmp_path, self.index_path)
+        else:
+            self._tmp_path.unlink(missing_ok=True)
+
+
+class StatementIndex:
+    """Sidecar indexes of statement offsets, one per input file, kept under ``root``.
+
+    An index records each statement's byte range (and, for a CSV, its range within
+    the cell), row/statement numbers, content digest, caller-defined metrics and
+    statement type. It is only used while the
+    input's size and modification time still match what was recorded, so enumerating
+    the statements of an unchanged input is a read of the index instead of a re-split
+    of the input.
+    """
+
+    def __init__(self, root: Path):
+        self.root = root
+        self.sources_indexed = 0
+        self.sources_built = 0
+        self.statements_indexed = 0
+        # Inputs may be loaded on several threads at once.
+        self._lock = threading.Lock()
+
+    def _index_path(
+        self,
+        source: Path,
+        column: Optional[str],
+        delimiter: str,
+        row_filter: Optional[str] = None,
+    ) -> Path:
+        key_parts = [str(source.resolve()), column, delimiter]
+        if row_filter is not None:
+            key_parts.append(row_filter)
+        key = json.dumps(key_parts)
+        digest = hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+        safe_name = "".join(c if c.isalnum() or c in "-_." else "_" for c in source.name)
+        return self.root / f"{safe_name[:64]}--{digest}.idx"
+
+    def entries(
+        self,
+        source: Path,
+        *,
+        column: Optional[str] = None,
+        delimiter: str = ",",
+        row_filter: Optional[str] = None,
+    ) -> Optional[Iterator[IndexedStatement]]:
+        """Return the indexed statements of ``source``, or ``None`` if the index is stale.
+
+        An index built with a ``row_filter`` only holds the rows that matched it, so
+        the filter is part of what identifies the index.
+        """
+        index_path = self._index_path(source, column, delimiter, row_filter)
+        try:
+            handle = index_path.open(encoding="utf-8")
+        except OSError:
+            return None
+        try:
+            header = json.loads(handle.readline())
+            stat = source.stat()
+        except (OSError, ValueError):
+            handle.close()
+            return None
+        if (
+            header.get("version") != INDEX_VERSION
+            or header.get("size") != stat.st_size
+            or header.get("mtime_ns") != stat.st_mtime_ns
+        ):
+            handle.close()
+            return None
+        with self._lock:
+            self.sources_indexed += 1
+        return self._read_entries(handle, source, header)
+
+    def _read_entries(
+        self, handle: IO[str], source: Path, header: Dict[str, Any]
+    ) -> Iterator[IndexedStatement]:
+        column_index = header.get("column_index")
+        delimiter = header.get("delimiter") or ","
+        read = 0
+        try:
+            with handle:
+                for line in handle:
+                    (
+                        start,
+                        length,
+                        row,
+                        stmt,
+                        digest,
+                        metrics,
+                        statement_type,
+                        cell_start,
+                        cell_length,
+                    ) = line.split()
+                    read += 1
+                    yield IndexedStatement(
+                        ref=StatementRef(
+                            path=source,
+                            start=int(start),
+                            length=int(length),
+                            stmt=int(stmt),
+                            column_index=column_index,
+                            delimiter=delimiter,
+                            cell_start=int(cell_start),
+                            cell_length=int(cell_length),
+                        ),
+                        row=int(row),
+                        stmt=int(stmt),
+                        digest=digest,
+                        metrics=tuple(int(value) for value in metrics.split(",")),
+                        statement_type=statement_type,
+                    )
+        finally:
+            with self._lock:
+                self.statements_indexed += read
+
+    def builder(
+        self,
+        source: Path,
+        *,
+        column: Optional[str] = None,
+        column_index: Optional[int] = None,
+        delimiter: str = ",",
+        row_filter: Optional[str] = None,
+    ) -> IndexBuilder:
+        with self._lock:
+            self.sources_built += 1
+        header = {
+            "version": INDEX_VERSION,
+            "source": str(source),
+            "column": column,
+            "column_index": column_index,
+            "delimiter": delimiter,
+            "row_filter": row_filter,
+        }
+        index_path = self._index_path(source, column, delimiter, row_filter)
+        return IndexBuilder(index_path, source, header)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "index_dir": str(self.root),
+            "sources_from_index": self.sources_indexed,
+            "sources_indexed": self.sources_built,
+            "statements_from_index": self.statements_indexed,
+        }
+
+
+__all__ = [
+    "CSV_CHUNK_SIZE",
+    "CsvRecord",
+    "CsvRowFilter",
+    "IndexBuilder",
+    "IndexedStatement",
+    "StatementIndex",
+    "StatementRef",
+    "iter_csv_records",
+]
@@ -0,0 +1,29 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import List, Tuple
+
+from dbql import iter_dbql_queries
+
+
+def _export(tmp_path: Path, rows: List[Tuple[str, int, str]]) -> Path:
+    path = tmp_path / "dbql.csv"
+    lines = ["QueryID,SqlRowNo,SqlTextInfo"]
+    lines += [f'{query_id},{row_no},"{text}"' for query_id, row_no, text in rows]
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    return path
+
+
+def test_query_split_by_the_window_is_incomplete_on_both_sides(tmp_path: Path) -> None:
+    export = _export(
+        tmp_path,
+        [("1", 1, "SELECT a "), ("2", 1, "SELECT b "), ("2", 2, "FROM t2"), ("1", 2, "FROM t1")],
+    )
+    queries = list(iter_dbql_queries(export, window=1))
+    summary = [(q.query_id, q.sql_text, q.first_row_no, q.complete) for q in queries]
+    assert summary == [
+        ("1", "SELECT a ", 1, False),
+        ("2", "SELECT b FROM t2", 1, True),
+        ("1", "FROM t1", 2, False),
+    ]
+
@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import json
+import random
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, List
+
+import pytest
+
+from outcome_columns import OutcomeColumns, load_columns, report_from_columns
+from report_utils import ReportAccumulator
+
+pytest.importorskip("numpy")
+
+_FLAG_PRIORITY = ["ERR", "GAP", "LIN", "COL", "SELF"]
+
+
+def _outcomes(count: int, seed: int = 7) -> List[Any]:
+    rng = random.Random(seed)
+    outcomes = []
+    for index in range(count):
+        parser_error = rng.choice([None, None, "Unsupported syntax", "Timeout in parser"])
+        outcomes.append(
+            SimpleNamespace(
+                task=SimpleNamespace(
+                    source_path=Path(f"queries/{rng.randrange(3)}.sql"),
+                    identifier=f"queries/q.sql:{index + 1}",
+                ),
+                statement_type=rng.choice(["SELECT", "INSERT", "MERGE", None]),
+                statement_type_source=rng.choice(["parser", "heuristic", None]),
+                parser_statement_type=rng.choice(["SELECT", "INSERT", None]),
+                raw_payload=rng.choice(
+                    [{}, {"debugInfoError": "Table t not found"}, {"debugInfoError": "Bad"}]
+                ),
+                parser_error=parser_error,
+                # Repeated flags are counted once per run but every time per type.
+                flags=rng.choice([[], ["LIN"], ["ERR", "GAP"], ["LIN", "COL", "LIN"]]),
+                succeeded=parser_error is None,
+                rpc_error=rng.random() < 0.1,
+                timeout_error=rng.random() < 0.05,
+                skipped=rng.random() < 0.05,
+                duplicate_of=None if rng.random() < 0.8 else "queries/q.sql:1",
+                timing_ms=rng.lognormvariate(2.0, 1.5),
+            )
+        )
+    return outcomes
+
+
+def _rendered(report: ReportAccumulator) -> str:
+    # json.dumps keeps dict order, so keys must appear in the same order too.
+    return json.dumps(
+        {
+            "overview": report.overview(),
+            "debug_errors": report.debug_error_summary(),
+            "statement_types": report.statement_type_metrics(_FLAG_PRIORITY),
+            "flag_set": sorted(report.flag_set),
+        }
+    )
+
+
+@pytest.mark.parametrize("count", [0, 1, 2, 501])
+def test_columnar_report_matches_accumulator(count: int, tmp_path: Path) -> None:
+    outcomes = _outcomes(count)
+    expected = ReportAccumulator(timing_exact_limit=None).extend(outcomes)
+    columns = OutcomeColumns()
+    for outcome in outcomes:
+        columns.add(outcome, sql_digest="0" * 64)
+
+    assert _rendered(report_from_columns(columns.arrays())) == _rendered(expected)
+    saved = tmp_path / "outcomes.npz"
+    columns.save(saved)
+    assert _rendered(report_from_columns(load_columns(saved))) == _rendered(expected)
@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("datahub")
+
+from parse_sql_minimal import _build_source_folder_name, _clear_run_outputs  # noqa: E402
+
+
+def test_resume_clears_only_the_folders_of_recorded_sources(tmp_path: Path) -> None:
+    recorded = "queries/recorded.sql"
+    unrecorded = "queries/unrecorded.sql"
+    recorded_folder = _build_source_folder_name(Path(recorded), [])
+    unrecorded_folder = _build_source_folder_name(Path(unrecorded), [])
+    for name in (
+        f"[ERR][GAP]{recorded_folder}",
+        f".partial-{recorded_folder}",
+        f"[LIN]{unrecorded_folder}",
+        "notes",
+    ):
+        (tmp_path / name).mkdir()
+    (tmp_path / "[[]]report.json").write_text("{}", encoding="utf-8")
+    (tmp_path / "keep.txt").write_text("", encoding="utf-8")
+
+    _clear_run_outputs(tmp_path, [recorded])
+
+    assert sorted(child.name for child in tmp_path.iterdir()) == [
+        "[LIN]" + unrecorded_folder,
+        "keep.txt",
+        "notes",
+    ]
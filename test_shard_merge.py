@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import Any, Dict, List
+
+import pytest
+
+from report_utils import iter_report_queries
+
+pytest.importorskip("datahub")
+
+from parse_sql_minimal import RUN_REPORT_NAME, _merge_shard_runs  # noqa: E402
+from sharding import ShardSpec  # noqa: E402
+
+
+def _entry(identifier: str, statement_type: str, timing_ms: float, ok: bool) -> Dict[str, Any]:
+    return {
+        "identifier": identifier,
+        "flags": ["LIN"] if ok else ["ERR"],
+        "raw_output_file": f"{identifier}.json",
+        "succeeded": ok,
+        "timing_ms": timing_ms,
+        "statement_type": statement_type,
+        "statement_type_source": "parser",
+        "parser_statement_type": statement_type,
+        "duplicate_of": None,
+        "parser_error": None if ok else "Unsupported syntax",
+        "rpc_error": None,
+        "timeout_error": None,
+        "skipped": False,
+        "debug_info_error": "<none>" if ok else "Unsupported syntax",
+    }
+
+
+def _shard_run(run_dir: Path, entries: List[Dict[str, Any]]) -> Path:
+    run_dir.mkdir()
+    report = {"query_count": len(entries), "queries": entries}
+    (run_dir / RUN_REPORT_NAME).write_text(json.dumps(report), encoding="utf-8")
+    return run_dir
+
+
+def test_merge_of_two_shards_recomputes_the_run_report(tmp_path: Path) -> None:
+    first = _shard_run(
+        tmp_path / "shard1",
+        [_entry("a.sql:1", "SELECT", 10.0, True), _entry("a.sql:2", "SELECT", 30.0, True)],
+    )
+    second = _shard_run(
+        tmp_path / "shard2",
+        [_entry("b.sql:1", "SELECT", 20.0, True), _entry("b.sql:2", "INSERT", 5.0, False)],
+    )
+    output_dir = tmp_path / "merged"
+
+    overview = _merge_shard_runs(
+        [(ShardSpec(1, 2), first), (ShardSpec(2, 2), second)], output_dir
+    )
+
+    assert overview["query_count"] == 4
+    assert overview["success_count"] == 3
+    assert overview["error_count"] == 1
+    assert [run["query_count"] for run in overview["shards"]["runs"]] == [2, 2]
+    merged = json.loads((output_dir / RUN_REPORT_NAME).read_text(encoding="utf-8"))
+    select = merged["statement_type_summary"]["SELECT"]
+    assert select["total_queries"] == 3
+    assert select["timing_ms"]["median"] == 20.0
+    entries = list(iter_report_queries(output_dir / RUN_REPORT_NAME))
+    assert [(entry["identifier"], entry["shard_dir"]) for entry in entries] == [
+        ("a.sql:1", str(first)),
+        ("a.sql:2", str(first)),
+        ("b.sql:1", str(second)),
+        ("b.sql:2", str(second)),
+    ]
+    assert not (output_dir / ".spool").exists()
@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+import json
+import subprocess
+import sys
+from pathlib import Path
+from typing import List
+
+from sql_splitter import skip_trivia, split_sql_text
+
+# Indented comment lines between statements used to make the trivia pattern try every
+# way of dividing the run between its branches: three lines took about a minute.
+_COMMENTED_GAP = "SELECT 1;\n" + "    -- step i\n\n    " * 40 + "SELECT a FROM t;"
+
+
+def _split_within(sql_text: str, seconds: float) -> List[str]:
+    # A regex match holds the GIL, so the time limit is enforced on a child process.
+    completed = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            "import json, sys; from sql_splitter import split_sql_text; "
+            "print(json.dumps(split_sql_text(sys.stdin.read())))",
+        ],
+        input=sql_text,
+        capture_output=True,
+        text=True,
+        timeout=seconds,
+        cwd=Path(__file__).resolve().parent,
+        check=True,
+    )
+    return json.loads(completed.stdout)
+
+
+def test_split_after_indented_comments_is_linear() -> None:
+    statements = _split_within(_COMMENTED_GAP, seconds=10.0)
+    assert statements[0] == "SELECT 1"
+    assert statements[1].endswith("SELECT a FROM t")
+    assert len(statements) == 2
+
+
+def test_routine_after_indented_comments_keeps_its_body() -> None:
+    sql_text = (
+        "SELECT 1;\n"
+        + "  /* note */ -- step\n" * 40
+        + "REPLACE PROCEDURE p() BEGIN SELECT 1; SELECT 2; END;"
+    )
+    statements = _split_within(sql_text, seconds=10.0)
+    assert len(statements) == 2
+    assert statements[1].endswith("BEGIN SELECT 1; SELECT 2; END")
+
+
+def test_skip_trivia() -> None:
+    assert skip_trivia("  -- a\n /* b */ SELECT") == len("  -- a\n /* b */ ")
+    assert skip_trivia("/* unterminated") == len("/* unterminated")
+    assert skip_trivia("SELECT", 0) == 0
+
+
+def test_end_case_closes_its_case_block() -> None:
+    statements = split_sql_text(
+        "REPLACE PROCEDURE p(IN x INT) BEGIN CASE x WHEN 1 THEN INSERT INTO t VALUES(1); "
+        "ELSE INSERT INTO t VALUES(2); END CASE; END; SELECT 1; SELECT 2;"
+    )
+    assert len(statements) == 3
+    assert statements[0].endswith("END CASE; END")
+    assert statements[1:] == ["SELECT 1", "SELECT 2"]
+
+
+def test_statements_after_a_procedure_are_split() -> None:
+    statements = split_sql_text(
+        "REPLACE PROCEDURE p() BEGIN\n"
+        "  IF x > 0 THEN SELECT CASE WHEN a THEN 1 END FROM t; END IF;\n"
+        "END;\n"
+        "INSERT INTO u SELECT * FROM t;\n"
+        "SELECT 2"
+    )
+    assert len(statements) == 3
+    assert statements[0].endswith("END IF;\nEND")
+    assert statements[1:] == ["INSERT INTO u SELECT * FROM t", "SELECT 2"]